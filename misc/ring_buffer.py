@@ -0,0 +1,137 @@
+# ----------------------------------------------------------------------------
+# ring_buffer.py
+# Fixed-capacity byte ring buffer
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# ----------------------------------------------------------------------------
+import sys
+if sys.implementation.name == "micropython":
+  import micropython
+else:
+  # Standard Python
+  import types
+  micropython = types.SimpleNamespace(viper=lambda f : f)
+  ptr8 = lambda b : b
+
+__version__ = "0.1.0.1"
+
+# ----------------------------------------------------------------------------
+@micropython.viper
+def _find(buf, b:int, i0:int, i1:int) -> int:
+  """ Returns the index of the first byte with value `b` in `buf[i0:i1]`,
+      or -1 if not found
+  """
+  p = ptr8(buf)
+  i = i0
+  while i < i1:
+    if p[i] == b:
+      return i
+    i += 1
+  return -1
+
+# ----------------------------------------------------------------------------
+class RingBuffer(object):
+  """Fixed-capacity byte ring buffer; does not allocate after creation."""
+
+  def __init__(self, size):
+    self._size = size
+    self._buf = bytearray(size)
+    self._mv = memoryview(self._buf)
+    self._iR = 0
+    self._n = 0
+
+  def __len__(self):
+    return self._n
+
+  @property
+  def capacity(self):
+    return self._size
+
+  @property
+  def free(self):
+    return self._size -self._n
+
+  def clear(self):
+    self._iR = 0
+    self._n = 0
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def put(self, data):
+    """ Append the bytes in `data`; returns the number of bytes stored, which
+        is smaller than `len(data)` if the buffer is full
+    """
+    if not data:
+      return 0
+    src = memoryview(data)
+    n = min(len(src), self._size -self._n)
+    iW = (self._iR +self._n) %self._size
+    k = min(n, self._size -iW)
+    self._mv[iW:iW+k] = src[0:k]
+    if k < n:
+      self._mv[0:n-k] = src[k:n]
+    self._n += n
+    return n
+
+  def put_from(self, readinto):
+    """ Fill free space directly from a stream, with `readinto` being a
+        function that accepts a buffer, fills it and returns the number of
+        bytes read (e.g. `UART.readinto`); returns the number of bytes stored
+    """
+    nTot = 0
+    while self._n < self._size:
+      iW = (self._iR +self._n) %self._size
+      k = min(self._size -self._n, self._size -iW)
+      n = readinto(self._mv[iW:iW+k])
+      if not n:
+        break
+      self._n += n
+      nTot += n
+      if n < k:
+        break
+    return nTot
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def peek(self, i=0):
+    """ Return the byte at offset `i` (relative to the oldest byte)
+    """
+    return self._buf[(self._iR +i) %self._size]
+
+  def skip(self, n):
+    """ Discard the `n` oldest bytes
+    """
+    n = min(n, self._n)
+    self._iR = (self._iR +n) %self._size
+    self._n -= n
+
+  def find(self, b, start=0):
+    """ Return the offset of the first byte with value `b` at or after
+        offset `start`, or -1 if not found; searches the (at most two)
+        contiguous parts of the buffer
+    """
+    n = self._n -start
+    if n <= 0:
+      return -1
+    i0 = (self._iR +start) %self._size
+    k = min(n, self._size -i0)
+    i = _find(self._buf, b, i0, i0 +k)
+    if i >= 0:
+      return start +i -i0
+    if k < n:
+      i = _find(self._buf, b, 0, n -k)
+      if i >= 0:
+        return start +k +i
+    return -1
+
+  def copy_to(self, dest, n, i=0):
+    """ Copy `n` bytes starting at offset `i` into the buffer `dest` w/o
+        removing them; `dest` should be a memoryview to avoid copies
+    """
+    i0 = (self._iR +i) %self._size
+    k = min(n, self._size -i0)
+    dest[0:k] = self._mv[i0:i0+k]
+    if k < n:
+      dest[k:n] = self._mv[0:n-k]
+
+# ----------------------------------------------------------------------------
@@ -11,6 +11,17 @@
 # 2021-02-01, v1.4, Switched to binary format for efficiency
 # 2021-06-13, v1.5, - some bug fixes
 #                   - memory in KBytes
+# 2026-10-19, v1.6, Optional binary framing with CRC-16, negotiated via `VER`
+#                   Ring-buffer based receive path for both framing modes
+#                   Pipelined requests (`request()`, `poll_replies()`)
+#                   Preallocated message and encode buffers, `RMsgPool`
+#                   Batches of messages in one frame (`BAT`)
+#                   Raw parameter sets for typed data (see `rmsg_schema.py`)
+#                   Delta-encoded status stream (`STS`, see `rmsg_status.py`)
+#                   Link statistics (`LNK`, see `rmsg_stats.py`)
+#                   Reliable delivery (see `rmsg_reliable.py`)
+#                   BLE: sent as MTU-sized notifications, received directly
+#                   into the ring buffer (see `ble_peripheral.py`)
 # ----------------------------------------------------------------------------
 try:
   ModuleNotFoundError
@@ -20,16 +31,35 @@ try:
   # Micropython imports
   import array
   import binascii
+  import micropython
+  import uctypes
   from micropython import const
   from robotling_lib.misc.helpers import timed_function
+  from robotling_lib.misc.ring_buffer import RingBuffer
   import robotling_lib.misc.ansi_color as ansi
   from robotling_lib.platform.platform import platform
+  from time import ticks_ms, ticks_diff
+  _as_bytes = lambda a : memoryview(
+      uctypes.bytearray_at(uctypes.addressof(a), len(a) *a.itemsize)
+    )
 except ModuleNotFoundError:
   # Standard Python imports
   const = lambda x : x
   import array
-
-__version__   = "0.1.5.0"
+  import binascii
+  import time
+  import types
+  micropython = types.SimpleNamespace(viper=lambda f : f)
+  ptr8 = lambda b : b
+  ticks_ms = lambda : int(time.monotonic() *1000)
+  ticks_diff = lambda t1, t0 : t1 -t0
+  try:
+    from robotling_lib.misc.ring_buffer import RingBuffer
+  except ModuleNotFoundError:
+    from ring_buffer import RingBuffer
+  _as_bytes = lambda a : memoryview(a).cast("B")
+
+__version__   = "0.1.6.5"
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 TOK_REM     = const(0)
@@ -40,6 +70,12 @@ TOK_VER     = const(1)
 # Information about software version (V) and free space in SRAM (M) in KBytes
 # >VER;
 # <VER V=100 M=1234;
+# Optionally, the client can request a framing mode (`FRM_xxx`); if the server
+# supports it, it replies with the same framing mode (still in the old mode)
+# and switches to it. The client switches after receiving that reply (see
+# `RMsg.negotiate_framing()` and `RMsg.requested_framing`)
+# >VER F=f;
+# <VER V=100 M=1234 F=f;
 
 TOK_ERR     = const(2)
 # Returns error code regarding the last message
@@ -68,6 +104,8 @@ STA_S_LEN   = const(23)
 #       hd,p,r  compass heading, pitch and roll ([°])
 #       l0..l7  servo load channels #0 to #7
 #       f0..f6  foot positions (just y)
+#  Alternatively, the status can be sent as typed payload in a raw parameter
+#  set (`#`), see `rmsg_schema.STA_SCHEMA`
 '''
 //       tv,     ms since last update of voltages
 //       ta,     ms since last update of analog inputs
@@ -135,11 +173,50 @@ TOK_CAL     = const(11)
 # >CAL S=st;
 # <ACK C=<command>;
 
-TOK_LastInd = const(11)
+TOK_BAT     = const(12)
+# Batch of complete messages (each with its own token, count and parameter
+# sets) in one frame, e.g. to send `GGP`, `GGT` and a `STA` request in one go.
+# The reply is a batch with the replies to the messages, in the same order,
+# and carries the count of the requesting batch. In a batch message, the field
+# `nPSets` contains the number of messages (see `RMsg.add_msg()`,
+# `RMsg.batch_len` and `RMsg.get_from_batch()`)
+# >BAT [GGP B=...][GGT D=...][STA];
+# <BAT [ACK C=8][ACK C=9][STA S=...];
+
+TOK_STS     = const(13)
+# Status stream; the server pushes the status (see `STA`) regularly, as a
+# keyframe with all values or as a delta with only the values that changed
+# since the last message. The client subscribes with a period (p, in [ms];
+# 0=stop) and the number of messages (k) after which a keyframe is sent, and
+# requests a keyframe (R=1) if it missed a message or reconnected
+# with q,         sequence number (0..32767)
+#      ml,mh      bitmask of changed values (lower and upper 16 bits)
+# >STS P=p,k;
+# >STS R=1;
+# <ACK C=<command>;
+# <STS K=q S=hs,ws,...;
+# <STS D=q,ml,mh V=...;
+
+TOK_LNK     = const(14)
+# Link statistics of the server (see `rmsg_stats.LinkStats`), optionally only
+# for the token t; R=1 clears the statistics after replying. Counters are
+# clipped to 32767
+# with tx,rx      messages sent and received
+#      to         requests w/o reply in time
+#      ls,ro,lt   messages lost, messages reordered, late replies
+#      ce,bf      frames with CRC mismatch, other invalid frames
+#      ov         bytes lost because the receive buffer was full
+#      bt,br      bytes per second sent and received
+#      h0..h9     latency histogram (see `rmsg_stats.LAT_BINS_MS`)
+#      mn,av,mx   minimal, mean and maximal latency in [ms]
+# >LNK [T=t] [R=1];
+# <LNK C=tx,rx,to,ls,ro,lt,ce,bf,ov B=bt,br H=h0,..,h9 L=mn,av,mx;
+
+TOK_LastInd = const(14)
 
 TOK_NONE    = const(255)
 TOK_StrList = ["REM", "VER", "ERR", "ACK", "STA", "XP0",
-               "GG0", "GGE", "GGP", "GGT", "GGQ", "CAL"]
+               "GG0", "GGE", "GGP", "GGT", "GGQ", "CAL", "BAT", "STS", "LNK"]
 
 _TOK_StrLen             = const(3)
 _TOK_MaxPSets           = const(4)
@@ -155,16 +232,39 @@ _TOK_offsPChar          = const(0)
 _TOK_offsNVal           = const(1)
 _TOK_offsVals           = const(2)
 
+_MSG_MaxLen             = const(200) # >= 4 +(2 +32) *4 int16 values, more
+                                     # for batches
+_BAT_MaxMsgs            = const(8)
+
 # For external access ...
+TOK_addrTok             = const(_TOK_addrTok)
+TOK_addrLen             = const(_TOK_addrLen)
+TOK_addrNPSets          = const(_TOK_addrNPSets)
 TOK_addrPSetStart       = const(_TOK_addrPSetStart)
 TOK_offsVals            = const(_TOK_offsVals)
 TOK_offsNVal            = const(_TOK_offsNVal)
+MSG_MaxLen              = const(_MSG_MaxLen)
 
 MSG_Client             = ">"
 MSG_Server             = "<"
 MSG_EndChr             = ";"
 MSG_DataSepChr         = ","
 
+
+# Framing modes
+FRM_HEX                = const(0)   # hexlified text (default)
+FRM_BIN                = const(1)   # binary w/ length and CRC-16
+
+_MSG_EndByte            = const(0x3B) # ";"
+
+_FRM_BinClient          = const(0xBE)
+_FRM_BinServer          = const(0xBC)
+_FRM_BinOverhead        = const(5)
+_FRM_InBufSize          = const(1024)
+
+_REQ_DefWindow          = const(4)    # Default # of requests in flight
+_MSG_MaxCount           = const(0x7FFF)
+
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 # Message format: ['<' or '>'][int16 array][';']
 #
@@ -181,6 +281,77 @@ MSG_DataSepChr         = ","
 #           [nVal1]   If `nPSets` > 0, number of values for 2nd parameter set
 #           [p1.0]
 #           ...
+#
+# In binary framing mode (`FRM_BIN`), the int16 array is sent as is:
+#   [0xBE (client) or 0xBC (server)][len, uint16][int16 array][CRC-16, uint16]
+# with `len` in number of int16 values; the CRC (CCITT, initial value 0xFFFF)
+# covers `len` and the int16 array. All multibyte values are little endian.
+# - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+def _make_crc16_table():
+  tab = array.array("H", [0]*256)
+  for i in range(256):
+    crc = i << 8
+    for _ in range(8):
+      crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+    tab[i] = crc & 0xFFFF
+  return tab
+
+_CRC16_TAB = _make_crc16_table()
+
+def _make_hex_table():
+  tab = bytearray([0xFF]*256)
+  for i, c in enumerate(b"0123456789abcdef"):
+    tab[c] = i
+  for i, c in enumerate(b"ABCDEF"):
+    tab[c] = 10 +i
+  return tab
+
+_HEX_VAL = _make_hex_table()
+_HEX_CHR = b"0123456789abcdef"
+
+@micropython.viper
+def _unhex(src, n:int, dest, hv) -> int:
+  """ Decode the `n` hex characters in `src` into `dest`, using the table
+      `hv`; returns -1 if there is an invalid character
+  """
+  ps = ptr8(src)
+  pd = ptr8(dest)
+  ph = ptr8(hv)
+  i = 0
+  while i < n:
+    hi = ph[ps[i]]
+    lo = ph[ps[i +1]]
+    if (hi | lo) & 0xF0:
+      return -1
+    pd[i >> 1] = (hi << 4) | lo
+    i += 2
+  return 0
+
+@micropython.viper
+def _hexlify(src, n:int, dest, hc) -> int:
+  """ Write the `n` bytes in `src` as hex characters (from the table `hc`)
+      into `dest`, starting at index 1; returns the index after the last
+      character
+  """
+  ps = ptr8(src)
+  pd = ptr8(dest)
+  ph = ptr8(hc)
+  k = 1
+  for i in range(n):
+    b = ps[i]
+    pd[k] = ph[b >> 4]
+    pd[k +1] = ph[b & 0x0F]
+    k += 2
+  return k
+
+def crc16(buf, n, crc=0xFFFF, i0=0):
+  """ CRC-16 (CCITT) of `n` bytes in `buf`, starting at index `i0`
+  """
+  tab = _CRC16_TAB
+  for i in range(i0, i0 +n):
+    crc = ((crc << 8) & 0xFF00) ^ tab[((crc >> 8) ^ buf[i]) & 0xFF]
+  return crc
+
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 # Error codes
 class Err():
@@ -196,6 +367,8 @@ class Err():
   MsgLikelyNotYetInBuf   = const(10)
   NoReply                = const(11)
   Unknown                = const(12)
+  CRCMismatch            = const(13)
+  Cancelled              = const(14)
 
 class PortType():
   NONE                   = const(0)
@@ -209,8 +382,9 @@ class PortType():
 class RMsg(object):
   """A simple string-based interboard message format."""
 
-  def __init__(self, typeMsgOut=MSG_Client):
-    """ Initialize message content
+  def __init__(self, typeMsgOut=MSG_Client, in_buf_size=_FRM_InBufSize):
+    """ Initialize message content; `in_buf_size` is the size of the receive
+        buffer in bytes (0 for messages that are not received directly)
     """
     self._poll = None
     self._portType = PortType.NONE
@@ -219,24 +393,50 @@ class RMsg(object):
     else:
       self._typeMsgOut = MSG_Client
     self._typeMsgIn = MSG_Client if typeMsgOut == MSG_Server else MSG_Server
+    isClient = self._typeMsgOut == MSG_Client
+    self._binStartOut = _FRM_BinClient if isClient else _FRM_BinServer
+    self._binStartIn = _FRM_BinServer if isClient else _FRM_BinClient
+    self._framing = FRM_HEX
+    self._inRing = RingBuffer(in_buf_size)
+    self._outBin = bytearray(_FRM_BinOverhead +_MSG_MaxLen *2)
+    self._outBinMv = memoryview(self._outBin)
+    self._outHex = bytearray(3 +_MSG_MaxLen *4)
+    self._outHexMv = memoryview(self._outHex)
+    self._outHex[0] = ord(self._typeMsgOut)
+    self._hexNewline = False
+    msg = array.array("h", [0] *_MSG_MaxLen)
+    self._msg = msg
+    self._msgMv = memoryview(msg)
+    self._msgBytes = _as_bytes(msg)
+    self._addrPSet = array.array("H", [0]*_TOK_MaxPSets)
+    self._nPSetVals = array.array("H", [0]*_TOK_MaxPSets)
+    self._hdrIn = bytearray(2)
+    self._inHex = bytearray(_MSG_MaxLen *4)
+    self._inHexMv = memoryview(self._inHex)
+    self._startIn = ord(self._typeMsgIn)
+    self.write_bin = None
+    self.read_raw = None
+    self.readinto = None
     self._count = 0
+    self._defHandler = None
+    self._stats = None
+    self.set_window(_REQ_DefWindow)
     self.reset(clearBuf=True)
 
   def reset(self, token=TOK_NONE, clearBuf=False):
-    """ Reset message content
+    """ Reset message content (in place, w/o allocating memory)
     """
     if clearBuf:
-      self._sInBuf = ""
-    n = 3 +(2 +_TOK_MaxValuesPerPSet) *_TOK_MaxPSets
-    msg = array.array("h", [0] *n)
+      self._inRing.clear()
+    msg = self._msg
     msg[_TOK_addrTok] = token
     msg[_TOK_addrCount] = -1
     msg[_TOK_addrLen] = _TOK_addrPSetStart
     msg[_TOK_addrNPSets] = 0
-    self._msg = msg
-    self._addrPSet = array.array("H", [0]*_TOK_MaxPSets)
-    self._nPSetVals = array.array("H", [0]*_TOK_MaxPSets)
-    self._lastHexMsgIn = ""
+    for i in range(_TOK_MaxPSets):
+      self._addrPSet[i] = 0
+      self._nPSetVals[i] = 0
+    self._lastMsgIn = ""
     self._errC = Err.Ok
 
   @property
@@ -249,7 +449,41 @@ class RMsg(object):
 
   @property
   def in_buffer_len(self):
-    return len(self._sInBuf)
+    return len(self._inRing)
+
+  @property
+  def framing(self):
+    return self._framing
+
+  @framing.setter
+  def framing(self, mode):
+    """ Switch framing mode (`FRM_xxx`); requires that the transport
+        supports raw binary reads and writes for `FRM_BIN`
+    """
+    if mode == FRM_BIN and (self.write_bin is None or self.read_raw is None):
+      mode = FRM_HEX
+    self._framing = mode
+
+  @property
+  def stats(self):
+    return self._stats
+
+  def attach_stats(self, stats):
+    """ Attach a `rmsg_stats.LinkStats` object that collects statistics of
+        the messages sent and received (None to detach)
+    """
+    self._stats = stats
+
+  @property
+  def requested_framing(self):
+    """ Returns the framing mode requested by a `VER` message (on the
+        server side), or -1 if none was requested
+    """
+    if self._msg[_TOK_addrTok] == TOK_VER:
+      i = self.find_pset("F")
+      if i >= 0:
+        return self[i,0]
+    return -1
 
   @property
   def count(self):
@@ -272,6 +506,10 @@ class RMsg(object):
   def msg_as_array(self):
     return self._msg
 
+  @property
+  def msg_as_bytes(self):
+    return self._msgBytes
+
   def __getitem__(self, iKD):
     i = iKD[0]
     j = iKD[1]
@@ -288,6 +526,17 @@ class RMsg(object):
     if i >= 0 and i < msg[_TOK_addrNPSets] and j >= 0 and j < self._nPSetVals[i]:
       self._msg[self._addrPSet[i] +_TOK_offsVals +j] = val
 
+  def find_pset(self, key):
+    """ Returns the index of the parameter set with the type character
+        `key`, or -1 if the message does not contain such a set
+    """
+    msg = self._msg
+    c = ord(key[0])
+    for i in range(msg[_TOK_addrNPSets]):
+      if msg[self._addrPSet[i] +_TOK_offsPChar] == c:
+        return i
+    return -1
+
   # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
   #@timed_function
   def add_data(self, key, data):
@@ -301,57 +550,178 @@ class RMsg(object):
       p = _TOK_addrPSetStart
     else:
       p = self._addrPSet[i-1] +_TOK_offsVals +self._nPSetVals[i-1]
-    self._msg[p +_TOK_offsPChar] = ord(key[0])
-    self._msg[p +_TOK_offsNVal] = n
+    msg = self._msg
+    msg[p +_TOK_offsPChar] = ord(key[0])
+    msg[p +_TOK_offsNVal] = n
     q = p +_TOK_offsVals
-    self._msg[q:q+n] = array.array("h", data)
+    for j in range(n):
+      msg[q +j] = data[j]
     self._nPSetVals[i] = n
     self._addrPSet[i] = p
-    self._msg[_TOK_addrNPSets] += 1
-    self._msg[_TOK_addrLen] += _TOK_offsVals +n
+    msg[_TOK_addrNPSets] += 1
+    msg[_TOK_addrLen] += _TOK_offsVals +n
+
+  def reserve_data(self, key, n_bytes):
+    """ Add a parameter set with room for `n_bytes` bytes of raw data and
+        return the byte offset of the data in `msg_as_bytes`
+    """
+    n = (n_bytes +1) //2
+    assert n <= _TOK_MaxValuesPerPSet, "Too many values in parameter set"
+    i = self._msg[_TOK_addrNPSets]
+    assert i < _TOK_MaxPSets, "Too many parameter sets"
+    p = self._msg[_TOK_addrLen]
+    msg = self._msg
+    msg[p +_TOK_offsPChar] = ord(key[0])
+    msg[p +_TOK_offsNVal] = n
+    self._nPSetVals[i] = n
+    self._addrPSet[i] = p
+    msg[_TOK_addrNPSets] += 1
+    msg[_TOK_addrLen] += _TOK_offsVals +n
+    return (p +_TOK_offsVals) *2
+
+  def data_offset(self, i):
+    """ Returns the byte offset in `msg_as_bytes` of the values of the
+        `i`-th parameter set, or -1 if the set does not exist
+    """
+    if i < 0 or i >= self._msg[_TOK_addrNPSets] or i >= _TOK_MaxPSets:
+      return -1
+    return (self._addrPSet[i] +_TOK_offsVals) *2
+
+  def load(self, a):
+    """ Set message content from an int16 array `a`, e.g. the content of
+        another message (`msg_as_array`)
+    """
+    n = a[_TOK_addrLen]
+    self._msgMv[0:n] = memoryview(a)[0:n]
+    self._index_psets()
 
   #@timed_function
   def from_hex_string(self, sHex):
     """ Set message content from hexlified string
     """
-    if len(sHex) == 0:
+    n = len(sHex) //2
+    if n == 0:
       self._errC = Err.CmdStrIncomplete
+    elif n > len(self._msgBytes):
+      self._errC = Err.TooManyParamsOrData
     else:
       self._errC = Err.Ok
-      msg = array.array("h", binascii.unhexlify(sHex))
-      n = msg[_TOK_addrNPSets]
-      if n > 0:
-        p = _TOK_addrPSetStart
-        for iP in range(n):
-          self._addrPSet[iP] = p
-          self._nPSetVals[iP] = msg[p +_TOK_offsNVal]
-          p += _TOK_offsVals +msg[p +_TOK_offsNVal]
-      self._msg = msg
+      self._msgBytes[0:n] = binascii.unhexlify(sHex)
+      self._index_psets()
     return self._errC
 
+  def _index_psets(self):
+    """ Update the parameter set addresses from the message content
+    """
+    msg = self._msg
+    n = min(msg[_TOK_addrNPSets], _TOK_MaxPSets)
+    if msg[_TOK_addrTok] == TOK_BAT:
+      # A batch has no parameter sets of its own
+      for iP in range(_TOK_MaxPSets):
+        self._nPSetVals[iP] = 0
+    elif n > 0:
+      p = _TOK_addrPSetStart
+      for iP in range(n):
+        self._addrPSet[iP] = p
+        self._nPSetVals[iP] = msg[p +_TOK_offsNVal]
+        p += _TOK_offsVals +msg[p +_TOK_offsNVal]
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def add_msg(self, other):
+    """ Append the complete message `other` to this batch message (which
+        needs to be reset to `TOK_BAT`)
+    """
+    msg = self._msg
+    assert msg[_TOK_addrTok] == TOK_BAT, "Not a batch message"
+    assert msg[_TOK_addrNPSets] < _BAT_MaxMsgs, "Too many messages in batch"
+    a = other.msg_as_array
+    n = a[_TOK_addrLen]
+    p = msg[_TOK_addrLen]
+    assert p +n <= _MSG_MaxLen, "Batch too long"
+    self._msgMv[p:p+n] = memoryview(a)[0:n]
+    msg[_TOK_addrNPSets] += 1
+    msg[_TOK_addrLen] += n
+
+  @property
+  def batch_len(self):
+    """ Number of messages in a batch message (0 if not a batch)
+    """
+    msg = self._msg
+    return msg[_TOK_addrNPSets] if msg[_TOK_addrTok] == TOK_BAT else 0
+
+  def get_from_batch(self, i, dest):
+    """ Copy the `i`-th message of this batch into the message object
+        `dest` (e.g. from a `RMsgPool`); returns False if there is no such
+        message
+    """
+    p = self._batch_offset(i)
+    if p < 0:
+      return False
+    msg = self._msg
+    n = msg[p +_TOK_addrLen]
+    dest._msgMv[0:n] = self._msgMv[p:p+n]
+    dest._index_psets()
+    return True
+
+  def _batch_offset(self, i):
+    """ Returns the index of the `i`-th message in the batch, or -1
+    """
+    msg = self._msg
+    if i < 0 or i >= self.batch_len:
+      return -1
+    p = _TOK_addrPSetStart
+    for _ in range(i):
+      p += msg[p +_TOK_addrLen]
+    return p
+
   def to_hex_string(self):
     """ Convert message to hexlified string
     """
-    msg = self._msg
-    n = msg[_TOK_addrLen]
-    return self._typeMsgOut +binascii.hexlify(msg[:n]).decode() +MSG_EndChr
+    return bytes(self._to_hex_frame(self._msg[_TOK_addrLen], False)).decode()
+
+  def _to_hex_frame(self, n, newline=None):
+    """ Hexlify the first `n` int16 values of the message into the hex
+        frame buffer; returns a memoryview of the frame
+    """
+    oh = self._outHex
+    k = _hexlify(self._msgBytes, n *2, oh, _HEX_CHR)
+    oh[k] = _MSG_EndByte
+    k += 1
+    if self._hexNewline if newline is None else newline:
+      oh[k] = 0x0A
+      k += 1
+    return self._outHexMv[0:k]
 
   # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
   #@micropython.native
   def __repr__(self):
     msg = self._msg
-    s = self._typeMsgOut +TOK_StrList[msg[_TOK_addrTok]]
-    n = msg[_TOK_addrNPSets]
-    if n > 0:
-      p = _TOK_addrPSetStart
-      for i in range(n):
-        s += " " +chr(msg[p +_TOK_offsPChar]) +"="
-        m = msg[p +_TOK_offsNVal]
-        for j in range(m):
-          s += str(msg[p +_TOK_offsVals +j])
-          s += "," if j < m-1 else ""
-        p += _TOK_offsVals +m
-    return s +MSG_EndChr
+    sl = [self._typeMsgOut]
+    if msg[_TOK_addrTok] == TOK_BAT:
+      sl.append(TOK_StrList[TOK_BAT] +" ")
+      for i in range(self.batch_len):
+        sl.append("[")
+        self._repr_msg(sl, self._batch_offset(i))
+        sl.append("]")
+    else:
+      self._repr_msg(sl, 0)
+    sl.append(MSG_EndChr)
+    return "".join(sl)
+
+  def _repr_msg(self, sl, p0):
+    """ Append the text representation of the message starting at index
+        `p0` of the message array to the list `sl`
+    """
+    msg = self._msg
+    tok = msg[p0 +_TOK_addrTok]
+    sl.append(TOK_StrList[tok] if tok <= TOK_LastInd else "???")
+    p = p0 +_TOK_addrPSetStart
+    for i in range(msg[p0 +_TOK_addrNPSets]):
+      m = msg[p +_TOK_offsNVal]
+      q = p +_TOK_offsVals
+      sl.append(" " +chr(msg[p +_TOK_offsPChar]) +"=")
+      sl.append(MSG_DataSepChr.join([str(v) for v in msg[q:q+m]]))
+      p = q +m
 
   # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
   #@timed_function
@@ -361,27 +731,138 @@ class RMsg(object):
         array (=a message w/o start and end character). `out_count` overwrites
         the out's message `count` field. Accepts a timeout `tout_ms` in [ms].
     """
-    self._lastHexMsgIn = ""
+    self._lastMsgIn = ""
     msg = self._msg
     tok = msg[_TOK_addrTok]
     if tok < 0 or tok > TOK_LastInd:
       self._errC = Err.CmdNotRecognized
     else:
-      cnt = out_count if not out_count is None else self._count
-      msg[_TOK_addrCount] = cnt
-      self._count = cnt +1
-      #print("send count-to-send", msg[_TOK_addrCount])
-      n = msg[_TOK_addrLen]
-      s = self._typeMsgOut +binascii.hexlify(msg[:n]).decode() +MSG_EndChr
-      self.write(s)
+      cnt = self._write_msg(out_count, await_reply)
       if await_reply:
         if tout_ms > 0 and self._poll:
           self._poll(tout_ms)
         #self._errC = Err.Ok if self.receive(in_count=cnt) else Err.NoReply
         #print("send before-receive, in_count", cnt)
-        self.receive(in_count=cnt)
-    return self._lastHexMsgIn
+        if not self.receive(in_count=cnt) and self._stats:
+          self._stats.on_timeout(cnt)
+    return self._lastMsgIn
+
+  def _write_msg(self, out_count=None, expect_reply=False, advance=True):
+    """ Set the message count and write the message using the current
+        framing mode; returns the count. If `advance` is False, the count
+        of the next message is not changed (e.g. for retransmissions)
+    """
+    msg = self._msg
+    cnt = out_count if not out_count is None else self._count
+    msg[_TOK_addrCount] = cnt
+    if advance:
+      self._count = (cnt +1) & _MSG_MaxCount
+    n = msg[_TOK_addrLen]
+    if self._framing == FRM_BIN:
+      frm = self._to_bin_frame(n)
+      self.write_bin(frm)
+    elif self.write_bin:
+      frm = self._to_hex_frame(n)
+      self.write_bin(frm)
+    else:
+      frm = self.to_hex_string()
+      self.write(frm)
+    if self._stats:
+      self._stats.on_tx(msg[_TOK_addrTok], cnt, len(frm), expect_reply)
+    return cnt
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def set_window(self, n):
+    """ Define the maximal number `n` of requests that can be in flight
+        (see `request()`); pending requests are dropped
+    """
+    n = max(1, n)
+    self._reqCount = array.array("h", [-1]*n)             # -1=free slot
+    self._reqT0 = array.array("i", [0]*n)                 # Send time [ms]
+    self._reqTout = array.array("H", [0]*n)               # Timeout [ms]
+    self._reqCb = [None]*n                                # Callbacks
+    self._nReq = 0
+
+  @property
+  def pending(self):
+    """ Number of requests in flight
+    """
+    return self._nReq
+
+  def set_default_handler(self, callback):
+    """ Define a function `callback(msg)` that is called by
+        `poll_replies()` for messages that do not match a pending request
+    """
+    self._defHandler = callback
+
+  def request(self, callback=None, tout_ms=100):
+    """ Send message w/o waiting for the reply and return its count, or -1
+        if the in-flight window is full or the token invalid. When the reply
+        arrives or the request times out after `tout_ms`, `poll_replies()`
+        calls `callback(msg, errC)`, with `msg` being this message object
+        (containing the reply, only valid during the call) or None and `errC`
+        being `Err.NoReply`, respectively
+    """
+    tok = self._msg[_TOK_addrTok]
+    if tok < 0 or tok > TOK_LastInd:
+      self._errC = Err.CmdNotRecognized
+      return -1
+    rc = self._reqCount
+    for i in range(len(rc)):
+      if rc[i] < 0:
+        break
+    else:
+      self._errC = Err.DeviceNotReady
+      return -1
+    cnt = self._write_msg(None, True)
+    rc[i] = cnt
+    self._reqT0[i] = ticks_ms()
+    self._reqTout[i] = tout_ms
+    self._reqCb[i] = callback
+    self._nReq += 1
+    self._errC = Err.Ok
+    return cnt
+
+  def poll_replies(self):
+    """ Process all received messages, match replies to pending requests
+        by their count, call the respective callbacks and expire requests
+        that timed out; returns the number of messages processed.
+        Note that received messages overwrite the message content, hence
+        do not call this function while composing a new message.
+    """
+    nMsg = 0
+    rc = self._reqCount
+    while self.receive():
+      nMsg += 1
+      cnt = self._msg[_TOK_addrCount]
+      for i in range(len(rc)):
+        if rc[i] == cnt:
+          cb = self._reqCb[i]
+          self._free_request(i)
+          if cb:
+            cb(self, Err.Ok)
+          break
+      else:
+        if self._defHandler:
+          self._defHandler(self)
+    if self._nReq > 0:
+      t = ticks_ms()
+      for i in range(len(rc)):
+        if rc[i] >= 0 and ticks_diff(t, self._reqT0[i]) > self._reqTout[i]:
+          if self._stats:
+            self._stats.on_timeout(rc[i])
+          cb = self._reqCb[i]
+          self._free_request(i)
+          if cb:
+            cb(None, Err.NoReply)
+    return nMsg
+
+  def _free_request(self, i):
+    self._reqCount[i] = -1
+    self._reqCb[i] = None
+    self._nReq -= 1
 
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
   #@timed_function
   def receive_timed(self, tout_ms=20, in_count=None):
     return self.receive(tout_ms, in_count)
@@ -390,69 +871,158 @@ class RMsg(object):
   def receive(self, tout_ms=20, in_count=None):
     """ Read from serial connection and check if a complete message is
         available. If `in_count`is defined, discards all messages with a lower
-        count; if received message have a higher count, return an error code
+        count; if received message have a higher count, return an error code.
+        Incoming bytes are collected in a ring buffer, which is scanned in
+        place; a complete frame is decoded directly into the message array
     """
-    self._errC = Err.Ok
-    self._lastHexMsgIn = ""
-    #print("receive any=", self.any())
+    self._lastMsgIn = ""
+    rb = self._inRing
     if self.any() > 0:
-      # Characters are waiting; add them to the buffer
-      buf = self._sInBuf +self.readline().decode()
-      if len(buf) < _TOK_MinRawMsgLen_bytes:
-        # Too few characters for a complete message
-        self._sInBuf = buf
+      # Bytes are waiting; add them to the buffer
+      if self.readinto:
+        rb.put_from(self.readinto)
+      else:
+        b = self.read_raw()
+        n = len(b) -rb.put(b)
+        if n and self._stats:
+          # Buffer full, bytes lost
+          self._stats.on_overflow(n)
+    scan = self._scan_bin if self._framing == FRM_BIN else self._scan_hex
+    while True:
+      self._errC = Err.MsgLikelyNotYetInBuf
+      n = scan(rb)
+      if n == 0:
+        # No (complete) frame in the buffer
+        break
+      if n < 0:
+        # Invalid frame, which was skipped
+        if self._stats:
+          self._stats.on_bad_frame(self._errC == Err.CRCMismatch)
+        continue
+      cnt = self._msg[_TOK_addrCount]
+      if self._stats and (in_count is None or in_count >= cnt):
+        self._stats.on_rx(self._msg[_TOK_addrTok], cnt, n)
+      if in_count is None or in_count == cnt:
+        # The message requested is equal to the received (or the caller
+        # does not care), return the message
+        rb.skip(n)
+        self._lastMsgIn = self._msg
+        self._errC = Err.Ok
+        return True
+      if in_count < cnt:
+        # An older message was requested (than the received), return
+        # an error but keep the current message in the buffer
+        self._errC = Err.MissedExpectedMsgCount
         return False
+      # A younger message was requested (that the received), look at the
+      # next message in the buffer ...
+      rb.skip(n)
+    return False
 
-      # May contain a complete message
-      tmi = self._typeMsgIn
-      tmp = buf.split(tmi)
-      n = len(tmp)
-      i = 0
-      #print("receive start:")
-      #print(tmp, i, self._sInBuf)
-      while i < n:
-        if len(tmp[i]) == 0:
-          i += 1
-          continue
-        if wec := MSG_EndChr in tmp[i]:
-          # Contains a complete message
-          msg = tmp[i][:-1]
-          self.from_hex_string(msg)
-          cnt = self._msg[_TOK_addrCount]
-          #print("receive msg={0}".format(cnt))
-          if in_count is None or in_count == cnt:
-            # The message requested is equal to the received (or the caller
-            # does not care), return the message
-            #print("receive -> success")
-            self._lastHexMsgIn = msg
-            self._sInBuf = tmi +tmi.join(tmp[i+1:])
-            #print(tmp, i, self._sInBuf)
-            return True
-          if in_count:
-            if in_count < cnt:
-              # An older message was requested (than the received), return
-              # an error but keep the current message in the buffer
-              #print("receive msg={0} but expected={1} -> error"
-              #      .format(cnt, in_count))
-              self._sInBuf = tmi +tmi.join(tmp[i:])
-              self._errC = Err.MissedExpectedMsgCount
-              #print(tmp, i, self._sInBuf)
-              return False
-            elif in_count > cnt:
-              # A younger message was requested (that the received), look
-              # at the next message in the buffer ...
-              #print("receive msg={0}, expected={1}, i={2}, n={3} -> i++"
-              #      .format(cnt, in_count, i, n))
-              i += 1
-              #print("received now", tmp, i, self._sInBuf)
-              continue
-
-      #print("receive msg not found")
-      self._sInBuf = tmi +tmi.join(tmp[i:]) if not wec else ""
-      self._errC = Err.MsgLikelyNotYetInBuf
-      #print(tmp, i, self._sInBuf)
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def negotiate_framing(self, mode=FRM_BIN, tout_ms=100):
+    """ Request framing mode `mode` from the server via a `VER` message and
+        switch to it, if the server agrees; returns True if successful
+    """
+    if mode == FRM_BIN and (self.write_bin is None or self.read_raw is None):
+      return False
+    self.reset(TOK_VER)
+    self.add_data("F", [mode])
+    self.send(tout_ms)
+    if self._errC == Err.Ok and self.token == TOK_VER:
+      i = self.find_pset("F")
+      if i >= 0 and self[i,0] == mode:
+        self._framing = mode
+        return True
     return False
 
+  def _to_bin_frame(self, n):
+    """ Pack the first `n` int16 values of the message into the binary
+        frame buffer; returns a memoryview of the frame
+    """
+    ob = self._outBin
+    mv = self._outBinMv
+    nb = n *2
+    ob[0] = self._binStartOut
+    ob[1] = n & 0xFF
+    ob[2] = n >> 8
+    mv[3:3+nb] = self._msgBytes[0:nb]
+    crc = crc16(ob, nb +2, 0xFFFF, 1)
+    ob[3+nb] = crc & 0xFF
+    ob[4+nb] = crc >> 8
+    return mv[0:nb +_FRM_BinOverhead]
+
+  def _scan_hex(self, rb):
+    """ Look for a hexlified frame at the start of the ring buffer `rb` and,
+        if complete, decode it into the message array. Returns the length of
+        the frame in bytes, 0 if there is no complete frame, and -1 if an
+        invalid frame was skipped
+    """
+    i = rb.find(self._startIn)
+    if i < 0:
+      rb.clear()
+      return 0
+    rb.skip(i)
+    j = rb.find(_MSG_EndByte, 1)
+    k = rb.find(self._startIn, 1)
+    if k > 0 and (j < 0 or k < j):
+      # Truncated frame, followed by the next one
+      rb.skip(k)
+      return -1
+    if j < 0:
+      if rb.free == 0:
+        rb.skip(1)
+        return -1
+      return 0
+    nc = j -1
+    if nc & 3 or nc < _TOK_addrPSetStart *4 or nc > _MSG_MaxLen *4:
+      rb.skip(1)
+      return -1
+    hx = self._inHexMv
+    rb.copy_to(hx, nc, 1)
+    if _unhex(hx, nc, self._msgBytes, _HEX_VAL) < 0:
+      rb.skip(1)
+      return -1
+    if self._msg[_TOK_addrLen] *4 != nc:
+      rb.skip(1)
+      return -1
+    self._index_psets()
+    return j +1
+
+  #@micropython.native
+  def _scan_bin(self, rb):
+    """ Look for a binary frame at the start of the ring buffer `rb` and, if
+        complete and valid, decode it into the message array (see also
+        `_scan_hex()`)
+    """
+    i = rb.find(self._binStartIn)
+    if i < 0:
+      rb.clear()
+      return 0
+    rb.skip(i)
+    if len(rb) < _FRM_BinOverhead:
+      return 0
+    hdr = self._hdrIn
+    hdr[0] = rb.peek(1)
+    hdr[1] = rb.peek(2)
+    n = hdr[0] | (hdr[1] << 8)
+    if n < _TOK_addrPSetStart or n > _MSG_MaxLen:
+      rb.skip(1)
+      return -1
+    nb = n *2
+    if len(rb) < nb +_FRM_BinOverhead:
+      # Frame not yet complete
+      return 0
+    mb = self._msgBytes
+    rb.copy_to(mb, nb, 3)
+    crc = crc16(mb, nb, crc16(hdr, 2))
+    if crc != rb.peek(3+nb) | (rb.peek(4+nb) << 8):
+      self._errC = Err.CRCMismatch
+      rb.skip(1)
+      return -1
+    self._index_psets()
+    return nb +_FRM_BinOverhead
+
   # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
   def deinit(self):
     pass
@@ -477,6 +1047,9 @@ class RMsgUARTMPy(RMsg):
     self.read = self._read
     self.readline = self._readline
     self.any = self._any
+    self.write_bin = self._uart.write
+    self.read_raw = self._read
+    self.readinto = self._uart.readinto
     self._portType = PortType.UART_MPY
 
   @property
@@ -508,18 +1081,22 @@ class RMsgBLEMPy(RMsg):
   def __init__(self, bsp, typeMsgOut):
     super().__init__(typeMsgOut)
     self._bsp = bsp
-    self.write = self._bsp.write
+    self.write = self._write
     self.read = self._bsp.read
     self.readline = self._bsp.read
-    self.any = self._any
+    self.any = self._bsp.any
+    self.write_bin = self._write
+    self.read_raw = self._bsp.read
+    self.readinto = self._bsp.readinto
     self._portType = PortType.BLE_MPY
 
   @property
   def isConnected(self):
      return self._bsp.is_connected
 
-  def _any(self):
-    return len(self._bsp.rx_buffer)
+  def _write(self, s):
+    # Notifications are split to fit the MTU and queued by the peripheral
+    self._bsp.write(s, notify=True)
 
 # ----------------------------------------------------------------------------
 class RMsgCOM(RMsg):
@@ -540,6 +1117,9 @@ class RMsgCOM(RMsg):
       self.read = self._read
       self.readline = self._readline
       self.any = self._any
+      self.write_bin = self._write_bin
+      self.read_raw = self._read_raw
+      self._hexNewline = True
       self._portType = PortType.COM_PC
     except serial.SerialException as e:
       print("ERROR: Could not open {0}".format(com))
@@ -552,9 +1132,15 @@ class RMsgCOM(RMsg):
   def _write(self, s):
     self.serClient.write(s.encode('utf-8') +b"\n")
 
+  def _write_bin(self, b):
+    self.serClient.write(b)
+
   def _read(self):
     return self.serClient.read().decode()
 
+  def _read_raw(self):
+    return self.serClient.read(self.serClient.in_waiting)
+
   def _readline(self):
     return self.serClient.read_until()
 
@@ -566,3 +1152,36 @@ class RMsgCOM(RMsg):
       self.serClient.close()
 
 # ----------------------------------------------------------------------------
+class RMsgPool(object):
+  """A small pool of preallocated message objects, e.g. to keep received
+     messages w/o allocating memory."""
+
+  def __init__(self, n, typeMsgOut=MSG_Client):
+    self._msgs = [RMsg(typeMsgOut, in_buf_size=0) for _ in range(max(1, n))]
+    self._isFree = bytearray([1]*len(self._msgs))
+
+  def get(self, token=TOK_NONE):
+    """ Returns a free message object, reset to `token`, or None if all
+        messages are in use
+    """
+    for i, isFree in enumerate(self._isFree):
+      if isFree:
+        self._isFree[i] = 0
+        m = self._msgs[i]
+        m.reset(token)
+        return m
+    return None
+
+  def put(self, msg):
+    """ Return a message object to the pool
+    """
+    for i, m in enumerate(self._msgs):
+      if m is msg:
+        self._isFree[i] = 1
+        return
+
+  @property
+  def available(self):
+    return sum(self._isFree)
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,292 @@
+# ----------------------------------------------------------------------------
+# rmsg_async.py
+# Stream transport for `rmsg` messages using `uasyncio` (MicroPython) or
+# `asyncio` (Windows/Linux)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# 2026-10-19, v1.1, Link statistics (see `rmsg_stats.py`)
+#
+# Usage (e.g. on the host):
+#   msg = await open_serial("/dev/ttyUSB0", 230400)
+#   msg.reset(TOK_GGQ)
+#   msg.add_data("T", [35, 40, 0, 60, 0])
+#   if await msg.send(tout_ms=50):
+#     print(msg)                      # the reply
+#   async for m in msg:               # messages not replying to a request
+#     print(m)
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  import array
+  import uasyncio as asyncio
+  from micropython import const
+  from robotling_lib.misc.rmsg import *
+  from robotling_lib.misc.rmsg import RMsg
+  _IS_MPY = True
+except ModuleNotFoundError:
+  # Standard Python imports
+  const = lambda x : x
+  import array
+  import asyncio
+  try:
+    from robotling_lib.misc.rmsg import *
+    from robotling_lib.misc.rmsg import RMsg
+  except ModuleNotFoundError:
+    from rmsg import *
+    from rmsg import RMsg
+  _IS_MPY = False
+
+__version__   = "0.1.1.2"
+
+_IN_QueueLen  = const(8)    # Incoming messages kept for the iterator
+_IN_ChunkSize = const(256)  # Maximal number of bytes per stream read
+
+# ----------------------------------------------------------------------------
+class RMsgStream(RMsg):
+  """`rmsg` messages via an asyncio stream pair. Needs to be created within
+     a running event loop, as it starts a task that receives messages."""
+
+  def __init__(self, reader, writer, typeMsgOut=MSG_Client,
+               portType=PortType.NONE, in_queue_len=_IN_QueueLen,
+               block=False):
+    # Incoming messages are decoded by a separate message object, such that
+    # this message's content is only changed by the user or by a reply
+    self._rx = RMsg(typeMsgOut)
+    self._rx.any = lambda : 0
+    super().__init__(typeMsgOut)
+    self._reader = reader
+    self._writer = writer
+    self._portType = portType
+    self.write = lambda s : writer.write(s.encode())
+    if _IS_MPY:
+      self.write_bin = writer.write
+    else:
+      # Host streams may keep a reference to the buffer, therefore copy it
+      self.write_bin = lambda b : writer.write(bytes(b))
+    self.read_raw = lambda : b""
+    self.any = lambda : 0
+
+    # Queue of incoming messages (not being replies to requests)
+    self._inBufs = [array.array("h", [0]*MSG_MaxLen)
+                    for _ in range(max(1, in_queue_len))]
+    self._iIn = 0
+    self._nIn = 0
+    self._nInDropped = 0
+    self._block = block
+    self._inEvent = asyncio.Event()
+    self._spaceEvent = asyncio.Event()
+    self._inMsg = RMsg(typeMsgOut, in_buf_size=0)
+    self._isClosed = False
+    self._task = asyncio.create_task(self._rx_loop())
+
+  def set_window(self, n):
+    """ Define the maximal number `n` of requests (messages sent with
+        `await_reply=True`) that can be awaited at the same time
+    """
+    super().set_window(n)
+    n = max(1, n)
+    self._reqEv = [asyncio.Event() for _ in range(n)]
+    self._reqBuf = [array.array("h", [0]*MSG_MaxLen) for _ in range(n)]
+    self._slotEv = asyncio.Event()
+
+  @property
+  def framing(self):
+    return self._framing
+
+  @framing.setter
+  def framing(self, mode):
+    self._framing = mode
+    self._rx._framing = mode
+
+  def attach_stats(self, stats):
+    """ See `RMsg.attach_stats()`; covers both directions
+    """
+    super().attach_stats(stats)
+    self._rx.attach_stats(stats)
+
+  @property
+  def isConnected(self):
+    return not self._isClosed
+
+  @property
+  def dropped(self):
+    """ Number of incoming messages dropped because the queue was full
+    """
+    return self._nInDropped
+
+  @property
+  def block(self):
+    """ If True, the stream stops reading while the queue of incoming
+        messages is full (instead of dropping the oldest message); this also
+        delays replies to requests
+    """
+    return self._block
+
+  @block.setter
+  def block(self, value):
+    self._block = value
+    self._spaceEvent.set()
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  async def send(self, tout_ms=100, await_reply=True, out_count=None):
+    """ Send message and, if `await_reply` is True, wait for the reply with
+        the same count for at most `tout_ms`; the reply, if any, replaces the
+        message content and is returned as an array (see `RMsg.send()`)
+    """
+    self._lastMsgIn = ""
+    tok = self._msg[TOK_addrTok]
+    if tok < 0 or tok > TOK_LastInd:
+      self._errC = Err.CmdNotRecognized
+      return self._lastMsgIn
+    i = -1
+    if await_reply:
+      if self._nReq >= len(self._reqCount):
+        # Window full; while waiting, replies to other requests replace the
+        # message content, therefore keep a copy of the message
+        a = self._msg
+        tmp = array.array("h", a[0:a[TOK_addrLen]])
+        i = await self._get_slot()
+        self.load(tmp)
+      else:
+        i = await self._get_slot()
+      cnt = out_count if not out_count is None else self._count
+      self._reqCount[i] = cnt
+      self._reqEv[i].clear()
+    self._write_msg(out_count, await_reply)
+    await self._writer.drain()
+    if i >= 0:
+      try:
+        await asyncio.wait_for(self._reqEv[i].wait(), tout_ms /1000)
+        self.load(self._reqBuf[i])
+        self._lastMsgIn = self._msg
+        self._errC = Err.Ok
+      except asyncio.TimeoutError:
+        self._errC = Err.NoReply
+        if self._stats:
+          self._stats.on_timeout(self._reqCount[i])
+      finally:
+        self._reqCount[i] = -1
+        self._nReq -= 1
+        self._slotEv.set()
+    return self._lastMsgIn
+
+  async def negotiate_framing(self, mode=FRM_BIN, tout_ms=100):
+    """ See `RMsg.negotiate_framing()`
+    """
+    self.reset(TOK_VER)
+    self.add_data("F", [mode])
+    await self.send(tout_ms)
+    if self._errC == Err.Ok and self.token == TOK_VER:
+      i = self.find_pset("F")
+      if i >= 0 and self[i,0] == mode:
+        self.framing = mode
+        return True
+    return False
+
+  async def _get_slot(self):
+    """ Wait for a free slot in the request table
+    """
+    rc = self._reqCount
+    while True:
+      for i in range(len(rc)):
+        if rc[i] < 0:
+          self._nReq += 1
+          return i
+      self._slotEv.clear()
+      await self._slotEv.wait()
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self):
+    """ Returns the next incoming message that is not a reply; the returned
+        message object is reused, i.e. its content is only valid until the
+        next iteration
+    """
+    while self._nIn == 0:
+      if self._isClosed:
+        raise StopAsyncIteration
+      self._inEvent.clear()
+      await self._inEvent.wait()
+    nQ = len(self._inBufs)
+    self._inMsg.load(self._inBufs[(self._iIn -self._nIn) %nQ])
+    self._nIn -= 1
+    self._spaceEvent.set()
+    return self._inMsg
+
+  async def _rx_loop(self):
+    """ Read from the stream and dispatch complete messages
+    """
+    rx = self._rx
+    rb = rx._inRing
+    try:
+      while True:
+        data = await self._reader.read(min(_IN_ChunkSize, max(1, rb.free)))
+        if not data:
+          break
+        rb.put(data)
+        while rx.receive():
+          while not self._dispatch(rx):
+            # Queue full; stop reading until a message is taken from it
+            self._spaceEvent.clear()
+            await self._spaceEvent.wait()
+    finally:
+      self._isClosed = True
+      self._inEvent.set()
+
+  def _dispatch(self, rx):
+    """ Hand a message to a waiting request or append it to the queue;
+        returns False if the queue is full and `block` is True
+    """
+    a = rx.msg_as_array
+    n = a[TOK_addrLen]
+    cnt = rx.count
+    rc = self._reqCount
+    for i in range(len(rc)):
+      if rc[i] == cnt:
+        memoryview(self._reqBuf[i])[0:n] = memoryview(a)[0:n]
+        self._reqEv[i].set()
+        return True
+    nQ = len(self._inBufs)
+    if self._nIn == nQ:
+      if self._block:
+        return False
+      # Queue full, drop oldest message
+      self._nIn -= 1
+      self._nInDropped += 1
+    memoryview(self._inBufs[self._iIn])[0:n] = memoryview(a)[0:n]
+    self._iIn = (self._iIn +1) %nQ
+    self._nIn += 1
+    self._inEvent.set()
+    return True
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def deinit(self):
+    self._task.cancel()
+    self._writer.close()
+
+# ----------------------------------------------------------------------------
+def from_uart(uart, typeMsgOut=MSG_Client):
+  """ Create an `RMsgStream` for a MicroPython UART
+  """
+  stream = asyncio.StreamWriter(uart, {})
+  return RMsgStream(stream, stream, typeMsgOut, PortType.UART_MPY)
+
+async def open_serial(port, baudrate, typeMsgOut=MSG_Client):
+  """ Create an `RMsgStream` for a serial port (or pty) under Windows/Linux;
+      requires `pyserial-asyncio`
+  """
+  import serial_asyncio
+  reader, writer = await serial_asyncio.open_serial_connection(
+      url=port, baudrate=baudrate
+    )
+  return RMsgStream(reader, writer, typeMsgOut, PortType.COM_PC)
+
+# ----------------------------------------------------------------------------
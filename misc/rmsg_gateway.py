@@ -0,0 +1,320 @@
+# ----------------------------------------------------------------------------
+# rmsg_gateway.py
+# Host-side gateway that multiplexes `rmsg` links to many robots (asyncio,
+# Windows/Linux only)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# Usage:
+#   gw = Gateway()
+#   gw.add_link("robot01", lambda : open_serial("/dev/ttyUSB0", 230400))
+#   gw.add_link("robot02", lambda : open_tcp("localhost", 8002))
+#   gw.add_consumer(LogFileConsumer("robots.log"))
+#   gw.add_consumer(MQTTConsumer("localhost"), policy=DROP_OLDEST)
+#   asyncio.run(gw.run())
+# ----------------------------------------------------------------------------
+import time
+import json
+import asyncio
+try:
+  from robotling_lib.misc.rmsg import *
+  from robotling_lib.misc.rmsg import RMsg
+  from robotling_lib.misc.rmsg_async import RMsgStream, open_serial
+except ModuleNotFoundError:
+  from rmsg import *
+  from rmsg import RMsg
+  from rmsg_async import RMsgStream, open_serial
+
+__version__   = "0.1.0.1"
+
+# Policies when the queue of a consumer is full
+DROP_OLDEST   = 0
+DROP_NEWEST   = 1
+BLOCK         = 2   # back-pressure, i.e. the link stops reading (which
+                    # also delays replies to `send()` on this link)
+
+_DEF_QueueLen = 256
+_RECONNECT_S  = (0.5, 16.0)   # min/max delay between reconnects
+
+# ----------------------------------------------------------------------------
+def msg_to_dict(msg):
+  """ Convert a message into a dictionary (batches are expanded)
+  """
+  a = msg.msg_as_array
+  d = {"tok": TOK_StrList[msg.token] if msg.token <= TOK_LastInd else "???",
+       "count": msg.count}
+  if msg.token == TOK_BAT:
+    sub = RMsg(MSG_Client, in_buf_size=0)
+    d["batch"] = []
+    for i in range(msg.batch_len):
+      msg.get_from_batch(i, sub)
+      d["batch"].append(msg_to_dict(sub))
+  else:
+    p = TOK_addrPSetStart
+    for i in range(a[TOK_addrNPSets]):
+      n = a[p +TOK_offsNVal]
+      d[chr(a[p])] = list(a[p +TOK_offsVals:p +TOK_offsVals +n])
+      p += TOK_offsVals +n
+  return d
+
+async def open_tcp(host, port, typeMsgOut=MSG_Client):
+  """ Create an `RMsgStream` for a TCP connection, e.g. to a BLE bridge or
+      a simulated robot
+  """
+  reader, writer = await asyncio.open_connection(host, port)
+  return RMsgStream(reader, writer, typeMsgOut, PortType.NONE)
+
+# ----------------------------------------------------------------------------
+class Consumer(object):
+  """Base class for consumers of incoming messages; `handle()` receives the
+     link name, the time stamp and the message as a dictionary."""
+
+  async def start(self):
+    pass
+
+  async def handle(self, link, t, d):
+    raise NotImplementedError()
+
+  async def stop(self):
+    pass
+
+class CallbackConsumer(Consumer):
+  """Calls a function (or coroutine function) for each message."""
+
+  def __init__(self, callback):
+    self._cb = callback
+
+  async def handle(self, link, t, d):
+    res = self._cb(link, t, d)
+    if asyncio.iscoroutine(res):
+      await res
+
+class LogFileConsumer(Consumer):
+  """Appends each message as a line of JSON to a log file."""
+
+  def __init__(self, fname):
+    self._fname = fname
+    self._f = None
+
+  async def start(self):
+    self._f = open(self._fname, "a")
+
+  async def handle(self, link, t, d):
+    self._f.write(json.dumps({"link": link, "t": t, "msg": d}) +"\n")
+
+  async def stop(self):
+    if self._f:
+      self._f.close()
+
+class MQTTConsumer(Consumer):
+  """Publishes each message under <root>/<link>/<token>; requires
+     `paho-mqtt`."""
+
+  def __init__(self, broker, port=1883, root="rmsg"):
+    self._broker = broker
+    self._port = port
+    self._root = root
+    self._client = None
+
+  async def start(self):
+    import paho.mqtt.client as mqtt
+    self._client = mqtt.Client()
+    self._client.connect(self._broker, self._port)
+    self._client.loop_start()
+
+  async def handle(self, link, t, d):
+    topic = "{0}/{1}/{2}".format(self._root, link, d["tok"])
+    self._client.publish(topic, json.dumps({"t": t, "msg": d}))
+
+  async def stop(self):
+    if self._client:
+      self._client.loop_stop()
+      self._client.disconnect()
+
+class WebSocketConsumer(Consumer):
+  """Serves a websocket and sends each message as JSON to all connected
+     clients; requires `websockets`."""
+
+  def __init__(self, host="localhost", port=8765):
+    self._host = host
+    self._port = port
+    self._clients = set()
+    self._server = None
+
+  async def start(self):
+    import websockets
+    self._server = await websockets.serve(self._serve, self._host, self._port)
+
+  async def _serve(self, ws, *args):
+    self._clients.add(ws)
+    try:
+      await ws.wait_closed()
+    finally:
+      self._clients.discard(ws)
+
+  async def handle(self, link, t, d):
+    s = json.dumps({"link": link, "t": t, "msg": d})
+    for ws in list(self._clients):
+      try:
+        await ws.send(s)
+      except Exception:
+        self._clients.discard(ws)
+
+  async def stop(self):
+    if self._server:
+      self._server.close()
+
+# ----------------------------------------------------------------------------
+class _Slot(object):
+  """A consumer with its queue and policy."""
+
+  def __init__(self, consumer, queue_len, policy):
+    self.consumer = consumer
+    self.queue = asyncio.Queue(queue_len)
+    self.policy = policy
+    self.nDropped = 0
+
+  def put_nowait_or_drop(self, item):
+    if self.queue.full():
+      self.nDropped += 1
+      if self.policy == DROP_NEWEST:
+        return
+      self.queue.get_nowait()
+      self.queue.task_done()
+    self.queue.put_nowait(item)
+
+class Link(object):
+  """A robot link, (re)opened by an async `opener` returning a
+     `RMsgStream`."""
+
+  def __init__(self, name, opener):
+    self.name = name
+    self.opener = opener
+    self.stream = None
+    self.nMsgs = 0
+    self.nDropped = 0
+    self.nReconnects = 0
+
+  @property
+  def isConnected(self):
+    return self.stream is not None and self.stream.isConnected
+
+# ----------------------------------------------------------------------------
+class Gateway(object):
+  """Multiplexes many robot links and fans incoming messages out to
+     consumers, each with its own queue."""
+
+  def __init__(self):
+    self._links = {}
+    self._slots = []
+    self._tasks = []
+
+  def add_link(self, name, opener):
+    """ Add a link; `opener` is an async function (w/o arguments) that
+        returns a connected `RMsgStream`
+    """
+    self._links[name] = Link(name, opener)
+
+  def add_consumer(self, consumer, queue_len=_DEF_QueueLen, policy=BLOCK):
+    """ Add a consumer with a queue of `queue_len` messages and a policy
+        for when the queue is full (`DROP_OLDEST`, `DROP_NEWEST`, `BLOCK`)
+    """
+    self._slots.append(_Slot(consumer, queue_len, policy))
+
+  def link(self, name):
+    return self._links[name]
+
+  @property
+  def stats(self):
+    """ Returns a dictionary with messages, messages dropped by the stream
+        and reconnects per link and dropped messages and queue length per
+        consumer
+    """
+    return {
+        "links": {l.name: {"msgs": l.nMsgs, "reconnects": l.nReconnects,
+                           "dropped": l.nDropped +(l.stream.dropped
+                                                   if l.stream else 0),
+                           "connected": l.isConnected}
+                  for l in self._links.values()},
+        "consumers": [{"type": type(s.consumer).__name__,
+                       "queued": s.queue.qsize(), "dropped": s.nDropped}
+                      for s in self._slots]
+      }
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  async def send(self, name, msg_fill, tout_ms=100, await_reply=True):
+    """ Send a message via link `name`; `msg_fill(msg)` is called to fill
+        the message (e.g. `lambda m : (m.reset(TOK_STA),)`); returns the
+        reply as a dictionary or None
+    """
+    s = self._links[name].stream
+    if s is None or not s.isConnected:
+      return None
+    msg_fill(s)
+    res = await s.send(tout_ms, await_reply)
+    return msg_to_dict(s) if res else None
+
+  async def run(self):
+    """ Run until cancelled
+    """
+    for s in self._slots:
+      await s.consumer.start()
+      self._tasks.append(asyncio.create_task(self._consume(s)))
+    for l in self._links.values():
+      self._tasks.append(asyncio.create_task(self._serve_link(l)))
+    try:
+      await asyncio.gather(*self._tasks)
+    finally:
+      await self.stop()
+
+  async def stop(self):
+    for t in self._tasks:
+      t.cancel()
+    self._tasks = []
+    for l in self._links.values():
+      if l.stream:
+        l.stream.deinit()
+        l.stream = None
+    for s in self._slots:
+      await s.consumer.stop()
+
+  async def _serve_link(self, l):
+    """ Keep link open and distribute its messages
+    """
+    delay = _RECONNECT_S[0]
+    while True:
+      try:
+        l.stream = await l.opener()
+        l.stream.block = any(s.policy == BLOCK for s in self._slots)
+        delay = _RECONNECT_S[0]
+        async for msg in l.stream:
+          d = msg_to_dict(msg)
+          t = time.time()
+          l.nMsgs += 1
+          for s in self._slots:
+            if s.policy == BLOCK:
+              await s.queue.put((l.name, t, d))
+            else:
+              s.put_nowait_or_drop((l.name, t, d))
+      except (OSError, asyncio.IncompleteReadError) as e:
+        print("Link `{0}`: {1}".format(l.name, e))
+      if l.stream:
+        l.nDropped += l.stream.dropped
+        l.stream.deinit()
+        l.stream = None
+      l.nReconnects += 1
+      await asyncio.sleep(delay)
+      delay = min(delay *2, _RECONNECT_S[1])
+
+  async def _consume(self, s):
+    while True:
+      link, t, d = await s.queue.get()
+      try:
+        await s.consumer.handle(link, t, d)
+      except Exception as e:
+        print("Consumer `{0}`: {1}".format(type(s.consumer).__name__, e))
+      s.queue.task_done()
+
+# ----------------------------------------------------------------------------
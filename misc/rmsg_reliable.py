@@ -0,0 +1,300 @@
+# ----------------------------------------------------------------------------
+# rmsg_reliable.py
+# Reliable delivery of `rmsg` commands: acknowledged, retransmitted with
+# backoff (client) and with duplicates suppressed (server)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# The message count serves as sequence number; a retransmission carries the
+# same count as the original. The server recognizes a repeated command by
+# its count and content and resends the cached reply instead of executing
+# the command again. Emergency stops (`GGE`) are always executed. As a
+# client that restarts begins again with count 0, the server forgets the
+# cached replies when the count jumps back by more than the cache size; it
+# should also call `clear()` when a client (re)connects.
+#
+# Client:
+#   rs = ReliableSender(msg)
+#   cmd = pool.get(TOK_GGP)
+#   cmd.add_data("B", [...])
+#   rs.submit(cmd, callback)     # `callback(msg, errC)` as in `RMsg.request()`
+#   pool.put(cmd)
+#   while True:
+#     rs.poll()
+#     ...
+# Server:
+#   df = DuplicateFilter(msg)
+#   if msg.receive() and not df.check():
+#     cnt = msg.count
+#     ... handle command and compose reply in `msg` ...
+#     df.reply(cnt)
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  import array
+  from micropython import const
+  from robotling_lib.misc.rmsg import *
+  from robotling_lib.misc.rmsg import crc16, ticks_ms, ticks_diff
+except ModuleNotFoundError:
+  # Standard Python imports
+  const = lambda x : x
+  import array
+  try:
+    from robotling_lib.misc.rmsg import *
+    from robotling_lib.misc.rmsg import crc16, ticks_ms, ticks_diff
+  except ModuleNotFoundError:
+    from rmsg import *
+    from rmsg import crc16, ticks_ms, ticks_diff
+
+__version__   = "0.1.0.1"
+
+_S_FREE       = const(0)
+_S_QUEUED     = const(1)
+_S_INFLIGHT   = const(2)
+
+_DEF_QueueLen = const(4)
+_DEF_Retries  = const(3)
+_DEF_RTO_ms   = const(50)
+_DEF_MaxRTO_ms= const(400)
+_DEF_NCached  = const(4)
+_MaxCount     = const(0x7FFF)
+
+# ----------------------------------------------------------------------------
+class ReliableSender(object):
+  """Client side: queues commands and sends them via the message object
+     `link`, retransmitting each until acknowledged (any reply with the same
+     count) or until `retries` retransmissions failed. The timeout starts
+     with `rto_ms` and doubles with each retransmission up to `max_rto_ms`.
+     With `window` = 1 (default), commands are executed in order; larger
+     windows are faster but a retransmitted command may overtake others.
+     Emergency stops (`GGE`) bypass the queue."""
+
+  def __init__(self, link, queue_len=_DEF_QueueLen, window=1,
+               retries=_DEF_Retries, rto_ms=_DEF_RTO_ms,
+               max_rto_ms=_DEF_MaxRTO_ms):
+    self._link = link
+    n = max(1, queue_len) +1   # last slot is reserved for emergency stops
+    self._iUrgent = n -1
+    self._bufs = [array.array("h", [0]*MSG_MaxLen) for _ in range(n)]
+    self._state = bytearray(n)
+    self._count = array.array("h", [-1]*n)
+    self._order = array.array("I", [0]*n)
+    self._t0 = array.array("i", [0]*n)
+    self._rto = array.array("H", [0]*n)
+    self._nTx = bytearray(n)
+    self._cb = [None]*n
+    self._window = max(1, window)
+    self._retries = retries
+    self._rto0 = rto_ms
+    self._maxRTO = max_rto_ms
+    self._nSubmitted = 0
+    self._nInFlight = 0
+    self._defHandler = None
+    self.nRetransmits = 0
+    self.nFailed = 0
+
+  def set_default_handler(self, callback):
+    """ Define a function `callback(msg)` for received messages that are
+        not replies to commands (see `RMsg.set_default_handler()`)
+    """
+    self._defHandler = callback
+
+  @property
+  def pending(self):
+    """ Number of commands queued or in flight
+    """
+    n = 0
+    for st in self._state:
+      if st != _S_FREE:
+        n += 1
+    return n
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def submit(self, src, callback=None):
+    """ Copy the message `src` into the queue and send it as soon as the
+        window allows; returns False if the queue is full. An emergency stop
+        is sent immediately and cancels all other commands, such that none
+        of them is executed (again) after the stop; their callbacks are
+        called with `Err.Cancelled`
+    """
+    a = src.msg_as_array
+    if a[TOK_addrTok] == TOK_GGE:
+      self.cancel_all()
+      i = self._iUrgent
+    else:
+      for i in range(self._iUrgent):
+        if self._state[i] == _S_FREE:
+          break
+      else:
+        return False
+    n = a[TOK_addrLen]
+    memoryview(self._bufs[i])[0:n] = memoryview(a)[0:n]
+    self._cb[i] = callback
+    self._order[i] = self._nSubmitted
+    self._nSubmitted += 1
+    self._state[i] = _S_QUEUED
+    if i == self._iUrgent:
+      self._transmit(i, ticks_ms())
+    else:
+      self._send_queued(ticks_ms())
+    return True
+
+  def poll(self):
+    """ Process received messages, retransmit commands that timed out and
+        send queued commands; returns the number of commands pending. Note
+        that this overwrites the content of the `link` message object
+    """
+    link = self._link
+    cnts = self._count
+    st = self._state
+    while link.receive():
+      cnt = link.count
+      for i in range(len(st)):
+        if st[i] == _S_INFLIGHT and cnts[i] == cnt:
+          self._finish(i, link, Err.Ok)
+          break
+      else:
+        if self._defHandler:
+          self._defHandler(link)
+    t = ticks_ms()
+    for i in range(len(st)):
+      if st[i] == _S_INFLIGHT and ticks_diff(t, self._t0[i]) > self._rto[i]:
+        if self._nTx[i] > self._retries:
+          self.nFailed += 1
+          if link.stats:
+            link.stats.on_timeout(cnts[i])
+          self._finish(i, None, Err.NoReply)
+        else:
+          self.nRetransmits += 1
+          self._rto[i] = min(self._rto[i] *2, self._maxRTO)
+          self._transmit(i, t)
+    self._send_queued(t)
+    return self.pending
+
+  def cancel_all(self):
+    """ Drop all commands; their callbacks are called with `Err.Cancelled`
+    """
+    for i in range(len(self._state)):
+      if self._state[i] != _S_FREE:
+        self._finish(i, None, Err.Cancelled)
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def _send_queued(self, t):
+    """ Send queued commands in the order of submission while the window
+        allows
+    """
+    st = self._state
+    while self._nInFlight < self._window:
+      iNext = -1
+      for i in range(self._iUrgent):
+        if st[i] == _S_QUEUED and (iNext < 0 or
+                                   self._order[i] < self._order[iNext]):
+          iNext = i
+      if iNext < 0:
+        break
+      self._transmit(iNext, t)
+
+  def _transmit(self, i, t):
+    """ Send (or resend) the command in slot `i`
+    """
+    link = self._link
+    link.load(self._bufs[i])
+    if self._state[i] == _S_QUEUED:
+      self._count[i] = link._write_msg(None, True)
+      self._state[i] = _S_INFLIGHT
+      self._rto[i] = self._rto0
+      self._nTx[i] = 0
+      self._nInFlight += 1
+    else:
+      link._write_msg(self._count[i], True, False)
+    self._nTx[i] += 1
+    self._t0[i] = t
+
+  def _finish(self, i, msg, errC):
+    if self._state[i] == _S_INFLIGHT:
+      self._nInFlight -= 1
+    cb = self._cb[i]
+    self._state[i] = _S_FREE
+    self._count[i] = -1
+    self._cb[i] = None
+    if cb:
+      cb(msg, errC)
+
+# ----------------------------------------------------------------------------
+class DuplicateFilter(object):
+  """Server side: caches the replies to the last `n` commands, such that a
+     retransmitted command is answered with the cached reply instead of
+     being executed again."""
+
+  def __init__(self, link, n=_DEF_NCached):
+    self._link = link
+    n = max(1, n)
+    self._replies = [array.array("h", [0]*MSG_MaxLen) for _ in range(n)]
+    self._count = array.array("h", [-1]*n)
+    self._crc = array.array("H", [0]*n)
+    self._iNext = 0
+    self._crcIn = 0
+    self._doCache = False
+    self._last = -1
+    self.nDuplicates = 0
+    self.nResets = 0
+
+  def clear(self):
+    """ Forget all cached replies, e.g. when a client (re)connects
+    """
+    for i in range(len(self._count)):
+      self._count[i] = -1
+    self._iNext = 0
+    self._last = -1
+
+  def check(self):
+    """ Check if the message just received by `link` repeats a command that
+        was already answered; if so, resend the cached reply and return True.
+        An emergency stop is never considered a repetition
+    """
+    link = self._link
+    a = link.msg_as_array
+    cnt = link.count
+    self._doCache = a[TOK_addrTok] != TOK_GGE
+    if not self._doCache:
+      return False
+    if self._last >= 0:
+      d = (self._last -cnt) & _MaxCount
+      if d >= len(self._count) and d < _MaxCount //2:
+        # Count jumped back, the client likely restarted
+        self.nResets += 1
+        self.clear()
+    self._crcIn = crc16(link.msg_as_bytes, a[TOK_addrLen] *2)
+    for i in range(len(self._count)):
+      if self._count[i] == cnt and self._crc[i] == self._crcIn:
+        self.nDuplicates += 1
+        link.load(self._replies[i])
+        link.send(await_reply=False, out_count=cnt)
+        return True
+    if self._last < 0 or ((cnt -self._last) & _MaxCount) < _MaxCount //2:
+      self._last = cnt
+    return False
+
+  def reply(self, cnt):
+    """ Send the content of `link` as reply to the command with count `cnt`
+        (which was checked before by `check()`) and cache it, unless the
+        command was an emergency stop
+    """
+    link = self._link
+    if self._doCache:
+      a = link.msg_as_array
+      i = self._iNext
+      n = a[TOK_addrLen]
+      memoryview(self._replies[i])[0:n] = memoryview(a)[0:n]
+      self._count[i] = cnt
+      self._crc[i] = self._crcIn
+      self._iNext = (i +1) %len(self._count)
+    link.send(await_reply=False, out_count=cnt)
+
+# ----------------------------------------------------------------------------
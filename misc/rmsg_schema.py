@@ -0,0 +1,254 @@
+# ----------------------------------------------------------------------------
+# rmsg_schema.py
+# Typed, schema-driven parameter sets for `rmsg` messages
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# A schema declares the fields of a token's payload with struct-like types;
+# the values are packed into a single raw parameter set (type character `#`)
+# instead of one int16 per value:
+#   sch = register(TOK_XYZ, [("a", T_UINT8), ("b", T_FLOAT16),
+#                            ("s", BITS, (("on", 1), ("mode", 3)))])
+#   msg.reset(TOK_XYZ)
+#   sch.encode(msg, [12, 3.25, 1, 5])  # values in the order of `sch.names`
+#   ...
+#   vals = sch.decode(msg)             # list is reused by the next call
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  import math
+  import ustruct as struct
+  from micropython import const
+  from robotling_lib.misc.rmsg import TOK_STA
+except ModuleNotFoundError:
+  # Standard Python imports
+  const = lambda x : x
+  import math
+  import struct
+  try:
+    from robotling_lib.misc.rmsg import TOK_STA
+  except ModuleNotFoundError:
+    from rmsg import TOK_STA
+
+__version__   = "0.1.0.0"
+
+# Field types
+T_INT8        = "b"
+T_UINT8       = "B"
+T_INT16       = "h"
+T_UINT16      = "H"
+T_INT32       = "i"
+T_UINT32      = "I"
+T_FLOAT16     = "e"
+T_FLOAT32     = "f"
+BITS          = "bits"  # bitfield, followed by ((name, width), ...)
+
+SCH_Key       = "#"     # type character of the raw parameter set
+
+try:
+  struct.calcsize("<e")
+  _HAS_F16 = True
+except (ValueError, struct.error):
+  _HAS_F16 = False
+
+_F_Plain      = const(0)
+_F_Float16    = const(1)
+_F_Bits       = const(2)
+
+# ----------------------------------------------------------------------------
+def float_to_f16(f):
+  """ Convert a float into the bits of an IEEE 754 half-precision float
+  """
+  if f != f:
+    return 0x7E00
+  s = 0
+  if f < 0 or (f == 0 and math.copysign(1, f) < 0):
+    s = 0x8000
+    f = -f
+  if f >= 65520:
+    return s | 0x7C00
+  if f < 6.103515625e-05:
+    return s | int(f /5.960464477539063e-08 +0.5)
+  m, e = math.frexp(f)
+  e += 14
+  m = int((m *2 -1) *1024 +0.5)
+  if m == 1024:
+    m = 0
+    e += 1
+  if e >= 31:
+    return s | 0x7C00
+  return s | (e << 10) | m
+
+def f16_to_float(h):
+  """ Convert the bits of an IEEE 754 half-precision float into a float
+  """
+  s = -1 if h & 0x8000 else 1
+  e = (h >> 10) & 0x1F
+  m = h & 0x3FF
+  if e == 0:
+    return s *m *5.960464477539063e-08
+  if e == 31:
+    return s *float("inf") if m == 0 else float("nan")
+  return s *math.ldexp(1024 +m, e -25)
+
+# ----------------------------------------------------------------------------
+class Schema(object):
+  """Payload layout of a token, with encoder and decoder."""
+
+  def __init__(self, token, fields, key=SCH_Key):
+    """ Create schema for `token` from the list of `fields`, each given as
+        `(name, type)` or `(name, BITS, ((name, width), ...))`
+    """
+    self._token = token
+    self._key = key
+    fmt = "<"
+    names = []
+    kind = []     # per struct field: _F_xxx
+    nSub = []     # per struct field: number of values (>1 for bitfields)
+    shifts = []   # per value: shift (bitfields only)
+    widths = []   # per value: width in bits (bitfields only)
+    for f in fields:
+      if f[1] == BITS:
+        nBits = 0
+        for sub in f[2]:
+          names.append(sub[0])
+          shifts.append(nBits)
+          widths.append(sub[1])
+          nBits += sub[1]
+        assert nBits <= 32, "Bitfield `{0}` too wide".format(f[0])
+        fmt += "B" if nBits <= 8 else ("H" if nBits <= 16 else "I")
+        kind.append(_F_Bits)
+        nSub.append(len(f[2]))
+      else:
+        names.append(f[0])
+        shifts.append(0)
+        widths.append(0)
+        if f[1] == T_FLOAT16 and not _HAS_F16:
+          fmt += "H"
+          kind.append(_F_Float16)
+        else:
+          fmt += f[1]
+          kind.append(_F_Plain)
+        nSub.append(1)
+    self._fmt = fmt
+    self._names = names
+    self._kind = bytearray(kind)
+    self._nSub = bytearray(nSub)
+    self._shifts = bytearray(shifts)
+    self._widths = bytearray(widths)
+    self._size = struct.calcsize(fmt)
+    self._raw = [0]*len(kind)
+    self._vals = [0]*len(names)
+    self._isPlain = sum(kind) == 0
+    try:
+      # Precompiled struct (Windows/Linux)
+      st = struct.Struct(fmt)
+      self._pack_into = st.pack_into
+      self._unpack_from = st.unpack_from
+    except AttributeError:
+      self._pack_into = lambda buf, offs, *v : struct.pack_into(fmt, buf, offs, *v)
+      self._unpack_from = lambda buf, offs : struct.unpack_from(fmt, buf, offs)
+
+  @property
+  def token(self):
+    return self._token
+
+  @property
+  def names(self):
+    return self._names
+
+  @property
+  def size(self):
+    """ Size of the packed payload in bytes
+    """
+    return self._size
+
+  def index(self, name):
+    return self._names.index(name)
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def encode(self, msg, values):
+    """ Pack `values` (in the order of `names`) into a new parameter set of
+        the message `msg`
+    """
+    offs = msg.reserve_data(self._key, self._size)
+    if self._isPlain:
+      self._pack_into(msg.msg_as_bytes, offs, *values)
+      return
+    raw = self._raw
+    kind = self._kind
+    j = 0
+    for i in range(len(kind)):
+      k = kind[i]
+      if k == _F_Bits:
+        v = 0
+        for l in range(j, j +self._nSub[i]):
+          v |= (int(values[l]) & ((1 << self._widths[l]) -1)) << self._shifts[l]
+        raw[i] = v
+        j += self._nSub[i]
+      else:
+        raw[i] = float_to_f16(values[j]) if k == _F_Float16 else values[j]
+        j += 1
+    self._pack_into(msg.msg_as_bytes, offs, *raw)
+
+  def decode(self, msg):
+    """ Unpack the values from the message `msg` into a list (in the order
+        of `names`), which is reused by the next call; returns None if the
+        message does not contain a raw parameter set
+    """
+    offs = msg.data_offset(msg.find_pset(self._key))
+    if offs < 0:
+      return None
+    raw = self._unpack_from(msg.msg_as_bytes, offs)
+    vals = self._vals
+    if self._isPlain:
+      for i in range(len(raw)):
+        vals[i] = raw[i]
+      return vals
+    kind = self._kind
+    j = 0
+    for i in range(len(kind)):
+      k = kind[i]
+      if k == _F_Bits:
+        for l in range(j, j +self._nSub[i]):
+          vals[l] = (raw[i] >> self._shifts[l]) & ((1 << self._widths[l]) -1)
+        j += self._nSub[i]
+      else:
+        vals[j] = f16_to_float(raw[i]) if k == _F_Float16 else raw[i]
+        j += 1
+    return vals
+
+# ----------------------------------------------------------------------------
+_registry = {}
+
+def register(token, fields, key=SCH_Key):
+  """ Create a schema for `token` and add it to the registry
+  """
+  sch = Schema(token, fields, key)
+  _registry[token] = sch
+  return sch
+
+def get(token):
+  """ Returns the registered schema for `token`, or None
+  """
+  return _registry.get(token)
+
+# ----------------------------------------------------------------------------
+# Status (`STA`) as typed payload (42 instead of 46 bytes, see `rmsg.py`)
+STA_SCHEMA = register(TOK_STA, [
+    ("st", BITS, (("hs", 4), ("ws", 4), ("d", 4), ("sp", 1))),
+    ("sv", T_UINT16), ("lv", T_UINT16),
+    ("hd", T_FLOAT16), ("pt", T_FLOAT16), ("rl", T_FLOAT16),
+    ("l0", T_INT16), ("l1", T_INT16), ("l2", T_INT16), ("l3", T_INT16),
+    ("l4", T_INT16), ("l5", T_INT16), ("l6", T_INT16), ("l7", T_INT16),
+    ("f0", T_INT16), ("f1", T_INT16), ("f2", T_INT16), ("f3", T_INT16),
+    ("f4", T_INT16), ("f5", T_INT16), ("f6", T_INT16)
+  ])
+
+# ----------------------------------------------------------------------------
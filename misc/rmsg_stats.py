@@ -0,0 +1,286 @@
+# ----------------------------------------------------------------------------
+# rmsg_stats.py
+# Link statistics (counters, latency histograms, loss) for `rmsg` messages
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# Usage:
+#   st = LinkStats()
+#   msg.attach_stats(st)
+#   ...
+#   print(st.latency(TOK_GGQ), st.histogram(TOK_GGQ), st.bytes_per_s)
+#   # Server side, replying to a `LNK` request:
+#   cnt = msg.count
+#   if st.handle_request(msg):
+#     msg.send(await_reply=False, out_count=cnt)
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  import array
+  from micropython import const
+  from robotling_lib.misc.rmsg import TOK_LNK, TOK_LastInd, ticks_ms, ticks_diff
+except ModuleNotFoundError:
+  # Standard Python imports
+  const = lambda x : x
+  import array
+  try:
+    from robotling_lib.misc.rmsg import TOK_LNK, TOK_LastInd, ticks_ms, ticks_diff
+  except ModuleNotFoundError:
+    from rmsg import TOK_LNK, TOK_LastInd, ticks_ms, ticks_diff
+
+__version__   = "0.1.0.0"
+
+# Upper edges of the latency histogram bins in [ms]; the last bin collects
+# all larger latencies
+LAT_BINS_MS   = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+LAT_NBINS     = const(10)
+
+_NTrack       = const(16)     # Number of sent requests tracked for latency
+_MaxCount     = const(0x7FFF)
+_HalfCount    = const(0x4000)
+_RatePer_ms   = const(1000)   # Interval for updating the byte rates
+_MaxInt16     = const(0x7FFF)
+
+# ----------------------------------------------------------------------------
+class LinkStats(object):
+  """Statistics of an `rmsg` link, kept in preallocated arrays; attach it to
+     a message object with `RMsg.attach_stats()`."""
+
+  def __init__(self):
+    nTok = TOK_LastInd +1
+    self._nTok = nTok
+    self._edges = array.array("H", LAT_BINS_MS)
+    self.txMsgs = array.array("I", [0]*nTok)
+    self.rxMsgs = array.array("I", [0]*nTok)
+    self.timeouts = array.array("I", [0]*nTok)
+    self._hist = array.array("I", [0]*(nTok *LAT_NBINS))
+    self._histMv = memoryview(self._hist)
+    self._latMin = array.array("H", [0]*nTok)
+    self._latMax = array.array("H", [0]*nTok)
+    self._latSum = array.array("I", [0]*nTok)
+    self._latN = array.array("I", [0]*nTok)
+    self._trCnt = array.array("h", [-1]*_NTrack)
+    self._trT0 = array.array("i", [0]*_NTrack)
+    self._trTok = bytearray(_NTrack)
+    self._trLate = bytearray(_NTrack)
+    self.clear()
+
+  def clear(self):
+    """ Reset all statistics
+    """
+    for a in (self.txMsgs, self.rxMsgs, self.timeouts, self._hist,
+              self._latMax, self._latSum, self._latN, self._trLate):
+      for i in range(len(a)):
+        a[i] = 0
+    for i in range(self._nTok):
+      self._latMin[i] = 0xFFFF
+    for i in range(_NTrack):
+      self._trCnt[i] = -1
+    self._iTr = 0
+    self._rxLast = -1
+    self._replyLast = -1
+    self.lost = 0
+    self.reordered = 0
+    self.late = 0
+    self.crcErrors = 0
+    self.badFrames = 0
+    self.rxOverflow = 0
+    self.txBytes = 0
+    self.rxBytes = 0
+    self._tRate = ticks_ms()
+    self._txB0 = 0
+    self._rxB0 = 0
+    self._txBps = 0
+    self._rxBps = 0
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def latency(self, tok=None):
+    """ Returns minimal, mean and maximal latency (send to reply) in [ms]
+        for token `tok` or all tokens, or None if no reply was received
+    """
+    if tok is None:
+      n = sum(self._latN)
+      if n == 0:
+        return None
+      mn = min([self._latMin[i] for i in range(self._nTok) if self._latN[i]])
+      return mn, sum(self._latSum) //n, max(self._latMax)
+    n = self._latN[tok]
+    if n == 0:
+      return None
+    return self._latMin[tok], self._latSum[tok] //n, self._latMax[tok]
+
+  def histogram(self, tok):
+    """ Returns the latency histogram of token `tok` (`LAT_NBINS` counts, see
+        `LAT_BINS_MS`) as a memoryview (w/o copying)
+    """
+    i = tok *LAT_NBINS
+    return self._histMv[i:i +LAT_NBINS]
+
+  @property
+  def bytes_per_s(self):
+    """ Returns the bytes per second sent and received (averaged over the
+        last second)
+    """
+    self._update_rates(ticks_ms())
+    return self._txBps, self._rxBps
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def on_tx(self, tok, cnt, nb, track):
+    """ Called by the message object after sending `nb` bytes of a message
+        with token `tok` and count `cnt`; if `track` is True, a reply is
+        expected and the latency is measured
+    """
+    self.txMsgs[tok] += 1
+    self.txBytes += nb
+    t = ticks_ms()
+    if track:
+      i = self._iTr
+      self._trCnt[i] = cnt
+      self._trT0[i] = t
+      self._trTok[i] = tok
+      self._trLate[i] = 0
+      self._iTr = (i +1) %_NTrack
+    self._update_rates(t)
+
+  def on_rx(self, tok, cnt, nb):
+    """ Called by the message object after receiving a frame of `nb` bytes
+        with token `tok` and count `cnt`
+    """
+    if tok <= TOK_LastInd:
+      self.rxMsgs[tok] += 1
+    self.rxBytes += nb
+    t = ticks_ms()
+    tc = self._trCnt
+    for i in range(_NTrack):
+      if tc[i] == cnt:
+        # Reply to a tracked request
+        tc[i] = -1
+        if self._trLate[i]:
+          self.late += 1
+        else:
+          self._add_latency(self._trTok[i], ticks_diff(t, self._trT0[i]))
+        if (self._replyLast >= 0 and
+            (cnt -self._replyLast) & _MaxCount >= _HalfCount):
+          self.reordered += 1
+        else:
+          self._replyLast = cnt
+        break
+    else:
+      # Other messages from the peer are expected to have increasing counts
+      if self._rxLast >= 0:
+        d = (cnt -self._rxLast -1) & _MaxCount
+        if d >= _HalfCount:
+          self.reordered += 1
+          cnt = self._rxLast
+        else:
+          self.lost += d
+      self._rxLast = cnt
+    self._update_rates(t)
+
+  def on_timeout(self, cnt):
+    """ Called by the message object if the reply to the message with count
+        `cnt` did not arrive in time; a later reply counts as late
+    """
+    tc = self._trCnt
+    for i in range(_NTrack):
+      if tc[i] == cnt and not self._trLate[i]:
+        self._trLate[i] = 1
+        self.timeouts[self._trTok[i]] += 1
+        return
+
+  def on_bad_frame(self, crc):
+    """ Called by the message object for each invalid frame skipped
+    """
+    if crc:
+      self.crcErrors += 1
+    else:
+      self.badFrames += 1
+
+  def on_overflow(self, n):
+    """ Called by the message object if `n` received bytes were lost
+        because the receive buffer was full
+    """
+    self.rxOverflow += n
+
+  def _add_latency(self, tok, dt):
+    dt = min(max(0, dt), 0xFFFF)
+    e = self._edges
+    for j in range(len(e)):
+      if dt <= e[j]:
+        break
+    else:
+      j = LAT_NBINS -1
+    self._hist[tok *LAT_NBINS +j] += 1
+    self._latN[tok] += 1
+    self._latSum[tok] += dt
+    if dt < self._latMin[tok]:
+      self._latMin[tok] = dt
+    if dt > self._latMax[tok]:
+      self._latMax[tok] = dt
+
+  def _update_rates(self, t):
+    dt = ticks_diff(t, self._tRate)
+    if dt >= _RatePer_ms:
+      self._txBps = (self.txBytes -self._txB0) *1000 //dt
+      self._rxBps = (self.rxBytes -self._rxB0) *1000 //dt
+      self._txB0 = self.txBytes
+      self._rxB0 = self.rxBytes
+      self._tRate = t
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def handle_request(self, msg):
+    """ Replace a `LNK` request in `msg` by the reply with the statistics
+        (see `rmsg.py`); returns False if `msg` is not such a request
+    """
+    if msg.token != TOK_LNK:
+      return False
+    i = msg.find_pset("T")
+    tok = msg[i,0] if i >= 0 else None
+    if tok is not None and (tok < 0 or tok > TOK_LastInd):
+      tok = None
+    doClear = msg.find_pset("R") >= 0
+    msg.reset(TOK_LNK)
+    self.to_msg(msg, tok)
+    if doClear:
+      self.clear()
+    return True
+
+  def to_msg(self, msg, tok=None):
+    """ Add the statistics (of token `tok` or all tokens) as parameter sets
+        to `msg`
+    """
+    m = _MaxInt16
+    if tok is None:
+      nTx = sum(self.txMsgs)
+      nRx = sum(self.rxMsgs)
+      nTo = sum(self.timeouts)
+    else:
+      nTx = self.txMsgs[tok]
+      nRx = self.rxMsgs[tok]
+      nTo = self.timeouts[tok]
+    msg.add_data("C", [min(nTx, m), min(nRx, m), min(nTo, m),
+                       min(self.lost, m), min(self.reordered, m),
+                       min(self.late, m), min(self.crcErrors, m),
+                       min(self.badFrames, m), min(self.rxOverflow, m)])
+    bps = self.bytes_per_s
+    msg.add_data("B", [min(bps[0], m), min(bps[1], m)])
+    msg.add_data("H", [0]*LAT_NBINS)
+    j = msg.find_pset("H")
+    for k in range(LAT_NBINS):
+      if tok is None:
+        n = 0
+        for l in range(self._nTok):
+          n += self._hist[l *LAT_NBINS +k]
+      else:
+        n = self._hist[tok *LAT_NBINS +k]
+      msg[j,k] = min(n, m)
+    lat = self.latency(tok)
+    msg.add_data("L", lat if lat else [0, 0, 0])
+
+# ----------------------------------------------------------------------------
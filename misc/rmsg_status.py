@@ -0,0 +1,212 @@
+# ----------------------------------------------------------------------------
+# rmsg_status.py
+# Delta-encoded status stream (`STS`) for `rmsg` messages
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  import array
+  from micropython import const
+  from robotling_lib.misc.rmsg import TOK_STS, STA_S_LEN, ticks_ms, ticks_diff
+except ModuleNotFoundError:
+  # Standard Python imports
+  const = lambda x : x
+  import array
+  try:
+    from robotling_lib.misc.rmsg import TOK_STS, STA_S_LEN, ticks_ms, ticks_diff
+  except ModuleNotFoundError:
+    from rmsg import TOK_STS, STA_S_LEN, ticks_ms, ticks_diff
+
+__version__   = "0.1.0.1"
+
+_STS_MaxVals  = const(32)
+_STS_MaxSeq   = const(0x7FFF)
+_STS_DefKey   = const(10)
+
+def _to_int16(v):
+  return v -0x10000 if v & 0x8000 else v
+
+# ----------------------------------------------------------------------------
+class StatusStreamer(object):
+  """Server side of the status stream: decides when to send and builds
+     keyframe and delta messages."""
+
+  def __init__(self, n=STA_S_LEN, key_every=_STS_DefKey):
+    assert n <= _STS_MaxVals, "Too many status values"
+    self._n = n
+    self._sent = array.array("h", [0]*n)
+    self._delta = array.array("h", [0]*n)
+    self._key_every = max(1, key_every)
+    self._period_ms = 0
+    self._t_last_ms = 0
+    self._seq = 0
+    self._nSinceKey = 0
+    self._needKey = True
+
+  def reset(self):
+    """ Force a keyframe as next message, e.g. after a reconnect
+    """
+    self._needKey = True
+
+  def handle_request(self, msg):
+    """ Process a `STS` request from the client; returns False if `msg` is
+        not such a request
+    """
+    if msg.token != TOK_STS:
+      return False
+    i = msg.find_pset("P")
+    if i >= 0:
+      self._period_ms = max(0, msg[i,0])
+      k = msg[i,1]
+      self._key_every = max(1, k) if k is not None else self._key_every
+      self._needKey = True
+    if msg.find_pset("R") >= 0:
+      self._needKey = True
+    return True
+
+  @property
+  def is_active(self):
+    return self._period_ms > 0
+
+  def is_due(self):
+    """ Returns True if the subscribed period has passed since the last
+        status message
+    """
+    return (self._period_ms > 0 and
+            ticks_diff(ticks_ms(), self._t_last_ms) >= self._period_ms)
+
+  def build(self, msg, values):
+    """ Fill `msg` with the status `values` (int16), as a keyframe if
+        requested or if `key_every` periods have passed since the last one,
+        otherwise as a delta; returns False if nothing changed (no message
+        to send). Call once per period, i.e. when `is_due()`
+    """
+    n = self._n
+    sent = self._sent
+    self._t_last_ms = ticks_ms()
+    msg.reset(TOK_STS)
+    if self._needKey or self._nSinceKey >= self._key_every -1:
+      for i in range(n):
+        sent[i] = values[i]
+      msg.add_data("K", [self._seq])
+      msg.add_data("S", sent)
+      self._needKey = False
+      self._nSinceKey = 0
+    else:
+      self._nSinceKey += 1
+      mask = 0
+      nCh = 0
+      dv = self._delta
+      for i in range(n):
+        if values[i] != sent[i]:
+          sent[i] = values[i]
+          dv[nCh] = values[i]
+          mask |= 1 << i
+          nCh += 1
+      if nCh == 0:
+        return False
+      msg.add_data("D", [self._seq, _to_int16(mask & 0xFFFF),
+                         _to_int16(mask >> 16)])
+      msg.add_data("V", memoryview(dv)[0:nCh])
+    self._seq = (self._seq +1) & _STS_MaxSeq
+    return True
+
+# ----------------------------------------------------------------------------
+class StatusReceiver(object):
+  """Client side of the status stream: reconstructs the status from
+     keyframes and deltas."""
+
+  def __init__(self, n=STA_S_LEN):
+    self._n = n
+    self.state = array.array("h", [0]*n)
+    self._seq = -1
+    self._needResync = True
+    self._nResync = 0
+    self._nKey = 0
+    self._nDelta = 0
+
+  def reset(self):
+    """ Invalidate the status, e.g. after a reconnect; the next keyframe
+        makes it valid again
+    """
+    self._seq = -1
+    self._needResync = True
+
+  @property
+  def is_valid(self):
+    return not self._needResync
+
+  @property
+  def needs_resync(self):
+    """ True if a keyframe needs to be requested (`make_resync_request()`)
+    """
+    return self._needResync
+
+  @property
+  def stats(self):
+    """ Number of keyframes, deltas and resyncs received/needed so far
+    """
+    return self._nKey, self._nDelta, self._nResync
+
+  def make_subscribe_request(self, msg, period_ms, key_every=_STS_DefKey):
+    """ Fill `msg` with a request to start (or, if `period_ms` is 0, stop)
+        the status stream
+    """
+    msg.reset(TOK_STS)
+    msg.add_data("P", [period_ms, key_every])
+
+  def make_resync_request(self, msg):
+    """ Fill `msg` with a request for a keyframe
+    """
+    msg.reset(TOK_STS)
+    msg.add_data("R", [1])
+
+  def handle(self, msg):
+    """ Update the status from a `STS` message; returns True if the status
+        was updated and is valid
+    """
+    if msg.token != TOK_STS:
+      return False
+    st = self.state
+    i = msg.find_pset("K")
+    if i >= 0:
+      j = msg.find_pset("S")
+      if j < 0:
+        return False
+      for k in range(self._n):
+        st[k] = msg[j,k]
+      self._seq = msg[i,0]
+      self._needResync = False
+      self._nKey += 1
+      return True
+    i = msg.find_pset("D")
+    if i < 0:
+      return False
+    seq = msg[i,0]
+    if self._needResync or seq != (self._seq +1) & _STS_MaxSeq:
+      # Missed a message, wait for the next keyframe
+      if not self._needResync:
+        self._nResync += 1
+      self._needResync = True
+      return False
+    mask = (msg[i,1] & 0xFFFF) | ((msg[i,2] & 0xFFFF) << 16)
+    j = msg.find_pset("V")
+    if j < 0 and mask != 0:
+      return False
+    l = 0
+    for k in range(self._n):
+      if mask & (1 << k):
+        st[k] = msg[j,l]
+        l += 1
+    self._seq = seq
+    self._nDelta += 1
+    return True
+
+# ----------------------------------------------------------------------------
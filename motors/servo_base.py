@@ -6,17 +6,23 @@
 # Copyright (c) 2018-2022 Thomas Euler
 # 2020-01-04, v1
 # 2022-05-05, v1.7, support limits to the timing
+# 2026-10-19, v1.8, `latency_us` for synchronised moves
 # ----------------------------------------------------------------------------
 import array
 
 # pylint: disable=bad-whitespace
-__version__        = "0.1.0.0"
+__version__        = "0.1.8.0"
 # pylint: enabled=bad-whitespace
 
 # ----------------------------------------------------------------------------
 class ServoBase(object):
   """Base class for servos."""
 
+  # Time [us] a position command needs to reach the servo after `write_us()`
+  # has returned (e.g. while the command is still being sent via UART);
+  # used by `ServoManager.flush()` to order the servos
+  LATENCY_US = 0
+
   def __init__(self, freq, us_range, ang_range, us_limits, verbose):
     """ Initialises the servo structure using the frequency `freq` of the
         signal (in Hz), the timing (`us_range`) for the given angular range
@@ -68,6 +74,10 @@ class ServoBase(object):
   def limits_us(self):
     return self._range[6], self._range[7]
 
+  @property
+  def latency_us(self):
+    return self.LATENCY_US
+
   @property
   def angle(self):
     return self._angle *self._sign
@@ -14,6 +14,8 @@
 # 2022-05-08, v1.7, TRJ_LINEAR=Normal, TRJ_SINE=slow start and end move
 # 2022-06-11, v1.8, Allow setting last position after power-off
 # 2022-06-26, v1.8, Added option not to use `ulab`
+# 2026-10-19, v1.9, Synchronised moves across different servo controllers
+#                   (`prepare()` and `flush()`)
 # ----------------------------------------------------------------------------
 import gc
 import time
@@ -30,9 +32,10 @@ except ImportError:
   ULAB = False
 
 # pylint: disable=bad-whitespace
-__version__        = "0.1.8.0"
+__version__        = "0.1.9.0"
 RATE_MS            = const(10)  # 5=hangs, 15...20=ok, 25=not continues
 HARDWARE_TIMER     = const(0)
+FRAME_US           = const(20000) # Servo frame (50 Hz)
 # pylint: enable=bad-whitespace
 
 # ----------------------------------------------------------------------------
@@ -68,6 +71,13 @@ class ServoManager(object):
     self._trajNormList = array.array("f", [0]*n)          # Sensor norm factor (TRJ_SINE)
     self._iStep = 0                                       # Current step
     self._nStTotal = 0                                    # total # of steps
+    self._prepPosList = array.array("H", [0]*n)          # Prepared pos [us]
+    self._isPrepared = bytearray(n)                       # 1=prepared
+    self._isMM18 = bytearray(n)                           # 1=Maestro channel
+    self._latency_us = array.array("i", [0]*n)            # Write latency [us]
+    self._flushOrder = bytearray(range(n))                # Order of writes
+    self._nPrepared = 0
+    self._skew_us = 0
     self._mm18 = None
     self._isMoving = False
     self._isFirstMove = True
@@ -80,6 +90,7 @@ class ServoManager(object):
         - `angle_in_us(value=None)`
         - `off()`
         - `deinit()`
+        and optionally the property `latency_us` (see `ServoBase`)
     """
     if i in range(self._nChan):
       self._Servos[i] = servoObj
@@ -88,10 +99,16 @@ class ServoManager(object):
       if self._isVerbose:
         print("Add servo #{0:-2.0f}, at {1} us"
               .format(i, int(self._servoPos[i])))
+      try:
+        self._latency_us[i] = servoObj.latency_us
+      except AttributeError:
+        self._latency_us[i] = 0
       try:
         self._mm18 = servoObj._mm18
+        self._isMM18[i] = 1
       except AttributeError:
         pass
+      self._sort_flush_order()
 
   def set_servo_type(self, i, type):
     """ Change servo type (see `TYPE_xxx`)
@@ -203,6 +220,100 @@ class ServoManager(object):
         self._isFirstMove = False
       self._isMoving = True
 
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def prepare(self, servos, pos):
+    """ First phase of a synchronised move: converts the positions in `pos`
+        (in degrees) for the servos in the list into timings and stores them
+        w/o writing anything to the controllers. Servos on a Mini Maestro only
+        get their command prepared (see `MiniMaestro18.execute()`).
+        Call `flush()` to move all prepared servos at once.
+    """
+    ser = self._Servos
+    ppl = self._prepPosList
+    ipr = self._isPrepared
+    for iSr, SID in enumerate(servos):
+      if not ser[SID]:
+        continue
+      t = ser[SID].angle_in_us(pos[iSr])
+      ppl[SID] = t
+      self._servoPos[SID] = t
+      if self._isMM18[SID]:
+        ser[SID].write_us(t, prepare_only=True)
+      if not ipr[SID]:
+        ipr[SID] = 1
+        self._nPrepared += 1
+
+  #@micropython.native
+  def flush(self):
+    """ Second phase of a synchronised move: writes all prepared positions,
+        starting with the servos with the highest latency, such that all
+        servos get their new position within the same servo frame. The
+        prepared Mini Maestro channels are sent as one command.
+        Returns the skew in [us], i.e. the time between the first and the
+        last servo to receive its new position (see also `skew_us`)
+    """
+    if self._nPrepared == 0:
+      return 0
+    ser = self._Servos
+    ppl = self._prepPosList
+    ipr = self._isPrepared
+    imm = self._isMM18
+    lat = self._latency_us
+    t_min = 0x3FFFFFFF
+    t_max = -t_min
+    mm18Done = False
+    t0 = time.ticks_us()
+    for SID in self._flushOrder:
+      if not ipr[SID]:
+        continue
+      ipr[SID] = 0
+      t1 = time.ticks_us()
+      if imm[SID]:
+        # All prepared Maestro channels are moved with a single command,
+        # which is sent when the first of these channels is due
+        if mm18Done:
+          continue
+        nBytes = self._mm18.execute()
+        mm18Done = True
+        dt = nBytes *self._mm18.byte_us
+      else:
+        ser[SID].write_us(ppl[SID])
+        dt = ser[SID].latency_us
+      t2 = time.ticks_us()
+      # Arrival time of the command, relative to the start of the flush;
+      # update the latency estimate for this servo (call duration plus
+      # the time the command still needs after the call has returned)
+      t = time.ticks_diff(t2, t0) +dt
+      lat[SID] = (lat[SID] *3 +time.ticks_diff(t2, t1) +dt) //4
+      t_min = min(t_min, t)
+      t_max = max(t_max, t)
+    self._nPrepared = 0
+    self._skew_us = t_max -t_min
+    self._sort_flush_order()
+    if self._isVerbose and self._skew_us > FRAME_US:
+      print(ansi.RED +"Skew of {0} us exceeds servo frame"
+            .format(self._skew_us) +ansi.BLACK)
+    return self._skew_us
+
+  @property
+  def skew_us(self):
+    """ Skew in [us] measured during the last `flush()`
+    """
+    return self._skew_us
+
+  def _sort_flush_order(self):
+    """ Sort the servos by decreasing latency (insertion sort in place)
+    """
+    fo = self._flushOrder
+    lat = self._latency_us
+    for i in range(1, len(fo)):
+      j = i
+      SID = fo[i]
+      while j > 0 and lat[fo[j-1]] < lat[SID]:
+        fo[j] = fo[j-1]
+        j -= 1
+      fo[j] = SID
+
   # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
   @timed_function
   #@micropython.native
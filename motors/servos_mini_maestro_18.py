@@ -8,6 +8,7 @@
 # 2020-10-31, v1.2, use `languageID` instead of `ID`
 # 2021-02-14, v1.3, small changes towards more performance
 # 2022-01-04, v1.4, Nano RP2040 Connect added
+# 2026-10-19, v1.5, UART latency estimate for synchronised moves
 #
 # The MIT License (MIT)
 # Copyright (c) 2016 Steven L. Jacobs (Maestro Python library)
@@ -40,7 +41,7 @@ from robotling_lib.motors.servo_base import ServoBase
 import robotling_lib.misc.ansi_color as ansi
 
 # pylint: disable=bad-whitespace
-__version__      = "0.1.4.0"
+__version__      = "0.1.5.0"
 CHIP_NAME        = "minMaestro18"
 CHAN_COUNT       = const(18)
 DEF_RANGE_DEG    = (0, 180)
@@ -92,6 +93,12 @@ class ServoChannel(ServoBase):
     """
     self.write_us(0)
 
+  @property
+  def latency_us(self):
+    """ Time needed to send a single target command via UART
+    """
+    return len(self._cmd) *self._mm18.byte_us
+
   @property
   def is_moving(self):
     """ Check if all servos reached their targets. This is useful only if speed
@@ -198,6 +205,7 @@ class MiniMaestro18:
     try:
       self.reset()
       self._uart = UART(ch, baudrate=baud, tx=Pin(_tx), rx=Pin(_rx))
+      self._byte_us = 10 *1000000 //baud
       self._iDev = dev
       self.channels = ServoChannels(self)
       self._isReady = True
@@ -220,7 +228,9 @@ class MiniMaestro18:
     """ If servo movements were prepared (`servo.write_us(..., True)`), then
         all these movements are executed in one command.
         Note that this works only with continuous blocks of servos.
+        Returns the number of bytes sent.
     """
+    nBytes = 0
     if self._nPrepared > 0:
       cmd = bytearray([_START, self._iDev, _MULT_TARGETS, 0, 0])
       nCh = 0
@@ -233,7 +243,15 @@ class MiniMaestro18:
           nCh += 1
       cmd[3] = nCh
       self._uart.write(cmd)
+      nBytes = len(cmd)
     self._nPrepared = 0
+    return nBytes
+
+  @property
+  def byte_us(self):
+    """ Time needed to send one byte via UART (in [us])
+    """
+    return self._byte_us
 
   @property
   def frequency(self):
@@ -0,0 +1,95 @@
+# ----------------------------------------------------------------------------
+# bluetooth.py
+# Stand-in for the MicroPython module `bluetooth` (CPython, for host tests);
+# only advertising and scanning
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# All `BLE` objects of the process share the "air": what one advertises
+# with `gap_advertise()` is reported to all others that call `gap_scan()`,
+# as `_IRQ_SCAN_RESULT` events to their handler, followed by
+# `_IRQ_SCAN_DONE`. Events are delivered synchronously, within `gap_scan()`.
+# ----------------------------------------------------------------------------
+__version__ = "0.1.0.0"
+
+FLAG_READ       = 0x0002
+FLAG_WRITE_NO_RESPONSE = 0x0004
+FLAG_WRITE      = 0x0008
+FLAG_NOTIFY     = 0x0010
+
+_IRQ_SCAN_RESULT = 5
+_IRQ_SCAN_DONE  = 6
+
+_ADV_IND        = 0x00
+_ADV_NONCONN_IND = 0x03
+
+# Advertisements "on air", by address
+_air = {}
+_nDevices = 0
+
+# ----------------------------------------------------------------------------
+class UUID(object):
+
+  def __init__(self, value):
+    if isinstance(value, int):
+      self._b = value.to_bytes(2, "little")
+    elif isinstance(value, str):
+      self._b = bytes.fromhex(value.replace("-", ""))[::-1]
+    else:
+      self._b = bytes(value)
+
+  def __bytes__(self):
+    return self._b
+
+  def __eq__(self, other):
+    return isinstance(other, UUID) and self._b == other._b
+
+  def __hash__(self):
+    return hash(self._b)
+
+# ----------------------------------------------------------------------------
+class BLE(object):
+
+  def __init__(self, rssi=-60):
+    global _nDevices
+    _nDevices += 1
+    self._addr = bytes([0x02, 0, 0, 0, _nDevices >> 8, _nDevices & 0xFF])
+    self._active = False
+    self._irq = None
+    self.rssi = rssi
+
+  def active(self, state=None):
+    if state is None:
+      return self._active
+    self._active = bool(state)
+    if not self._active:
+      _air.pop(self._addr, None)
+
+  def config(self, *args, **kwargs):
+    if args and args[0] == "mac":
+      return (0, self._addr)
+
+  def irq(self, handler):
+    self._irq = handler
+
+  def gap_advertise(self, interval_us, adv_data=None, resp_data=None,
+                    connectable=True):
+    if interval_us is None:
+      _air.pop(self._addr, None)
+    else:
+      typ = _ADV_IND if connectable else _ADV_NONCONN_IND
+      _air[self._addr] = (typ, bytes(adv_data or b""), self)
+
+  def gap_scan(self, duration_ms, interval_us=1280000, window_us=11250,
+               active=False):
+    if duration_ms is None or not self._irq:
+      return
+    for addr, (typ, adv, dev) in list(_air.items()):
+      if dev is not self:
+        self._irq(_IRQ_SCAN_RESULT,
+                  (0, memoryview(addr), typ, dev.rssi, memoryview(adv)))
+    self._irq(_IRQ_SCAN_DONE, ())
+
+# ----------------------------------------------------------------------------
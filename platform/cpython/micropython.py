@@ -0,0 +1,27 @@
+# ----------------------------------------------------------------------------
+# micropython.py
+# Stand-in for the MicroPython module `micropython` (CPython, for host tests)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# ----------------------------------------------------------------------------
+__version__ = "0.1.0.0"
+
+# ----------------------------------------------------------------------------
+def const(x):
+  return x
+
+def native(f):
+  return f
+
+def viper(f):
+  return f
+
+def alloc_emergency_exception_buf(n):
+  pass
+
+def mem_info(verbose=False):
+  pass
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,49 @@
+# ----------------------------------------------------------------------------
+# network.py
+# Stand-in for the MicroPython module `network` (CPython, for host tests);
+# the host's network counts as a connected WLAN
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# ----------------------------------------------------------------------------
+__version__ = "0.1.0.0"
+
+STA_IF        = 0
+AP_IF         = 1
+
+STAT_IDLE     = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP   = 1010
+
+# ----------------------------------------------------------------------------
+class WLAN(object):
+
+  def __init__(self, interface=STA_IF):
+    self._interface = interface
+    self._active = True
+
+  def active(self, state=None):
+    if state is None:
+      return self._active
+    self._active = bool(state)
+
+  def isconnected(self):
+    return self._active
+
+  def status(self, param=None):
+    return STAT_GOT_IP if self._active else STAT_IDLE
+
+  def connect(self, ssid=None, key=None, **kwargs):
+    self._active = True
+
+  def disconnect(self):
+    pass
+
+  def ifconfig(self):
+    return ("127.0.0.1", "255.0.0.0", "127.0.0.1", "127.0.0.1")
+
+  def scan(self):
+    return []
+
+# ----------------------------------------------------------------------------
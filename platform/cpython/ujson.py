@@ -0,0 +1,13 @@
+# ----------------------------------------------------------------------------
+# ujson.py
+# Stand-in for the MicroPython module `ujson` (CPython, for host tests)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# ----------------------------------------------------------------------------
+from json import *
+
+__version__ = "0.1.0.0"
+
+# ----------------------------------------------------------------------------
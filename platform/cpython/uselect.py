@@ -0,0 +1,13 @@
+# ----------------------------------------------------------------------------
+# uselect.py
+# Stand-in for the MicroPython module `uselect` (CPython, for host tests)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# ----------------------------------------------------------------------------
+from select import *
+
+__version__ = "0.1.0.0"
+
+# ----------------------------------------------------------------------------
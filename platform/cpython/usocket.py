@@ -0,0 +1,54 @@
+# ----------------------------------------------------------------------------
+# usocket.py
+# Stand-in for the MicroPython module `usocket` (CPython, for host tests)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# Adds the stream methods of MicroPython sockets: in non-blocking mode,
+# `write()`, `read()` and `readinto()` return None instead of raising an
+# exception if no data can be written or read; in blocking mode, `read(n)`
+# returns `n` bytes (or less at the end of the stream).
+# ----------------------------------------------------------------------------
+import socket as socket_
+from socket import getaddrinfo, AF_INET, SOCK_STREAM, SOL_SOCKET, \
+                   SO_REUSEADDR, IPPROTO_TCP
+
+__version__ = "0.1.0.0"
+
+# ----------------------------------------------------------------------------
+class socket(socket_.socket):
+
+  def write(self, buf, n=None):
+    if n is not None:
+      buf = memoryview(buf)[:n]
+    if self.getblocking():
+      self.sendall(buf)
+      return len(buf)
+    try:
+      return self.send(buf)
+    except BlockingIOError:
+      return None
+
+  def read(self, n=-1):
+    try:
+      if n < 0 or not self.getblocking():
+        return self.recv(n if n > 0 else 4096)
+      data = b""
+      while len(data) < n:
+        d = self.recv(n -len(data))
+        if not d:
+          break
+        data += d
+      return data
+    except BlockingIOError:
+      return None
+
+  def readinto(self, buf, n=None):
+    try:
+      return self.recv_into(buf, n or 0)
+    except BlockingIOError:
+      return None
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,13 @@
+# ----------------------------------------------------------------------------
+# ustruct.py
+# Stand-in for the MicroPython module `ustruct` (CPython, for host tests)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# ----------------------------------------------------------------------------
+from struct import *
+
+__version__ = "0.1.0.0"
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,38 @@
+# ----------------------------------------------------------------------------
+# utime.py
+# Stand-in for the MicroPython module `utime` (CPython, for host tests)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# ----------------------------------------------------------------------------
+import time as time_
+
+__version__ = "0.1.0.0"
+
+# ----------------------------------------------------------------------------
+def ticks_diff(ticks1, ticks2):
+  return ticks1 -ticks2
+
+def ticks_add(ticks, delta):
+  return ticks +delta
+
+def ticks_us():
+  return int(time_.monotonic() *1000000)
+
+def ticks_ms():
+  return int(time_.monotonic() *1000)
+
+def sleep(dur_s):
+  time_.sleep(dur_s)
+
+def sleep_us(dur_us):
+  time_.sleep(dur_us /1000000)
+
+def sleep_ms(dur_ms):
+  time_.sleep(dur_ms /1000)
+
+def time():
+  return time_.time()
+
+# ----------------------------------------------------------------------------
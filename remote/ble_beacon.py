@@ -0,0 +1,190 @@
+# ----------------------------------------------------------------------------
+# ble_beacon.py
+# Connectionless telemetry: a robot's status record in BLE advertisements,
+# and a monitor that decodes the advertisements of many robots
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# The status record is the manufacturer-specific data of the advertisement
+# (company ID `COMPANY_ID`, followed by `STATUS_FMT`):
+#   seq         : uint8, incremented with each new record
+#   state       : uint8, defined by the application
+#   battery     : uint16, [mV]
+#   heading     : uint16, [1/100 deg], 0..35999
+#   obstacle    : uint16, distance to the nearest obstacle [mm], 0xFFFF if
+#                 none
+# The payload is created once; `spin()` writes new values into it in place
+# and re-advertises, at most at `rate_Hz`. The advertisement is not
+# connectable, such that any number of robots can be monitored by one
+# scanner, w/o using any of the few connection slots.
+#
+# Robot:
+#   beacon = TelemetryBeacon(bluetooth.BLE(), name="rob1", rate_Hz=2)
+#   beacon.update(battery=7400, state=1, heading=123.4, obstacle=250)
+#   beacon.spin()                             # call regularly
+# Monitor (MicroPython, or on the host with the stand-in for `bluetooth` in
+# `platform/cpython`):
+#   mon = BeaconMonitor()
+#   ble.irq(mon.irq)
+#   ble.gap_scan(0, 30000, 30000)
+#   for addr, d in mon.robots.items(): ...
+# Other scanners (e.g. `bleak` on the host, with `platform/cpython` in the
+# path) can pass each advertisement to `mon.on_advert(addr, rssi, adv_data)`
+# or decode the manufacturer data with `decode_status()`.
+# ----------------------------------------------------------------------------
+import ustruct as struct
+from micropython import const
+from utime import ticks_ms, ticks_diff
+import robotling_lib.remote.ble_helper as bhlp
+
+__version__ = "0.1.0.0"
+
+COMPANY_ID    = 0xFFFF          # Reserved for tests by the Bluetooth SIG
+STATUS_FMT    = "<BBHHH"
+STATUS_LEN    = 8
+NO_OBSTACLE   = 0xFFFF
+
+_IRQ_SCAN_RESULT = const(5)
+_IRQ_SCAN_DONE   = const(6)
+
+# ----------------------------------------------------------------------------
+class TelemetryBeacon(object):
+  """Advertises the status record of a robot (see above)."""
+
+  def __init__(self, ble, name=None, company_id=COMPANY_ID, rate_Hz=2,
+               interval_us=100000):
+    self._ble = ble
+    self._ble.active(True)
+    mfr = struct.pack("<H", company_id) +bytes(STATUS_LEN)
+    if isinstance(name, str):
+      name = name.encode()
+    self._payload = bhlp.advertising_payload(name=name, manufacturer=mfr)
+    assert len(self._payload) <= bhlp.ADV_MAX_LEN, "Name too long"
+    # The manufacturer data is the last field of the payload
+    self._iRec = len(self._payload) -STATUS_LEN
+    self._interval = interval_us
+    self._period = int(1000 /rate_Hz)
+    self._tLast = ticks_ms() -self._period
+    self._seq = 0
+    self._state = 0
+    self._battery = 0
+    self._heading = 0
+    self._obstacle = NO_OBSTACLE
+    self._isNew = True
+    self.nAdverts = 0
+
+  @property
+  def payload(self):
+    return self._payload
+
+  def update(self, battery=None, state=None, heading=None, obstacle=None):
+    """ Set new values (battery voltage in [mV], state, heading in [deg],
+        distance to the nearest obstacle in [mm] or `NO_OBSTACLE`); they
+        are advertised by the next call of `spin()` that is due
+    """
+    if battery is not None:
+      self._battery = min(max(int(battery), 0), 0xFFFF)
+    if state is not None:
+      self._state = state & 0xFF
+    if heading is not None:
+      self._heading = int(heading *100) %36000
+    if obstacle is not None:
+      self._obstacle = min(max(int(obstacle), 0), NO_OBSTACLE)
+    self._isNew = True
+
+  def spin(self):
+    """ Advertise the current values, if new ones are available and the
+        last advertisement is at least 1/`rate_Hz` old; returns True if
+        the advertisement was updated
+    """
+    if not self._isNew:
+      return False
+    t = ticks_ms()
+    if ticks_diff(t, self._tLast) < self._period:
+      return False
+    self._tLast = t
+    self._isNew = False
+    self._seq = (self._seq +1) & 0xFF
+    struct.pack_into(STATUS_FMT, self._payload, self._iRec, self._seq,
+                     self._state, self._battery, self._heading,
+                     self._obstacle)
+    self._ble.gap_advertise(self._interval, adv_data=self._payload,
+                            connectable=False)
+    self.nAdverts += 1
+    return True
+
+  def stop(self):
+    self._ble.gap_advertise(None)
+
+# ----------------------------------------------------------------------------
+def decode_status(rec):
+  """ Returns the status record `rec` (w/o company ID) as dictionary
+  """
+  seq, state, bat, hd, obs = struct.unpack(STATUS_FMT, rec)
+  return {"seq": seq, "state": state, "battery": bat, "heading": hd /100,
+          "obstacle": None if obs == NO_OBSTACLE else obs}
+
+def decode_advert(adv_data, company_id=COMPANY_ID):
+  """ Returns the status record in the advertising payload `adv_data` as
+      dictionary, or None if there is none
+  """
+  for cid, rec in bhlp.decode_manufacturer(adv_data):
+    if cid == company_id and len(rec) == STATUS_LEN:
+      return decode_status(rec)
+  return None
+
+# ----------------------------------------------------------------------------
+class BeaconMonitor(object):
+  """Collects the latest status of each robot (by address) from scan
+     results."""
+
+  def __init__(self, company_id=COMPANY_ID):
+    self._cid = company_id
+    self.robots = {}
+    self.nAdverts = 0
+    self.nScans = 0
+
+  def irq(self, event, data):
+    """ Handler for the BLE events of a scan (`BLE.irq()`)
+    """
+    if event == _IRQ_SCAN_RESULT:
+      _, addr, _, rssi, adv_data = data
+      self.on_advert(bytes(addr), rssi, bytes(adv_data))
+    elif event == _IRQ_SCAN_DONE:
+      self.nScans += 1
+
+  def on_advert(self, addr, rssi, adv_data):
+    """ Process an advertisement; returns the robot's status, or None if the
+        advertisement is not from a robot
+    """
+    d = decode_advert(adv_data, self._cid)
+    if d is None:
+      return None
+    self.nAdverts += 1
+    prev = self.robots.get(addr)
+    if prev is None:
+      d["name"] = bhlp.decode_name(adv_data)
+      d["missed"] = 0
+    elif prev["seq"] == d["seq"]:
+      # Same record advertised again
+      prev["rssi"] = rssi
+      prev["t_ms"] = ticks_ms()
+      return prev
+    else:
+      d["name"] = prev["name"]
+      d["missed"] = prev["missed"] +((d["seq"] -prev["seq"] -1) & 0xFF)
+    d["rssi"] = rssi
+    d["t_ms"] = ticks_ms()
+    self.robots[addr] = d
+    return d
+
+  def stale(self, max_age_ms):
+    """ Returns the addresses of robots not heard of for `max_age_ms`
+    """
+    t = ticks_ms()
+    return [a for a, d in self.robots.items()
+            if ticks_diff(t, d["t_ms"]) > max_age_ms]
+
+# ----------------------------------------------------------------------------
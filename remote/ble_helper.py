@@ -7,6 +7,7 @@
 # The MIT License (MIT)
 # Copyright (c) 2020-21 Thomas Euler
 # 2020-08-16, First version
+# 2026-10-19, Manufacturer-specific data in advertising payloads
 #
 # ----------------------------------------------------------------------------
 from micropython import const
@@ -38,11 +39,15 @@ _ADV_TYPE_UUID16_MORE       = const(0x2)
 _ADV_TYPE_UUID32_MORE       = const(0x4)
 _ADV_TYPE_UUID128_MORE      = const(0x6)
 _ADV_TYPE_APPEARANCE        = const(0x19)
+_ADV_TYPE_MANUFACTURER      = const(0xFF)
+ADV_MAX_LEN                 = const(31)
 # pylint: enable=bad-whitespace
 
 def advertising_payload(limited_disc=False, br_edr=False, name=None,
-                        services=None, appearance=0):
-  """ Generate a payload to be passed to gap_advertise(adv_data=...)
+                        services=None, appearance=0, manufacturer=None):
+  """ Generate a payload to be passed to gap_advertise(adv_data=...);
+      `manufacturer` (company ID, little-endian, followed by the data) is
+      appended last
   """
   payload = bytearray()
 
@@ -69,6 +74,8 @@ def advertising_payload(limited_disc=False, br_edr=False, name=None,
   # See org.bluetooth.characteristic.gap.appearance.xml
   if appearance:
     _append(_ADV_TYPE_APPEARANCE, struct.pack("<h", appearance))
+  if manufacturer:
+    _append(_ADV_TYPE_MANUFACTURER, manufacturer)
   return payload
 
 def decode_field(payload, adv_type):
@@ -84,6 +91,14 @@ def decode_name(payload):
   n = decode_field(payload, _ADV_TYPE_NAME)
   return str(n[0], "utf-8") if n else ""
 
+def decode_manufacturer(payload):
+  """ Returns a list of (company ID, data) of the manufacturer-specific
+      data fields
+  """
+  return [(struct.unpack("<H", f[0:2])[0], f[2:])
+          for f in decode_field(payload, _ADV_TYPE_MANUFACTURER)
+          if len(f) >= 2]
+
 def decode_services(payload):
   services = []
   for u in decode_field(payload, _ADV_TYPE_UUID16_COMPLETE):
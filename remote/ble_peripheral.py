@@ -7,7 +7,16 @@
 # The MIT License (MIT)
 # Copyright (c) 2020 Thomas Euler
 # 2020-08-16, First version
+# 2026-10-19, Notifications are split into chunks that fit the negotiated
+#             MTU and sent from a transmit queue per connection, limited
+#             by notify credits; received data is kept in a ring buffer
 #
+# Data written with `write(data, notify=True)` is queued for each connected
+# central and sent in chunks of (MTU -3) bytes. MicroPython does not report
+# when a notification has been sent, therefore at most `credits` chunks
+# are sent per connection and call of `spin()` (which `write()`, `read()`
+# and `any()` also call), and sending stops until the next call if the
+# stack runs out of buffers (`OSError`).
 # Adapted from example on:
 # https://github.com/micropython/micropython/tree/master/examples/bluetooth
 #
@@ -16,9 +25,10 @@ import struct
 import bluetooth
 from micropython import const
 import robotling_lib.remote.ble_helper as bhlp
+from robotling_lib.misc.ring_buffer import RingBuffer
 
 # pylint: disable=bad-whitespace
-__version__   = "0.1.0.0"
+__version__   = "0.1.1.1"
 CHIP_NAME     = "ble_uart"
 
 _UART_UUID    = bluetooth.UUID("6E400001-B5A3-F393-E0A9-E50E24DCCA9E")
@@ -31,18 +41,28 @@ _UART_SERVICE = (_UART_UUID, (_UART_TX, _UART_RX,),)
 _IRQ_CENTRAL_CONNECT    = const(1)
 _IRQ_CENTRAL_DISCONNECT = const(2)
 _IRQ_GATTS_WRITE        = const(3)
+_IRQ_MTU_EXCHANGED      = const(21)
+
+_ATT_MTU_DEFAULT        = const(23)
+_ATT_HDR_LEN            = const(3)    # Opcode and handle of a notification
 # pylint: enable=bad-whitespace
 
 # ----------------------------------------------------------------------------
 class BLESimplePeripheral:
   """Class for a simple BLE UART device."""
 
-  def __init__(self, ble, name, max_msg_size=200):
+  def __init__(self, ble, name, max_msg_size=200, rx_size=1024,
+               tx_size=1024, mtu=247, credits=4):
     """ Requires a BLE instance and the name for this peripheral
     """
     self._ble = ble
     self._ble.active(True)
     self._ble.config(rxbuf=max_msg_size)
+    try:
+      # Preferred MTU, used when a central requests an MTU exchange
+      self._ble.config(mtu=mtu)
+    except (ValueError, OSError):
+      mtu = _ATT_MTU_DEFAULT
     self._mac = bhlp.format_mac(self._ble.config("mac")[1])
     self._ble.irq(self._irq)
     res = self._ble.gatts_register_services((_UART_SERVICE,))
@@ -50,9 +70,16 @@ class BLESimplePeripheral:
     self._handle_rx = res[0][1]
     self._ble.gatts_set_buffer(self._handle_tx, max_msg_size)
     self._ble.gatts_set_buffer(self._handle_rx, max_msg_size, True)
-    self._connections = set()
-    self._rx_buffer = bytearray()
+    # Per connection: [chunk length, transmit queue]
+    self._connections = {}
+    self._rx = RingBuffer(rx_size)
+    self._txSize = tx_size
+    self._credits = credits
+    self._chunk = bytearray(mtu -_ATT_HDR_LEN)
+    self._chunkMV = memoryview(self._chunk)
     self._write_callback = None
+    self.nRxOverflow = 0
+    self.nTxDropped = 0
 
     self._isReady = True
     self._log("MAC=" +self._mac, "ok" if self._isReady else "NOT FOUND")
@@ -74,33 +101,74 @@ class BLESimplePeripheral:
       # Add new connection
       conn_handle, _, _, = data
       self._log("#{0} connected".format(conn_handle))
-      self._connections.add(conn_handle)
+      self._connections[conn_handle] = [_ATT_MTU_DEFAULT -_ATT_HDR_LEN,
+                                        RingBuffer(self._txSize)]
 
     elif event == _IRQ_CENTRAL_DISCONNECT:
       # Remove connection and start advertising again
       conn_handle, _, _, = data
       self._log("#{0} disconnected".format(conn_handle))
-      self._connections.remove(conn_handle)
+      self._connections.pop(conn_handle, None)
       self._advertise()
 
+    elif event == _IRQ_MTU_EXCHANGED:
+      # Chunks can be as long as the MTU allows
+      conn_handle, mtu = data
+      c = self._connections.get(conn_handle)
+      if c:
+        c[0] = min(mtu -_ATT_HDR_LEN, len(self._chunk))
+
     elif event == _IRQ_GATTS_WRITE:
       # Incoming data received
       conn_handle, value_handle = data
       value = self._ble.gatts_read(value_handle)
       if value_handle == self._handle_rx:
-        self._rx_buffer += value
+        if self._rx.put(value) < len(value):
+          self.nRxOverflow += 1
         if self._write_callback:
           self._write_callback(value)
 
   # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
   def write(self, data, notify=False):
-    """ Send data to all connections
+    """ Send data to all connections; with `notify`, the data is queued for
+        each connection and returns False if it did not fit into a queue
     """
     if notify:
-      for conn_handle in self._connections:
-        self._ble.gatts_notify(conn_handle, self._handle_tx, data)
+      if isinstance(data, str):
+        data = data.encode()
+      ok = True
+      n = len(data)
+      for c in self._connections.values():
+        if c[1].free >= n:
+          c[1].put(data)
+        else:
+          self.nTxDropped += 1
+          ok = False
+      self.spin()
+      return ok
     else:
       self._ble.gatts_write(self._handle_tx, data)
+      return True
+
+  def spin(self):
+    """ Send queued data as notifications, up to `credits` chunks per
+        connection
+    """
+    mv = self._chunkMV
+    # Connections may change (in `_irq`) while sending
+    for conn_handle, c in list(self._connections.items()):
+      q = c[1]
+      for _ in range(self._credits):
+        n = min(len(q), c[0])
+        if n == 0:
+          break
+        q.copy_to(mv, n)
+        try:
+          self._ble.gatts_notify(conn_handle, self._handle_tx, mv[:n])
+        except OSError:
+          # Out of buffers, try again later
+          break
+        q.skip(n)
 
   def _advertise(self, interval_us=500000):
     """ Start advertising
@@ -111,12 +179,33 @@ class BLESimplePeripheral:
   def read(self, n=None):
     """ Read data, if available
     """
-    if not n:
-      n = len(self._rx_buffer)
-    res = self._rx_buffer[0:n]
-    self._rx_buffer = self._rx_buffer[n:]
+    self.spin()
+    rx = self._rx
+    if not n or n > len(rx):
+      n = len(rx)
+    res = bytearray(n)
+    rx.copy_to(memoryview(res), n)
+    rx.skip(n)
     return res
 
+  def readinto(self, buf):
+    """ Read available data into `buf` (w/o allocating memory); returns the
+        number of bytes read
+    """
+    self.spin()
+    rx = self._rx
+    n = min(len(buf), len(rx))
+    rx.copy_to(memoryview(buf), n)
+    rx.skip(n)
+    return n
+
+  def any(self):
+    """ Number of bytes available; also sends queued data, as callers that
+        poll for a reply (e.g. `RMsg.receive()`) only call `any()`
+    """
+    self.spin()
+    return len(self._rx)
+
   def on_write(self, callback):
     """ Set callback for incoming data
     """
@@ -128,7 +217,13 @@ class BLESimplePeripheral:
 
   @property
   def rx_buffer(self):
-    return self._rx_buffer
+    return self._rx
+
+  @property
+  def tx_pending(self):
+    """ Number of queued bytes not yet sent (maximum over connections)
+    """
+    return max([len(c[1]) for c in self._connections.values()] or [0])
 
   def _log(self, msg, state=""):
     print("[{0:>12}] {1:35} ({2}): {3}"
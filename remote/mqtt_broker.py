@@ -0,0 +1,282 @@
+# ----------------------------------------------------------------------------
+# mqtt_broker.py
+# Minimal MQTT 3.1.1 broker for tests (asyncio, Windows/Linux only)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# Supports CONNECT (incl. last will), PUBLISH with QoS 0-2 from clients,
+# retained messages, SUBSCRIBE/UNSUBSCRIBE with wildcards, PINGREQ and
+# DISCONNECT; messages are forwarded to subscribers with QoS 0. There is no
+# authentication, persistence or TLS.
+#
+#   python mqtt_broker.py --port 1883
+# or
+#   broker = Broker(port=1883, on_publish=f)   # f(client_id, topic, payload)
+#   asyncio.run(broker.run())
+# ----------------------------------------------------------------------------
+import time
+import asyncio
+try:
+  from robotling_lib.remote.topic_dispatch import TopicDispatcher
+except ModuleNotFoundError:
+  from topic_dispatch import TopicDispatcher
+
+__version__   = "0.1.0.0"
+
+_CONNECT      = 0x10
+_PUBLISH      = 0x30
+_PUBACK       = 0x40
+_PUBREC       = 0x50
+_PUBREL       = 0x60
+_PUBCOMP      = 0x70
+_SUBSCRIBE    = 0x80
+_UNSUBSCRIBE  = 0xA0
+_PINGREQ      = 0xC0
+_DISCONNECT   = 0xE0
+
+# ----------------------------------------------------------------------------
+def _encode_len(n):
+  b = bytearray()
+  while True:
+    d = n & 0x7F
+    n >>= 7
+    b.append(d | 0x80 if n > 0 else d)
+    if n == 0:
+      return bytes(b)
+
+def _str(b):
+  return len(b).to_bytes(2, "big") +b
+
+def publish_packet(topic, payload, retain=False):
+  """ Returns a QoS 0 PUBLISH packet
+  """
+  body = _str(topic) +payload
+  return bytes([_PUBLISH | retain]) +_encode_len(len(body)) +body
+
+# ----------------------------------------------------------------------------
+class Session(object):
+  """State of a client connection."""
+
+  def __init__(self, broker, reader, writer):
+    self.broker = broker
+    self.reader = reader
+    self.writer = writer
+    self.clientID = b""
+    self.keepalive = 0
+    self.will = None
+    self.filters = []
+    self.qos2 = set()
+    self.tConnect = time.monotonic()
+    self.nRx = 0
+    self.nTx = 0
+
+  def deliver(self, topic, payload, retain=False):
+    """ Send a message to this client (called by the dispatcher)
+    """
+    if not self.writer.is_closing():
+      self.writer.write(publish_packet(topic, payload, retain))
+      self.nTx += 1
+
+  async def read_packet(self):
+    """ Returns the first byte and the body of the next packet
+    """
+    tout = self.keepalive *1.5 if self.keepalive else None
+    hdr = await asyncio.wait_for(self.reader.readexactly(1), tout)
+    n = 0
+    sh = 0
+    while True:
+      b = (await self.reader.readexactly(1))[0]
+      n |= (b & 0x7F) << sh
+      sh += 7
+      if not b & 0x80:
+        break
+    body = await self.reader.readexactly(n) if n else b""
+    return hdr[0], body
+
+# ----------------------------------------------------------------------------
+class Broker(object):
+  """MQTT broker for tests; `on_publish(client_id, topic, payload)` (if
+     given) is called for each incoming message."""
+
+  def __init__(self, host="127.0.0.1", port=1883, on_publish=None):
+    self.host = host
+    self.port = port
+    self.on_publish = on_publish
+    self._server = None
+    self._sessions = {}
+    self._retained = {}
+    self._dispatcher = TopicDispatcher()
+    self.nConnections = 0
+    self.nPublished = 0
+    self.nBytesIn = 0
+
+  @property
+  def sessions(self):
+    return self._sessions
+
+  async def start(self):
+    self._server = await asyncio.start_server(self._serve, self.host,
+                                              self.port)
+
+  async def run(self):
+    await self.start()
+    async with self._server:
+      await self._server.serve_forever()
+
+  def close(self):
+    if self._server:
+      self._server.close()
+    for s in list(self._sessions.values()):
+      s.writer.close()
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  async def _serve(self, reader, writer):
+    s = Session(self, reader, writer)
+    clean = False
+    try:
+      op, body = await asyncio.wait_for(s.read_packet(), 10)
+      if op & 0xF0 != _CONNECT or not self._connect(s, body):
+        return
+      while True:
+        op, body = await s.read_packet()
+        s.nRx += 1
+        self.nBytesIn += len(body) +2
+        typ = op & 0xF0
+        if typ == _PUBLISH:
+          self._publish(s, op, body)
+        elif typ == _PUBREL:
+          s.qos2.discard(body[0:2])
+          writer.write(bytes([_PUBCOMP, 2]) +body[0:2])
+        elif typ == _SUBSCRIBE:
+          self._subscribe(s, body)
+        elif typ == _UNSUBSCRIBE:
+          self._unsubscribe(s, body)
+        elif typ == _PINGREQ:
+          writer.write(b"\xd0\x00")
+        elif typ == _DISCONNECT:
+          clean = True
+          break
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError,
+            ConnectionError, IndexError):
+      pass
+    finally:
+      self._close(s, clean)
+
+  def _connect(self, s, body):
+    """ Handle CONNECT; returns False if the connection is refused
+    """
+    if body[0:6] != b"\x00\x04MQTT" or body[6] != 4:
+      # Unacceptable protocol version
+      s.writer.write(b"\x20\x02\x00\x01")
+      return False
+    flags = body[7]
+    s.keepalive = int.from_bytes(body[8:10], "big")
+    i = 10
+    n = int.from_bytes(body[i:i+2], "big")
+    s.clientID = bytes(body[i+2:i+2+n])
+    i += 2 +n
+    if flags & 0x04:
+      n = int.from_bytes(body[i:i+2], "big")
+      wt = bytes(body[i+2:i+2+n])
+      i += 2 +n
+      n = int.from_bytes(body[i:i+2], "big")
+      s.will = (wt, bytes(body[i+2:i+2+n]), bool(flags & 0x20))
+    old = self._sessions.get(s.clientID)
+    if old:
+      # Client ID taken over by a new connection
+      old.writer.close()
+    self._sessions[s.clientID] = s
+    self.nConnections += 1
+    s.writer.write(b"\x20\x02\x00\x00")
+    return True
+
+  def _publish(self, s, op, body):
+    qos = (op >> 1) & 0x03
+    n = int.from_bytes(body[0:2], "big")
+    topic = bytes(body[2:2+n])
+    i = 2 +n
+    if qos:
+      pid = body[i:i+2]
+      i += 2
+      if qos == 1:
+        s.writer.write(bytes([_PUBACK, 2]) +pid)
+      else:
+        s.writer.write(bytes([_PUBREC, 2]) +pid)
+        if pid in s.qos2:
+          # Duplicate of a message not yet released
+          return
+        s.qos2.add(pid)
+    self._forward(s.clientID, topic, bytes(body[i:]), op & 0x01)
+
+  def _forward(self, clientID, topic, payload, retain):
+    self.nPublished += 1
+    if retain:
+      if payload:
+        self._retained[topic] = payload
+      else:
+        self._retained.pop(topic, None)
+    if self.on_publish:
+      self.on_publish(clientID, topic, payload)
+    self._dispatcher.dispatch(topic, payload)
+
+  def _subscribe(self, s, body):
+    pid = body[0:2]
+    i = 2
+    codes = bytearray()
+    new = []
+    while i < len(body):
+      n = int.from_bytes(body[i:i+2], "big")
+      filt = bytes(body[i+2:i+2+n])
+      i += 2 +n +1
+      if filt not in s.filters:
+        self._dispatcher.add(filt, s.deliver)
+        s.filters.append(filt)
+        new.append(filt)
+      codes.append(0)
+    s.writer.write(bytes([0x90]) +_encode_len(2 +len(codes)) +pid +codes)
+    if new and self._retained:
+      # Send the retained messages matching the new filters
+      disp = TopicDispatcher()
+      for filt in new:
+        disp.add(filt, lambda t, p: s.deliver(t, p, True))
+      for topic, payload in self._retained.items():
+        disp.dispatch(topic, payload)
+
+  def _unsubscribe(self, s, body):
+    pid = body[0:2]
+    i = 2
+    while i < len(body):
+      n = int.from_bytes(body[i:i+2], "big")
+      filt = bytes(body[i+2:i+2+n])
+      i += 2 +n
+      if filt in s.filters:
+        self._dispatcher.remove(filt, s.deliver)
+        s.filters.remove(filt)
+    s.writer.write(bytes([0xB0, 2]) +pid)
+
+  def _close(self, s, clean):
+    for filt in s.filters:
+      self._dispatcher.remove(filt, s.deliver)
+    s.filters = []
+    if self._sessions.get(s.clientID) is s:
+      del self._sessions[s.clientID]
+    if s.will and not clean:
+      self._forward(s.clientID, *s.will)
+    s.writer.close()
+
+# ----------------------------------------------------------------------------
+if __name__ == "__main__":
+  import argparse
+  parser = argparse.ArgumentParser(description="MQTT broker for tests")
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=1883)
+  args = parser.parse_args()
+  try:
+    asyncio.run(Broker(args.host, args.port).run())
+  except KeyboardInterrupt:
+    pass
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,280 @@
+# ----------------------------------------------------------------------------
+# mqtt_loadgen.py
+# Load generator for MQTT telemetry: simulates many robots on the host
+# (Windows/Linux only)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# Runs `n` simulated robots through the library's client code, i.e.
+# `Telemetry` (with `MQTTClientNB`) or `simple.MQTTClient`, using the
+# stand-ins for MicroPython modules in `platform/cpython`, against the test
+# broker (`mqtt_broker.py`), which runs in a background thread. Each robot
+# publishes a small dictionary with a timestamp at `rate` Hz; the broker
+# records when it arrives. Reported are the publish throughput, the latency
+# percentiles (from publishing to arrival at the broker, i.e. including the
+# time spent in the client's queue), dropped messages and the memory per
+# connection (allocated on the host, measured with `tracemalloc`).
+#
+#   python mqtt_loadgen.py -n 30 --rate 20 --duration 10 --client nb
+# ----------------------------------------------------------------------------
+import os
+import sys
+import time
+import types
+import asyncio
+import threading
+import tracemalloc
+
+_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(_dir), "platform", "cpython"))
+try:
+  import robotling_lib
+except ModuleNotFoundError:
+  sys.path.insert(0, os.path.dirname(os.path.dirname(_dir)))
+from robotling_lib.remote.mqtt_broker import Broker
+from robotling_lib.remote.mqtt_telemetry import Telemetry
+from robotling_lib.remote.simple import MQTTClient
+import ujson
+
+__version__   = "0.1.0.0"
+
+_PERCENTILES  = (50, 90, 99)
+
+# Allocations of the broker (which runs in the same process) are not counted
+_MEM_FILTERS  = (tracemalloc.Filter(False, "*asyncio*"),
+                 tracemalloc.Filter(False, "*selectors.py"),
+                 tracemalloc.Filter(False, "*mqtt_broker.py"))
+
+# ----------------------------------------------------------------------------
+def _use_broker(port):
+  """ Define the broker for `Telemetry` (which reads it from `NETWORK.py`)
+  """
+  net = types.ModuleType("NETWORK")
+  net.my_mqtt_srv = "127.0.0.1"
+  net.my_mqtt_port = port
+  net.my_mqtt_usr = ""
+  net.my_mqtt_pwd = ""
+  net.my_mqtt_encrypt_key = None
+  net.my_mqtt_encrypt_CBC = None
+  sys.modules["NETWORK"] = net
+
+def _percentile(vals, p):
+  if not vals:
+    return float("nan")
+  return vals[min(len(vals) -1, int(len(vals) *p /100))]
+
+# ----------------------------------------------------------------------------
+class BrokerThread(object):
+  """Runs the test broker in a background thread; records the latency of
+     each message carrying a timestamp `t` (in [us], `time.monotonic()`)."""
+
+  def __init__(self, port):
+    self.broker = Broker(port=port, on_publish=self._on_publish)
+    self.latency_ms = []
+    self.nRx = 0
+    self.nBytes = 0
+    self._loop = asyncio.new_event_loop()
+    self._ready = threading.Event()
+    threading.Thread(target=self._run, daemon=True).start()
+    self._ready.wait(5)
+
+  def _run(self):
+    asyncio.set_event_loop(self._loop)
+    self._loop.run_until_complete(self.broker.start())
+    self._ready.set()
+    self._loop.run_forever()
+
+  def _on_publish(self, clientID, topic, payload):
+    self.nRx += 1
+    self.nBytes += len(topic) +len(payload)
+    if payload[:1] == b"{":
+      try:
+        t = ujson.loads(payload).get("t")
+      except ValueError:
+        return
+      if t is not None:
+        self.latency_ms.append((time.monotonic() *1e6 -t) /1000)
+
+  def reset(self):
+    self.latency_ms = []
+    self.nRx = 0
+    self.nBytes = 0
+
+  def stop(self):
+    fut = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+    fut.result(5)
+    self._loop.call_soon_threadsafe(self._loop.stop)
+
+  async def _shutdown(self):
+    # Closing the connections ends the tasks serving them
+    self.broker.close()
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    if tasks:
+      await asyncio.wait(tasks, timeout=2)
+
+# ----------------------------------------------------------------------------
+class NBRobot(object):
+  """Simulated robot using `Telemetry` with the non-blocking client."""
+
+  def __init__(self, ID, queue_size):
+    self.tele = Telemetry(ID, queue_size=queue_size)
+
+  def connect(self):
+    self.tele.connect()
+
+  def publish(self, d):
+    self.tele.publishDict("state", d)
+
+  def spin(self):
+    self.tele.spin()
+
+  @property
+  def connected(self):
+    return self.tele.connected
+
+  @property
+  def dropped(self):
+    return self.tele.dropped
+
+  def disconnect(self):
+    self.tele.disconnect()
+
+class SimpleRobot(object):
+  """Simulated robot using the blocking `simple.MQTTClient`."""
+
+  def __init__(self, ID, port, qos=0):
+    self.client = MQTTClient(ID.encode(), "127.0.0.1", port=port)
+    self.topic = (ID +"/state").encode()
+    self.qos = qos
+    self.dropped = 0
+    self.connected = False
+
+  def connect(self):
+    self.connected = self.client.connect() == 0
+
+  def publish(self, d):
+    try:
+      self.client.publish(self.topic, ujson.dumps(d), qos=self.qos)
+    except OSError:
+      self.dropped += 1
+
+  def spin(self):
+    if self.qos:
+      self.client.check_msg()
+
+  def disconnect(self):
+    self.client.disconnect()
+
+# ----------------------------------------------------------------------------
+def run(n=30, rate=10, duration=10, client="nb", port=18883, qos=0,
+        queue_size=2048, size=0, quiet=True):
+  """ Run `n` robots, each publishing at `rate` Hz for `duration` s, and
+      return the results as dictionary
+  """
+  _use_broker(port)
+  bt = BrokerThread(port)
+  stdout = sys.stdout
+  if quiet:
+    # `Telemetry` reports each connection
+    sys.stdout = open(os.devnull, "w")
+  try:
+    # Create and connect robots, tracking the memory they allocate
+    tracemalloc.start()
+    snap0 = tracemalloc.take_snapshot().filter_traces(_MEM_FILTERS)
+    robots = []
+    for i in range(n):
+      ID = "robot{0:02d}".format(i)
+      if client == "nb":
+        robots.append(NBRobot(ID, queue_size))
+      else:
+        robots.append(SimpleRobot(ID, port, qos))
+      robots[-1].connect()
+    t0 = time.monotonic()
+    while time.monotonic() -t0 < 5:
+      for r in robots:
+        r.spin()
+      if all(r.connected for r in robots):
+        break
+      time.sleep(0.001)
+    snap1 = tracemalloc.take_snapshot().filter_traces(_MEM_FILTERS)
+    tracemalloc.stop()
+    mem = sum(s.size_diff for s in snap1.compare_to(snap0, "filename"))
+    mem /= max(n, 1)
+    nConnected = sum(1 for r in robots if r.connected)
+
+    # Publish at the given rate; robots share the main loop
+    bt.reset()
+    pad = "x" *size
+    dt = 1 /rate
+    tNext = [time.monotonic() +dt *i /n for i in range(n)]
+    nPub = 0
+    tSpin = []
+    t0 = time.monotonic()
+    while time.monotonic() -t0 < duration:
+      for i, r in enumerate(robots):
+        t = time.monotonic()
+        if t >= tNext[i]:
+          tNext[i] += dt
+          d = {"t": int(t *1e6), "seq": nPub, "v": 7400, "hpr": [0.1, 2.3, 45.6]}
+          if size:
+            d["pad"] = pad
+          r.publish(d)
+          nPub += 1
+        r.spin()
+        tSpin.append(time.monotonic() -t)
+      time.sleep(0.0005)
+    tPub = time.monotonic() -t0
+    # Let the queues drain
+    t1 = time.monotonic()
+    while bt.nRx < nPub and time.monotonic() -t1 < 2:
+      for r in robots:
+        r.spin()
+      time.sleep(0.001)
+    for r in robots:
+      r.disconnect()
+  finally:
+    if quiet:
+      sys.stdout.close()
+      sys.stdout = stdout
+    bt.stop()
+
+  lat = sorted(bt.latency_ms)
+  tSpin.sort()
+  res = {"client": client, "robots": n, "connected": nConnected,
+         "rate_Hz": rate, "published": nPub, "received": len(lat),
+         "dropped": sum(r.dropped for r in robots),
+         "offered_msg_s": nPub /tPub, "received_msg_s": len(lat) /tPub,
+         "received_kB_s": bt.nBytes /tPub /1000,
+         "latency_max_ms": lat[-1] if lat else float("nan"),
+         "spin_p99_ms": _percentile(tSpin, 99) *1000,
+         "mem_per_conn_B": int(mem)}
+  for p in _PERCENTILES:
+    res["latency_p{0}_ms".format(p)] = _percentile(lat, p)
+  return res
+
+def report(res):
+  for k, v in res.items():
+    print("{0:>16} : {1}".format(k, round(v, 2) if isinstance(v, float) else v))
+
+# ----------------------------------------------------------------------------
+if __name__ == "__main__":
+  import argparse
+  parser = argparse.ArgumentParser(description="MQTT telemetry load generator")
+  parser.add_argument("-n", "--robots", type=int, default=30)
+  parser.add_argument("-r", "--rate", type=float, default=10,
+                      help="messages per second and robot")
+  parser.add_argument("-d", "--duration", type=float, default=10)
+  parser.add_argument("-c", "--client", choices=("nb", "simple"), default="nb")
+  parser.add_argument("-p", "--port", type=int, default=18883)
+  parser.add_argument("--qos", type=int, default=0, help="(simple client)")
+  parser.add_argument("--queue", type=int, default=2048,
+                      help="queue size in bytes (non-blocking client)")
+  parser.add_argument("--size", type=int, default=0,
+                      help="additional payload bytes")
+  args = parser.parse_args()
+  report(run(args.robots, args.rate, args.duration, args.client, args.port,
+             args.qos, args.queue, args.size))
+
+# ----------------------------------------------------------------------------
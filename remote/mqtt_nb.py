@@ -0,0 +1,684 @@
+# ----------------------------------------------------------------------------
+# mqtt_nb.py
+# Non-blocking MQTT 3.1.1 client with a bounded outbound queue
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# 2026-10-19, v1.1, `queue_free`
+# 2026-10-19, v1.2, QoS 1 and 2 with a window of messages in flight
+# 2026-10-19, v1.3, Urgent messages jump the queue
+#
+# Unlike `simple.MQTTClient` and `robust.MQTTClient`, no method waits for the
+# network: `publish()` and `subscribe()` only queue packets, and `spin()`,
+# which needs to be called frequently, advances a state machine that
+# connects (with exponential backoff after failures), writes as much of the
+# queue as the socket accepts, reads incoming packets and keeps the
+# connection alive. Only resolving the broker's name (once) and the TLS
+# handshake (if `ssl` is True) block.
+#
+# QoS 1 and 2 messages are kept in one of `max_inflight` preallocated slots
+# of `slot_bytes` bytes until acknowledged and are resent (with DUP flag)
+# after reconnecting; if all slots are in use, `publish()` returns False.
+# ----------------------------------------------------------------------------
+import usocket as socket
+import uselect as select
+import errno
+import array
+from micropython import const
+from utime import ticks_ms, ticks_diff, ticks_add
+from robotling_lib.misc.ring_buffer import RingBuffer
+
+__version__ = "0.1.3.1"
+
+# Policies when the outbound queue is full
+DROP_OLDEST     = const(0)
+DROP_NEWEST     = const(1)
+
+# Connection states
+ST_IDLE         = const(0)    # not started or disconnected by the user
+ST_BACKOFF      = const(1)    # waiting before the next connection attempt
+ST_CONNECTING   = const(2)    # TCP connection being established
+ST_CONNACK      = const(3)    # CONNECT sent, waiting for CONNACK
+ST_CONNECTED    = const(4)
+
+_BACKOFF_MIN_MS = const(500)
+_BACKOFF_MAX_MS = const(30000)
+_CONNECT_TOUT_MS= const(5000)
+_MAX_WRITE      = const(512)  # Maximal number of bytes written per `spin()`
+_CTRL_QSIZE     = const(256)
+_PRIO_QSIZE     = const(256)
+_N_RCVD_PIDS    = const(8)    # Incoming QoS 2 packet IDs remembered
+
+_IN_PROGRESS    = (errno.EINPROGRESS, 119)
+_AGAIN          = (errno.EAGAIN, errno.ETIMEDOUT)  # no data/room (yet)
+
+def _b(s):
+  return s.encode() if isinstance(s, str) else s
+
+# ----------------------------------------------------------------------------
+class MQTTClientNB(object):
+  """Non-blocking MQTT client; outbound packets are queued in a ring buffer
+     of `queue_size` bytes. If the queue is full, either the oldest queued
+     messages or the new message are dropped (`policy`). Up to
+     `max_inflight` QoS 1/2 messages can await acknowledgement."""
+
+  def __init__(self, client_id, server, port=0, user=None, password=None,
+               keepalive=60, ssl=False, ssl_params={}, queue_size=2048,
+               policy=DROP_OLDEST, rx_size=512, max_inflight=4,
+               slot_bytes=256, clean_session=True):
+    if port == 0:
+      port = 8883 if ssl else 1883
+    self.client_id = _b(client_id)
+    self.server = server
+    self.port = port
+    self.user = _b(user)
+    self.pswd = _b(password)
+    self.keepalive = keepalive
+    self.ssl = ssl
+    self.ssl_params = ssl_params
+    self.policy = policy
+    self.clean_session = clean_session
+    self.cb = None
+    self.lw_topic = None
+    self.lw_msg = None
+    self.lw_qos = 0
+    self.lw_retain = False
+    self.pid = 0
+    self._addr = None
+    self._sock = None
+    self._poller = None
+    self._subs = []
+
+    # Outbound: data, urgent data and (prioritized) control packets, each
+    # stored as [length, uint16][packet], and the packet currently being
+    # written
+    self._dataQ = RingBuffer(queue_size)
+    self._prioQ = RingBuffer(_PRIO_QSIZE)
+    self._ctrlQ = RingBuffer(_CTRL_QSIZE)
+    self._txBuf = bytearray(max(queue_size, _CTRL_QSIZE, _PRIO_QSIZE,
+                                slot_bytes))
+    self._txMv = memoryview(self._txBuf)
+    self._txLen = 0
+    self._txPos = 0
+    self._txIsData = False
+    self._hdr = bytearray(8)
+
+    # QoS 1/2 messages in flight: packet, its length and ID, the state
+    # (0=free, 0x40/0x50/0x70 awaiting PUBACK/PUBREC/PUBCOMP) and whether
+    # the packet needs to be (re)sent
+    n = max(1, max_inflight)
+    self._slots = [bytearray(slot_bytes) for _ in range(n)]
+    self._slotLen = array.array("H", [0]*n)
+    self._slotPid = array.array("H", [0]*n)
+    self._slotSt = bytearray(n)
+    self._slotTx = bytearray(n)
+    self._rcvdPids = array.array("H", [0]*_N_RCVD_PIDS)
+    self._iRcvd = 0
+
+    # Inbound
+    self._rxQ = RingBuffer(rx_size)
+    self._pkt = bytearray(rx_size)
+    self._pktMv = memoryview(self._pkt)
+    self._eof = False
+    self._nSkip = 0
+
+    self._state = ST_IDLE
+    self._tState = 0
+    self._tTx = 0
+    self._tRx = 0
+    self._backoff = _BACKOFF_MIN_MS
+    self._pingOut = False
+    self.nDropped = 0
+    self.nOversized = 0
+    self.nReconnects = 0
+
+  def set_callback(self, f):
+    """ Define function `f(topic, msg)` that is called for incoming
+        messages on subscribed topics
+    """
+    self.cb = f
+
+  def set_last_will(self, topic, msg, retain=False, qos=0):
+    assert 0 <= qos <= 2
+    assert topic
+    self.lw_topic = _b(topic)
+    self.lw_msg = _b(msg)
+    self.lw_qos = qos
+    self.lw_retain = retain
+
+  @property
+  def state(self):
+    return self._state
+
+  @property
+  def is_connected(self):
+    return self._state == ST_CONNECTED
+
+  @property
+  def queued(self):
+    """ Number of bytes waiting in the outbound queue
+    """
+    return len(self._dataQ)
+
+  @property
+  def queue_free(self):
+    """ Number of bytes free in the outbound queue
+    """
+    return self._dataQ.free
+
+  @property
+  def inflight(self):
+    """ Number of QoS 1/2 messages not yet acknowledged
+    """
+    n = 0
+    for st in self._slotSt:
+      if st:
+        n += 1
+    return n
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def connect(self):
+    """ Start connecting to the broker (w/o waiting for the connection);
+        from now on, `spin()` keeps the client connected
+    """
+    if self._state == ST_IDLE:
+      self._state = ST_BACKOFF
+      self._tState = ticks_ms()
+      self._backoff = _BACKOFF_MIN_MS
+
+  def disconnect(self):
+    """ Disconnect from the broker (best effort, w/o waiting) and stop
+        reconnecting
+    """
+    if self._state == ST_CONNECTED:
+      try:
+        self._sock.write(b"\xe0\0")
+      except OSError:
+        pass
+    self._close()
+    self._state = ST_IDLE
+
+  def publish(self, topic, msg, retain=False, qos=0, urgent=False):
+    """ Queue a message; returns False if it was dropped or, for QoS 1/2,
+        if no slot is free (i.e. too many messages are in flight). Urgent
+        messages (e.g. alarms) are sent before the queued ones
+    """
+    topic = _b(topic)
+    msg = _b(msg)
+    if qos > 0:
+      return self._publish_qos(topic, msg, retain, qos)
+    sz = 2 +len(topic) +len(msg)
+    q = self._prioQ if urgent else self._dataQ
+    nh = self._put_header(q, 0x30 | retain, sz, True)
+    if nh == 0:
+      return False
+    self._hdr[0] = len(topic) >> 8
+    self._hdr[1] = len(topic) & 0xFF
+    q.put(memoryview(self._hdr)[0:2])
+    q.put(topic)
+    q.put(msg)
+    return True
+
+  def _publish_qos(self, topic, msg, retain, qos):
+    """ Put a QoS 1/2 message into a free slot, from which it is sent
+    """
+    for i in range(len(self._slots)):
+      if not self._slotSt[i]:
+        break
+    else:
+      return False
+    buf = self._slots[i]
+    nt = len(topic)
+    nm = len(msg)
+    sz = 2 +nt +2 +nm
+    buf[0] = 0x30 | qos << 1 | retain
+    j = 1
+    while sz > 0x7F:
+      buf[j] = (sz & 0x7F) | 0x80
+      sz >>= 7
+      j += 1
+    buf[j] = sz
+    j += 1
+    if j +2 +nt +2 +nm > len(buf):
+      self.nDropped += 1
+      return False
+    pid = self._next_pid()
+    buf[j] = nt >> 8
+    buf[j+1] = nt & 0xFF
+    j += 2
+    mv = memoryview(buf)
+    mv[j:j +nt] = topic
+    j += nt
+    buf[j] = pid >> 8
+    buf[j+1] = pid & 0xFF
+    j += 2
+    mv[j:j +nm] = msg
+    self._slotLen[i] = j +nm
+    self._slotPid[i] = pid
+    self._slotSt[i] = 0x40 if qos == 1 else 0x50
+    self._slotTx[i] = 1
+    return True
+
+  def subscribe(self, topic, qos=0):
+    """ Subscribe to `topic`; subscriptions are renewed after reconnecting
+    """
+    assert self.cb is not None, "Subscribe callback is not set"
+    topic = _b(topic)
+    self._subs.append((topic, qos))
+    if self._state == ST_CONNECTED:
+      self._queue_subscribe(topic, qos)
+
+  def ping(self):
+    self._queue_ctrl(0xC0)
+
+  def check_msg(self):
+    """ For compatibility with `simple.MQTTClient`
+    """
+    self.spin()
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def spin(self):
+    """ Advance the connection state machine, write queued packets and
+        process incoming packets; never waits for the network
+    """
+    st = self._state
+    if st == ST_IDLE:
+      return
+    t = ticks_ms()
+    try:
+      if st == ST_BACKOFF:
+        if ticks_diff(t, self._tState) >= 0:
+          self._open(t)
+      elif st == ST_CONNECTING:
+        self._check_connected(t)
+      else:
+        if st == ST_CONNACK and ticks_diff(t, self._tState) > _CONNECT_TOUT_MS:
+          raise OSError(errno.ETIMEDOUT)
+        self._read(t)
+        self._keep_alive(t)
+        self._write(t)
+    except OSError:
+      self._fail(t)
+
+  def _open(self, t):
+    """ Start a non-blocking TCP connection
+    """
+    if self._addr is None:
+      self._addr = socket.getaddrinfo(self.server, self.port)[0][-1]
+    self._sock = socket.socket()
+    self._sock.setblocking(False)
+    try:
+      self._sock.connect(self._addr)
+    except OSError as e:
+      if e.args[0] not in _IN_PROGRESS:
+        raise
+    self._poller = select.poll()
+    self._poller.register(self._sock, select.POLLOUT)
+    self._state = ST_CONNECTING
+    self._tState = t
+
+  def _check_connected(self, t):
+    """ Check if the TCP connection is established and, if so, send CONNECT
+    """
+    res = self._poller.poll(0)
+    if res:
+      ev = res[0][1]
+      if ev & (select.POLLERR | select.POLLHUP):
+        raise OSError(errno.ECONNREFUSED)
+      if ev & select.POLLOUT:
+        if self.ssl:
+          import ussl
+          self._sock.setblocking(True)
+          self._sock = ussl.wrap_socket(self._sock, **self.ssl_params)
+          self._sock.setblocking(False)
+        self._ctrlQ.clear()
+        self._queue_connect()
+        self._state = ST_CONNACK
+        self._tState = t
+        self._tRx = t
+        self._pingOut = False
+        self._eof = False
+        return
+    if ticks_diff(t, self._tState) > _CONNECT_TOUT_MS:
+      raise OSError(errno.ETIMEDOUT)
+
+  def _fail(self, t):
+    """ Close the connection and schedule the next attempt
+    """
+    self._close()
+    self._state = ST_BACKOFF
+    self._tState = ticks_add(t, self._backoff)
+    self._backoff = min(self._backoff *2, _BACKOFF_MAX_MS)
+    self.nReconnects += 1
+
+  def _close(self):
+    if self._sock:
+      try:
+        self._sock.close()
+      except OSError:
+        pass
+    self._sock = None
+    self._poller = None
+    if self._txPos < self._txLen and self._txIsData:
+      # A partially sent message is lost
+      self.nDropped += 1
+    self._txLen = self._txPos = 0
+    self._ctrlQ.clear()
+    self._rxQ.clear()
+    self._nSkip = 0
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def _write(self, t):
+    """ Write the current packet and, if done, the next ones, up to
+        `_MAX_WRITE` bytes
+    """
+    nTot = 0
+    while nTot < _MAX_WRITE:
+      if self._txPos >= self._txLen and not self._next_packet():
+        break
+      try:
+        n = self._sock.write(self._txMv[self._txPos:self._txLen])
+      except OSError as e:
+        if e.args[0] not in _AGAIN:
+          raise
+        n = 0
+      if not n:
+        break
+      self._txPos += n
+      self._tTx = t
+      nTot += n
+
+  def _next_packet(self):
+    """ Move the next packet from the queues into the transmit buffer;
+        control packets first, then urgent, QoS 1/2 and other messages. The
+        latter are only sent when connected
+    """
+    q = self._ctrlQ
+    if len(q) == 0:
+      if self._state != ST_CONNECTED:
+        return False
+      q = self._prioQ
+    if len(q) == 0:
+      for i in range(len(self._slots)):
+        if self._slotTx[i]:
+          n = self._slotLen[i]
+          buf = self._slots[i]
+          self._txMv[0:n] = memoryview(buf)[0:n]
+          # Any further transmission is a duplicate
+          buf[0] |= 0x08
+          self._slotTx[i] = 0
+          self._txLen = n
+          self._txPos = 0
+          self._txIsData = False
+          return True
+      q = self._dataQ
+      if len(q) == 0:
+        return False
+    n = q.peek(0) | (q.peek(1) << 8)
+    q.skip(2)
+    q.copy_to(self._txMv, n)
+    q.skip(n)
+    self._txLen = n
+    self._txPos = 0
+    self._txIsData = q is not self._ctrlQ
+    return True
+
+  def _put_header(self, q, b0, sz, isData=False):
+    """ Make room for and write the length prefix and fixed header of a
+        packet with `sz` bytes following the fixed header; returns the
+        number of header bytes, or 0 if the packet was dropped
+    """
+    hdr = self._hdr
+    n = sz
+    hdr[2] = b0
+    i = 3
+    while sz > 0x7F:
+      hdr[i] = (sz & 0x7F) | 0x80
+      sz >>= 7
+      i += 1
+    hdr[i] = sz
+    nh = i -1
+    n += nh
+    if n +2 > q.capacity:
+      self.nDropped += 1
+      return 0
+    while q.free < n +2:
+      if not isData or self.policy == DROP_NEWEST:
+        self.nDropped += 1
+        return 0
+      # Drop oldest message
+      q.skip(2 +(q.peek(0) | (q.peek(1) << 8)))
+      self.nDropped += 1
+    hdr[0] = n & 0xFF
+    hdr[1] = n >> 8
+    q.put(memoryview(hdr)[0:nh +2])
+    return nh
+
+  def _put_str(self, q, s):
+    self._hdr[0] = len(s) >> 8
+    self._hdr[1] = len(s) & 0xFF
+    q.put(memoryview(self._hdr)[0:2])
+    q.put(s)
+
+  def _queue_ctrl(self, b0):
+    """ Queue a control packet w/o payload (e.g. PINGREQ)
+    """
+    self._put_header(self._ctrlQ, b0, 0)
+
+  def _queue_ack(self, b0, pid):
+    """ Queue a PUBACK, PUBREC, PUBREL or PUBCOMP for packet ID `pid`
+    """
+    if self._put_header(self._ctrlQ, b0, 2):
+      self._hdr[0] = pid >> 8
+      self._hdr[1] = pid & 0xFF
+      self._ctrlQ.put(memoryview(self._hdr)[0:2])
+
+  def _next_pid(self):
+    """ Returns the next packet ID not used by a message in flight
+    """
+    while True:
+      self.pid = (self.pid % 0xFFFF) +1
+      if self.pid not in self._slotPid:
+        return self.pid
+
+  def _find_slot(self, pid, st):
+    for i in range(len(self._slots)):
+      if self._slotSt[i] == st and self._slotPid[i] == pid:
+        return i
+    return -1
+
+  def _free_slot(self, i):
+    self._slotSt[i] = 0
+    self._slotPid[i] = 0
+    self._slotTx[i] = 0
+
+  def _queue_connect(self):
+    q = self._ctrlQ
+    sz = 10 +2 +len(self.client_id)
+    flags = 0x02 if self.clean_session else 0
+    if self.lw_topic:
+      sz += 2 +len(self.lw_topic) +2 +len(self.lw_msg)
+      flags |= 0x04 | (self.lw_qos & 0x3) << 3 | self.lw_retain << 5
+    if self.user is not None:
+      sz += 2 +len(self.user) +2 +len(self.pswd)
+      flags |= 0xC0
+    if self._put_header(q, 0x10, sz) == 0:
+      raise OSError(errno.ENOMEM)
+    q.put(b"\0\x04MQTT\x04")
+    hdr = self._hdr
+    hdr[0] = flags
+    hdr[1] = self.keepalive >> 8
+    hdr[2] = self.keepalive & 0xFF
+    q.put(memoryview(hdr)[0:3])
+    self._put_str(q, self.client_id)
+    if self.lw_topic:
+      self._put_str(q, self.lw_topic)
+      self._put_str(q, self.lw_msg)
+    if self.user is not None:
+      self._put_str(q, self.user)
+      self._put_str(q, self.pswd)
+
+  def _queue_subscribe(self, topic, qos):
+    q = self._ctrlQ
+    if self._put_header(q, 0x82, 2 +2 +len(topic) +1) == 0:
+      return
+    pid = self._next_pid()
+    self._hdr[0] = pid >> 8
+    self._hdr[1] = pid & 0xFF
+    q.put(memoryview(self._hdr)[0:2])
+    self._put_str(q, topic)
+    self._hdr[0] = qos
+    q.put(memoryview(self._hdr)[0:1])
+
+  def _keep_alive(self, t):
+    """ Send PINGREQ if nothing was sent or received for half the keepalive
+        period and detect a dead connection
+    """
+    if not self.keepalive or self._state != ST_CONNECTED:
+      return
+    ka = self.keepalive *500
+    if ticks_diff(t, self._tRx) > 3 *ka:
+      raise OSError(errno.ETIMEDOUT)
+    if not self._pingOut and (ticks_diff(t, self._tTx) > ka or
+                              ticks_diff(t, self._tRx) > ka):
+      # A client that only publishes (QoS 0) receives nothing, therefore
+      # also ping if nothing was received
+      self._queue_ctrl(0xC0)
+      self._pingOut = True
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def _readinto(self, buf):
+    try:
+      n = self._sock.readinto(buf)
+    except OSError as e:
+      if e.args[0] not in _AGAIN:
+        raise
+      return None
+    if n == 0:
+      self._eof = True
+    return n
+
+  def _read(self, t):
+    """ Read available bytes and process complete packets
+    """
+    q = self._rxQ
+    if q.put_from(self._readinto):
+      self._tRx = t
+    if self._eof:
+      raise OSError(errno.ECONNRESET)
+    while len(q) >= 2 or self._nSkip:
+      if self._nSkip:
+        # Discard the rest of a packet too large for the receive buffer
+        k = min(self._nSkip, len(q))
+        q.skip(k)
+        self._nSkip -= k
+        if self._nSkip:
+          return
+        continue
+      # Decode fixed header
+      n = 0
+      sh = 0
+      i = 1
+      while True:
+        if i >= len(q):
+          return
+        b = q.peek(i)
+        n |= (b & 0x7F) << sh
+        i += 1
+        if not b & 0x80:
+          break
+        sh += 7
+      if i +n > q.capacity:
+        # Packet too large for the receive buffer; discard it (failing the
+        # connection would not help, e.g. a large retained message is sent
+        # again after subscribing)
+        self.nOversized += 1
+        self._ack_oversized(q, i)
+        self._nSkip = i +n
+        continue
+      if len(q) < i +n:
+        return
+      op = q.peek(0)
+      q.copy_to(self._pktMv, n, i)
+      q.skip(i +n)
+      self._handle(op, n)
+
+  def _ack_oversized(self, q, i):
+    """ Acknowledge a discarded QoS 1/2 message, if the packet ID is in
+        the receive buffer, such that the broker does not resend it
+    """
+    op = q.peek(0)
+    qos = (op >> 1) & 0x03
+    if op & 0xF0 != 0x30 or not qos or len(q) < i +2:
+      return
+    j = i +2 +((q.peek(i) << 8) | q.peek(i +1))
+    if len(q) < j +2:
+      return
+    pid = (q.peek(j) << 8) | q.peek(j +1)
+    self._queue_ack(0x40 if qos == 1 else 0x50, pid)
+
+  def _handle(self, op, n):
+    """ Handle an incoming packet with the first byte `op` and `n` bytes
+        following the fixed header (in `_pkt`)
+    """
+    pkt = self._pkt
+    typ = op & 0xF0
+    if typ == 0x20:
+      # CONNACK
+      if n < 2 or pkt[1] != 0:
+        raise OSError(errno.ECONNREFUSED)
+      self._state = ST_CONNECTED
+      self._backoff = _BACKOFF_MIN_MS
+      for topic, qos in self._subs:
+        self._queue_subscribe(topic, qos)
+      # Resend unacknowledged messages, or the PUBREL if PUBREC arrived
+      for i in range(len(self._slots)):
+        if self._slotSt[i] == 0x70:
+          self._queue_ack(0x62, self._slotPid[i])
+        elif self._slotSt[i]:
+          self._slotTx[i] = 1
+    elif typ == 0xD0:
+      # PINGRESP
+      self._pingOut = False
+    elif typ in (0x40, 0x50, 0x60, 0x70) and n >= 2:
+      pid = (pkt[0] << 8) | pkt[1]
+      if typ == 0x40 or typ == 0x70:
+        # PUBACK (QoS 1) or PUBCOMP (QoS 2): delivery complete
+        i = self._find_slot(pid, typ)
+        if i >= 0:
+          self._free_slot(i)
+      elif typ == 0x50:
+        # PUBREC: release the message
+        i = self._find_slot(pid, 0x50)
+        if i >= 0:
+          self._slotSt[i] = 0x70
+          self._slotTx[i] = 0
+        self._queue_ack(0x62, pid)
+      else:
+        # PUBREL for an incoming QoS 2 message
+        for i in range(_N_RCVD_PIDS):
+          if self._rcvdPids[i] == pid:
+            self._rcvdPids[i] = 0
+        self._queue_ack(0x70, pid)
+    elif typ == 0x30:
+      # PUBLISH
+      tl = (pkt[0] << 8) | pkt[1]
+      i = 2 +tl
+      qos = (op >> 1) & 0x03
+      if qos:
+        pid = (pkt[i] << 8) | pkt[i+1]
+        i += 2
+        if qos == 1:
+          self._queue_ack(0x40, pid)
+        else:
+          # Deliver a QoS 2 message only once, until released by PUBREL
+          self._queue_ack(0x50, pid)
+          if pid in self._rcvdPids:
+            return
+          self._rcvdPids[self._iRcvd] = pid
+          self._iRcvd = (self._iRcvd +1) %_N_RCVD_PIDS
+      if self.cb:
+        self.cb(bytes(self._pktMv[2:2+tl]), bytes(self._pktMv[i:n]))
+
+# ----------------------------------------------------------------------------
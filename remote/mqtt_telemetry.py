@@ -14,97 +14,271 @@
 #             connections to the broker are possible
 # 2021-04-23, Does not require anly longer that `umqtt` is included in the
 #             firmware
+# 2026-10-19, Switched to the non-blocking client (`mqtt_nb.py`); publishing
+#             only queues messages and `spin()` handles (re)connecting, such
+#             that a flaky network no longer stalls the robot's main loop
+# 2026-10-19, Cache of encoded topics
+# 2026-10-19, Optional compact binary encoding (see `telemetry_codec.py`)
+# 2026-10-19, Optional batching of messages (see `telemetry_batch.py`)
+# 2026-10-19, Optional store-and-forward while the broker is unreachable
+#             (see `store_forward.py`)
+# 2026-10-19, Per-topic policies: rate limit, decimation, deadband and
+#             priority (see `telemetry_policy.py`)
+# 2026-10-19, Subscriptions with separate handlers, incl. wildcards (see
+#             `topic_dispatch.py`)
+# 2026-10-19, Uses `my_mqtt_port`; removed unused import of `helpers`, such
+#             that the module also runs on the host (see `mqtt_loadgen.py`)
+# 2026-10-19, All messages, incl. `link/up`, the last will and the schemas,
+#             are encrypted (if `my_mqtt_encrypt_key` is defined) in one
+#             place, with PKCS#7 padding, an IV per message and w/o
+#             allocating memory (see `telemetry_crypt.py`);
+#             `my_mqtt_encrypt_CBC` is no longer used
+# 2026-10-19, `connect` defers connecting to the broker (instead of failing)
+#             if the network is not yet connected (see `wlan_connector.py`)
 #
 # ----------------------------------------------------------------------------
 import network
 import ujson
-import errno
-try:
-  from umqtt.robust import MQTTClient
-except ImportError:
-  from robotling_lib.remote.robust import MQTTClient
-from robotling_lib.misc.helpers import timed_function
+from micropython import const
+from robotling_lib.remote.mqtt_nb import MQTTClientNB, DROP_OLDEST
+from robotling_lib.remote.telemetry_codec import TelemetrySchema, SCHEMA_SUFFIX
+from robotling_lib.remote.telemetry_batch import Batcher, BATCH_TOPIC
+from robotling_lib.remote.store_forward import StoreForward
+from robotling_lib.remote.telemetry_policy import *
+from robotling_lib.remote.topic_dispatch import TopicDispatcher
 
-__version__ = "0.1.3.0"
+__version__ = "0.1.12.3"
+
+_MAX_TOPICS = const(32)   # Maximal number of cached topics
 
 # ----------------------------------------------------------------------------
 class Telemetry():
   """Telemetry via the MQTT protocoll."""
 
-  def __init__(self, ID, broker=""):
+  def __init__(self, ID, broker="", queue_size=2048, policy=DROP_OLDEST,
+               max_msg_len=512):
     self._isReady = False
+    self._queueSize = queue_size
+    self._policy = policy
     self._broker = broker
     self._clientID = ID
     self._client = None
+    self._deferred = False
     self._rootTopic = self._clientID +"/"
-    self._doEncrypt = False
+    self._topics = {}
+    self._schemas = {}
+    self._batcher = None
+    self._store = None
+    self._policies = {}
+    self._dispatcher = TopicDispatcher()
+    self._crypt = None
     try:
-      from NETWORK import my_mqtt_encrypt_key, my_mqtt_encrypt_CBC
+      from NETWORK import my_mqtt_encrypt_key
       if my_mqtt_encrypt_key is not None:
-        from ucryptolib import aes
-        self.AES = aes(my_mqtt_encrypt_key, 2, my_mqtt_encrypt_CBC)
-        self._doEncrypt = True
+        from robotling_lib.remote.telemetry_crypt import Encryptor
+        self._crypt = Encryptor(my_mqtt_encrypt_key, max_msg_len)
     except ImportError:
       pass
 
   def connect(self):
-    """ Try to connect to MQTT broker
+    """ Start connecting to the MQTT broker; the connection is established
+        (and re-established, if lost) by `spin()`, messages published in the
+        meantime are queued. If the network is not (yet) connected, e.g.
+        because `RobotlingBase.connectToWLAN()` did not wait for it,
+        connecting to the broker is deferred until it is
     """
     print("Initializing telemetry via MQTT ...")
     self.sta_if = network.WLAN(network.STA_IF)
-    if not self.sta_if.isconnected():
-      print("Error: Not connected to network")
+    from NETWORK import my_mqtt_usr, my_mqtt_pwd, my_mqtt_srv, my_mqtt_port
+    if len(self._broker) == 0:
+      self._broker = my_mqtt_srv
+    _sll = my_mqtt_port == 8883
+    self._client = MQTTClientNB(self._clientID, self._broker,
+                                port=my_mqtt_port, ssl=_sll,
+                                queue_size=self._queueSize,
+                                policy=self._policy)
+    lw = b'link/down'
+    if self._crypt:
+      lw = bytes(self._crypt.encrypt(lw))
+    self._client.set_last_will(self._rootTopic, lw)
+    self._client.set_callback(self._dispatcher.dispatch)
+    self._deferred = not self.sta_if.isconnected()
+    if self._deferred:
+      print("Network not yet connected, deferring connection to broker")
     else:
-      from NETWORK import my_mqtt_usr, my_mqtt_pwd, my_mqtt_srv, my_mqtt_port
-      if len(self._broker) == 0:
-        self._broker = my_mqtt_srv
-      _sll = my_mqtt_port == 8883
-      self._client = MQTTClient(self._clientID, self._broker, ssl=_sll)
-      self._client.set_last_will(self._rootTopic, b'link/down')
-      try:
-        if self._client.connect() == 0:
-          print("[{0:>12}] {1}".format("topic", self._rootTopic))
-          self._client.publish(self._rootTopic, b'link/up')
-          self._isReady = True
-      except:
-        print("Error: MQTT brocker {} not responding".format(self._broker))
-    print("... done." if self._isReady else "... FAILED")
+      self._client.connect()
+    print("[{0:>12}] {1}".format("topic", self._rootTopic))
+    self._out(self._topic(""), b'link/up')
+    self._isReady = True
+    for t, sch in self._schemas.items():
+      self._publish_schema(t, sch)
+    print("... done.")
     return self._isReady
 
   def subscribe(self, topic, callBack):
-    """ Subscribe to topic and define call back function
+    """ Subscribe to <standard topic>/<topic> and define the function
+        `callBack(topic, msg)` that handles messages for this topic; the
+        topic may contain the wildcards `+` and `#`
     """
-    self._client.set_callback(callBack)
-    t = self._rootTopic +topic
+    t = self._topic(topic)
+    self._dispatcher.add(t, callBack)
     self._client.subscribe(t)
-    print("Subscribed to `{0}`".format(t))
+    print("Subscribed to `{0}`".format(self._rootTopic +topic))
 
   def spin(self):
-    """ Needs to be called frequently to check for new messages
+    """ Needs to be called frequently to send queued messages, check for new
+        messages and keep the connection alive
+    """
+    if self._client:
+      if self._deferred and self.sta_if.isconnected():
+        self._deferred = False
+        self._client.connect()
+      if self._batcher and self._batcher.is_due():
+        self.flush()
+      st = self._store
+      if st and st.has_data and self._client.is_connected:
+        # Forward stored messages, leaving half of the queue for new ones
+        st.drain(self._client.publish,
+                 self._client.queue_free -self._queueSize //2)
+      self._client.spin()
+
+  def register_schema(self, t, fields):
+    """ Use the compact binary encoding for dictionaries published under
+        <standard topic>/<t>, with `fields` being a list of `(key, type)`
+        (see `telemetry_codec.py`); the schema is published as retained
+        message under <standard topic>/<t>/schema
+    """
+    sch = TelemetrySchema(len(self._schemas), fields)
+    self._schemas[t] = sch
+    if self._isReady:
+      self._publish_schema(t, sch)
+    return sch
+
+  def _publish_schema(self, t, sch):
+    self._out(self._topic(t +SCHEMA_SUFFIX), sch.to_json(), retain=True)
+
+  def set_policy(self, t, max_rate=0, decimate=1, deadband=0, relative=False,
+                 key=None, priority=PRIO_NORMAL):
+    """ Define when messages under <standard topic>/<t> are published (see
+        `telemetry_policy.py`); replaces an existing policy for <t>
     """
-    self._client.check_msg()
+    pol = TopicPolicy(max_rate, decimate, deadband, relative, key, priority)
+    self._policies[t] = pol
+    return pol
+
+  def _check_policy(self, t, m):
+    """ Returns the priority of message `m` under <t>, or -1 if the policy
+        for <t> skips it
+    """
+    pol = self._policies.get(t)
+    if pol is None:
+      return PRIO_NORMAL
+    if not pol.accept(m):
+      return -1
+    if (pol.priority == PRIO_LOW and
+        self._client.queue_free < self._queueSize //2):
+      pol.nSkipped += 1
+      return -1
+    return pol.priority
 
   def publishDict(self, t, d):
-    """ Publish a dictionary as a message under <standard topic>/<t>
+    """ Publish a dictionary as a message under <standard topic>/<t>; the
+        message is only queued (and dropped if the queue is full). If a
+        schema was registered for <t>, the values are sent packed
     """
     if self._isReady:
-      if not self._doEncrypt:
-        self._client.publish(self._rootTopic +t, ujson.dumps(d))
+      prio = self._check_policy(t, d)
+      if prio < 0:
+        return
+      sch = self._schemas.get(t)
+      b = sch.pack(d) if sch else ujson.dumps(d)
+      if self._batcher and prio != PRIO_HIGH:
+        self._add_to_batch(t, b)
       else:
-        s = ujson.dumps(d)
-        b = self.AES.encrypt(bytearray(s +" "*(16 -len(s) %16)))
-        self._client.publish(self._rootTopic +t, b)
+        self._out(self._topic(t), b, prio)
 
   def publish(self, t, m):
     """ Publish a message under <standard topic>/<t>
-        TODO: implement encryption here as well
     """
     if self._isReady:
-      try:
-        self._client.publish(self._rootTopic +t, m)
-      except OSError as error:
-        if error.args[0] != errno.ECONNRESET:
-          print("Error: publish caused {0}".format(error.args[0]))
+      prio = self._check_policy(t, m)
+      if prio < 0:
+        return
+      if self._batcher and prio != PRIO_HIGH:
+        self._add_to_batch(t, m)
+      else:
+        self._out(self._topic(t), m, prio)
+
+  def enable_batching(self, window_ms=100, max_bytes=512):
+    """ Collect published messages and send them as one message under
+        <standard topic>/batch after `window_ms` or when `max_bytes` are
+        reached (see `telemetry_batch.py`); `window_ms` = 0 disables
+        batching. If encryption is enabled, the whole batch is encrypted,
+        therefore `max_bytes` is limited to `max_msg_len`
+    """
+    if self._batcher:
+      self.flush()
+    if self._crypt:
+      max_bytes = min(max_bytes, self._crypt.max_len)
+    self._batcher = Batcher(window_ms, max_bytes) if window_ms > 0 else None
+
+  def flush(self):
+    """ Send the current batch, if any
+    """
+    bt = self._batcher
+    if bt and bt.count > 0:
+      self._out(self._topic(BATCH_TOPIC), bt.take())
+
+  def _add_to_batch(self, t, b):
+    if not self._batcher.add(t, b):
+      self.flush()
+      if not self._batcher.add(t, b):
+        # Too large for a batch, send as is
+        self._out(self._topic(t), b)
+
+  def enable_store_forward(self, ram_bytes=4096, spill_path=None,
+                           drain_Bps=2000):
+    """ Keep messages in a buffer of `ram_bytes` (and, if `spill_path` is
+        given, in segment files in flash) while the broker is unreachable
+        and forward them after reconnecting with at most `drain_Bps` bytes
+        per second, using at most half of the queue (see `store_forward.py`).
+        Only the backlog is rate-limited; once reconnected, new messages are
+        published right away, i.e. they may arrive before older, stored
+        ones. Receivers that need the order must sort by a timestamp or
+        sequence number in the messages
+    """
+    self._store = StoreForward(ram_bytes, spill_path, drain_Bps=drain_Bps)
+
+  def _out(self, tb, b, prio=PRIO_NORMAL, retain=False):
+    """ Publish `b` under the topic `tb` (bytes) or store it, if the broker
+        is unreachable; high-priority messages jump the queue and are never
+        stored, neither are retained messages (the store does not keep the
+        flag), which are queued by the client instead. If encryption is
+        enabled, this is where messages are encrypted
+    """
+    if self._crypt:
+      b = self._crypt.encrypt(b)
+      if b is None:
+        return
+    if prio == PRIO_HIGH:
+      self._client.publish(tb, b, urgent=True)
+      return
+    st = self._store
+    if st and not retain and not self._client.is_connected:
+      st.put(tb, b)
+    else:
+      self._client.publish(tb, b, retain)
+
+  def _topic(self, t):
+    """ Returns <standard topic>/<t> as bytes; the first `_MAX_TOPICS`
+        topics are cached
+    """
+    b = self._topics.get(t)
+    if b is None:
+      b = (self._rootTopic +t).encode()
+      if len(self._topics) < _MAX_TOPICS:
+        self._topics[t] = b
+    return b
 
   def disconnect(self):
     """ Disconnect from MQTT broker
@@ -115,6 +289,16 @@ class Telemetry():
 
   @property
   def connected(self):
-    return self._isReady
+    """ True if connected to the broker
+    """
+    return self._isReady and self._client.is_connected
+
+  @property
+  def dropped(self):
+    """ Number of messages dropped because the queue was full
+    """
+    n = self._client.nDropped if self._client else 0
+    n += self._crypt.nTooLong if self._crypt else 0
+    return n +(self._store.nDropped if self._store else 0)
 
 # ----------------------------------------------------------------------------
@@ -20,7 +20,9 @@ class MQTTClient(simple.MQTTClient):
         i = 0
         while 1:
             try:
-                return super().connect(False)
+                res = super().connect(False)
+                self.resend_inflight()
+                return res
             except OSError as e:
                 self.log(True, e)
                 i += 1
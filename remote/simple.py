@@ -8,7 +8,7 @@ class MQTTException(Exception):
 class MQTTClient:
 
     def __init__(self, client_id, server, port=0, user=None, password=None, keepalive=0,
-                 ssl=False, ssl_params={}):
+                 ssl=False, ssl_params={}, buf_size=256, max_inflight=8):
         if port == 0:
             port = 8883 if ssl else 1883
         self.client_id = client_id
@@ -26,11 +26,64 @@ class MQTTClient:
         self.lw_msg = None
         self.lw_qos = 0
         self.lw_retain = False
+        # Preallocated buffer to assemble packets, such that small packets
+        # are sent with a single write
+        self._buf = bytearray(max(buf_size, 16))
+        self._mv = memoryview(self._buf)
+        # QoS 1/2 messages not yet acknowledged, by packet ID, as
+        # [state, packet]; state is 0x40 (awaiting PUBACK), 0x50 (PUBREC) or
+        # 0x70 (PUBCOMP, the packet then being the PUBREL)
+        self.max_inflight = max(1, max_inflight)
+        self._inflight = {}
+        # IDs of incoming QoS 2 messages already delivered (until PUBREL)
+        self._rcvd = set()
 
     def _send_str(self, s):
-        self.sock.write(struct.pack("!H", len(s)))
+        struct.pack_into("!H", self._buf, 0, len(s))
+        self.sock.write(self._mv[0:2])
         self.sock.write(s)
 
+    def _next_pid(self):
+        while 1:
+            self.pid = self.pid % 0xffff + 1
+            if self.pid not in self._inflight:
+                return self.pid
+
+    def _send_ack(self, op, pid):
+        buf = self._buf
+        buf[0] = op
+        buf[1] = 2
+        struct.pack_into("!H", buf, 2, pid)
+        self.sock.write(self._mv[0:4])
+
+    def _handle_ack(self, op, pid):
+        # Process PUBACK, PUBREC, PUBREL or PUBCOMP for packet ID `pid`
+        if op == 0x40 or op == 0x70:
+            self._inflight.pop(pid, None)
+        elif op == 0x50:
+            if pid in self._inflight:
+                self._inflight[pid] = [0x70, b"\x62\x02" + struct.pack("!H", pid)]
+            self._send_ack(0x62, pid)
+        elif op == 0x60:
+            self._rcvd.discard(pid)
+            self._send_ack(0x70, pid)
+
+    @property
+    def inflight(self):
+        # Number of QoS 1/2 messages not yet acknowledged
+        return len(self._inflight)
+
+    def resend_inflight(self):
+        # Retransmit unacknowledged messages (with DUP flag) and pending
+        # PUBRELs, e.g. after reconnecting with `clean_session=False`
+        for pid in self._inflight:
+            state, pkt = self._inflight[pid]
+            if state == 0x70:
+                self.sock.write(pkt)
+            else:
+                pkt[0] |= 0x08
+                self.sock.write(pkt)
+
     def _recv_len(self):
         n = 0
         sh = 0
@@ -107,45 +160,58 @@ class MQTTClient:
         self.sock.write(b"\xc0\0")
 
     def publish(self, topic, msg, retain=False, qos=0):
-        pkt = bytearray(b"\x30\0\0\0")
-        pkt[0] |= qos << 1 | retain
-        sz = 2 + len(topic) + len(msg)
+        if isinstance(topic, str):
+            topic = topic.encode()
+        if isinstance(msg, str):
+            msg = msg.encode()
+        if qos > 0:
+            # Wait only if the in-flight window is full; acknowledgements
+            # are processed by `wait_msg()`/`check_msg()`
+            while len(self._inflight) >= self.max_inflight:
+                self.wait_msg()
+        buf = self._buf
+        mv = self._mv
+        nt = len(topic)
+        nm = len(msg)
+        sz = 2 + nt + nm
         if qos > 0:
             sz += 2
         assert sz < 2097152
+        assert nt + 9 <= len(buf), "Topic too long for packet buffer"
+        # Assemble fixed header, topic and packet ID (if any) in the buffer
+        buf[0] = 0x30 | qos << 1 | retain
         i = 1
         while sz > 0x7f:
-            pkt[i] = (sz & 0x7f) | 0x80
+            buf[i] = (sz & 0x7f) | 0x80
             sz >>= 7
             i += 1
-        pkt[i] = sz
-        #print(hex(len(pkt)), hexlify(pkt, ":"))
-        self.sock.write(pkt, i + 1)
-        self._send_str(topic)
+        buf[i] = sz
+        struct.pack_into("!H", buf, i + 1, nt)
+        i += 3
+        mv[i:i + nt] = topic
+        i += nt
         if qos > 0:
-            self.pid += 1
-            pid = self.pid
-            struct.pack_into("!H", pkt, 0, pid)
-            self.sock.write(pkt, 2)
-        self.sock.write(msg)
-        if qos == 1:
-            while 1:
-                op = self.wait_msg()
-                if op == 0x40:
-                    sz = self.sock.read(1)
-                    assert sz == b"\x02"
-                    rcv_pid = self.sock.read(2)
-                    rcv_pid = rcv_pid[0] << 8 | rcv_pid[1]
-                    if pid == rcv_pid:
-                        return
-        elif qos == 2:
-            assert 0
+            pid = self._next_pid()
+            struct.pack_into("!H", buf, i, pid)
+            i += 2
+        if i + nm <= len(buf):
+            # Payload fits, send complete packet at once
+            mv[i:i + nm] = msg
+            self.sock.write(mv[0:i + nm])
+            if qos > 0:
+                self._inflight[pid] = [0x40 if qos == 1 else 0x50,
+                                       bytearray(mv[0:i + nm])]
+        else:
+            self.sock.write(mv[0:i])
+            self.sock.write(msg)
+            if qos > 0:
+                self._inflight[pid] = [0x40 if qos == 1 else 0x50,
+                                       bytearray(mv[0:i]) + msg]
 
     def subscribe(self, topic, qos=0):
         assert self.cb is not None, "Subscribe callback is not set"
         pkt = bytearray(b"\x82\0\0\0")
-        self.pid += 1
-        struct.pack_into("!BH", pkt, 1, 2 + 2 + len(topic) + 1, self.pid)
+        struct.pack_into("!BH", pkt, 1, 2 + 2 + len(topic) + 1, self._next_pid())
         #print(hex(len(pkt)), hexlify(pkt, ":"))
         self.sock.write(pkt)
         self._send_str(topic)
@@ -176,6 +242,12 @@ class MQTTClient:
             assert sz == 0
             return None
         op = res[0]
+        if op & 0xf0 in (0x40, 0x50, 0x60, 0x70):
+            sz = self.sock.read(1)
+            assert sz == b"\x02"
+            pid = self.sock.read(2)
+            self._handle_ack(op & 0xf0, pid[0] << 8 | pid[1])
+            return op
         if op & 0xf0 != 0x30:
             return op
         sz = self._recv_len()
@@ -188,13 +260,16 @@ class MQTTClient:
             pid = pid[0] << 8 | pid[1]
             sz -= 2
         msg = self.sock.read(sz)
+        if op & 6 == 4:
+            # QoS 2: deliver only once, acknowledge with PUBREC
+            if pid not in self._rcvd:
+                self._rcvd.add(pid)
+                self.cb(topic, msg)
+            self._send_ack(0x50, pid)
+            return
         self.cb(topic, msg)
         if op & 6 == 2:
-            pkt = bytearray(b"\x40\x02\0\0")
-            struct.pack_into("!H", pkt, 2, pid)
-            self.sock.write(pkt)
-        elif op & 6 == 4:
-            assert 0
+            self._send_ack(0x40, pid)
 
     # Checks whether a pending message from server is available.
     # If not, returns immediately with None. Otherwise, does
@@ -0,0 +1,284 @@
+# ----------------------------------------------------------------------------
+# store_forward.py
+# Store-and-forward buffer for telemetry messages while the link is down,
+# with optional spill to flash
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# Messages are kept as records [tl, uint8][len, uint16][topic][payload] in a
+# ring buffer in RAM. When the RAM buffer is full, the oldest records are
+# either dropped or, if `spill_path` is given, appended to segment files
+# (<spill_path>.0, <spill_path>.1, ...), which are deleted once forwarded.
+# Segments left over from a previous run are forwarded as well. `drain()`
+# forwards records, oldest first, at a limited rate.
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  import uos as os
+  from micropython import const
+  from utime import ticks_ms, ticks_diff
+  from robotling_lib.misc.ring_buffer import RingBuffer
+except ModuleNotFoundError:
+  # Standard Python imports
+  import os
+  import time
+  const = lambda x : x
+  ticks_ms = lambda : int(time.monotonic() *1000)
+  ticks_diff = lambda t1, t0 : t1 -t0
+  from robotling_lib.misc.ring_buffer import RingBuffer
+
+__version__ = "0.1.0.1"
+
+_REC_HDR      = const(3)
+
+# ----------------------------------------------------------------------------
+class StoreForward(object):
+  """Fixed-size store for messages, with optional spill to flash; records
+     are forwarded with at most `drain_Bps` bytes per second."""
+
+  def __init__(self, ram_bytes=4096, spill_path=None, seg_bytes=16384,
+               max_segs=4, drain_Bps=2000):
+    self._ram = RingBuffer(ram_bytes)
+    self._rec = bytearray(ram_bytes)
+    self._recMv = memoryview(self._rec)
+    self._hdr = bytearray(_REC_HDR)
+    self._path = spill_path
+    self._segBytes = seg_bytes
+    self._maxSegs = max(1, max_segs)
+    self._rate = drain_Bps
+    self._tokens = 0
+    self._tLast = ticks_ms()
+    self._wf = None
+    self._rf = None
+    self._wSeg = 0
+    self._wSize = 0
+    self._rSeg = 0
+    self._rOff = 0
+    self._nRAM = 0
+    self.nDropped = 0
+    if spill_path:
+      self._find_segments()
+
+  @property
+  def has_data(self):
+    return self._nRAM > 0 or self._rSeg < self._wSeg or self._wSize > 0
+
+  @property
+  def ram_records(self):
+    """ Number of records in RAM
+    """
+    return self._nRAM
+
+  @property
+  def segments(self):
+    """ Number of segment files with records
+    """
+    return self._wSeg -self._rSeg +(1 if self._wSize > 0 else 0)
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def put(self, topic, payload):
+    """ Store a message; returns False if it was dropped
+    """
+    if isinstance(payload, str):
+      payload = payload.encode()
+    nt = len(topic)
+    npl = len(payload)
+    n = _REC_HDR +nt +npl
+    ram = self._ram
+    if nt > 255 or n > ram.capacity:
+      self.nDropped += 1
+      return False
+    while ram.free < n:
+      # Move (or drop) the oldest record to make room
+      self._spill_oldest()
+    hdr = self._hdr
+    hdr[0] = nt
+    hdr[1] = npl & 0xFF
+    hdr[2] = npl >> 8
+    ram.put(hdr)
+    ram.put(topic)
+    ram.put(payload)
+    self._nRAM += 1
+    return True
+
+  def drain(self, publish, max_bytes):
+    """ Forward stored records, oldest first, by calling `publish(topic,
+        payload)`, as long as the rate limit and `max_bytes` (e.g. the free
+        space in the client's queue) allow; returns the number of records
+        forwarded
+    """
+    t = ticks_ms()
+    dt = ticks_diff(t, self._tLast)
+    self._tLast = t
+    # Token bucket in [1/1000 byte], such that short intervals (e.g. 1 ms)
+    # are not rounded down to no tokens; burst of 1/4 s, and a record may
+    # overdraw it
+    self._tokens = min(self._tokens +self._rate *dt,
+                       max(1000, self._rate *250))
+    budget = max_bytes
+    nRec = 0
+    while self._tokens > 0:
+      n = self._peek()
+      if n <= 0 or n > budget:
+        break
+      nt = self._rec[0]
+      publish(self._recMv[_REC_HDR:_REC_HDR +nt],
+              self._recMv[_REC_HDR +nt:n])
+      self._consume(n)
+      budget -= n
+      self._tokens -= n *1000
+      nRec += 1
+    return nRec
+
+  def clear(self):
+    """ Discard all records, including the segment files
+    """
+    self._ram.clear()
+    self._nRAM = 0
+    if self._path:
+      self._close_files()
+      for k in range(self._rSeg, self._wSeg +1):
+        self._remove(k)
+      self._rSeg = self._wSeg = 0
+      self._rOff = self._wSize = 0
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def _peek(self):
+    """ Copy the oldest record into `_rec`; returns its size, or 0 if there
+        is none
+    """
+    if self._path and (self._rSeg < self._wSeg or self._wSize > 0):
+      n = self._peek_file()
+      if n > 0:
+        return n
+    if self._nRAM == 0:
+      return 0
+    ram = self._ram
+    n = _REC_HDR +ram.peek(0) +(ram.peek(1) | ram.peek(2) << 8)
+    ram.copy_to(self._recMv, n)
+    return n
+
+  def _consume(self, n):
+    """ Remove the record just forwarded (of `n` bytes)
+    """
+    if self._rf:
+      self._rOff += n
+    else:
+      self._ram.skip(n)
+      self._nRAM -= 1
+
+  def _spill_oldest(self):
+    ram = self._ram
+    n = _REC_HDR +ram.peek(0) +(ram.peek(1) | ram.peek(2) << 8)
+    if self._path:
+      ram.copy_to(self._recMv, n)
+      try:
+        self._append(self._recMv[0:n])
+      except OSError:
+        self.nDropped += 1
+    else:
+      self.nDropped += 1
+    ram.skip(n)
+    self._nRAM -= 1
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def _seg_name(self, k):
+    return "{0}.{1}".format(self._path, k)
+
+  def _remove(self, k):
+    try:
+      os.remove(self._seg_name(k))
+    except OSError:
+      pass
+
+  def _find_segments(self):
+    """ Look for segment files of a previous run
+    """
+    i = self._path.rfind("/")
+    d = self._path[:i] if i > 0 else ("/" if i == 0 else ".")
+    base = self._path[i+1:] +"."
+    segs = []
+    try:
+      for fn in os.listdir(d):
+        if fn.startswith(base) and fn[len(base):].isdigit():
+          segs.append(int(fn[len(base):]))
+    except OSError:
+      pass
+    if segs:
+      self._rSeg = min(segs)
+      self._wSeg = max(segs) +1
+
+  def _append(self, rec):
+    """ Append a record to the current write segment, starting a new one if
+        it is full; drop the oldest segment if there are too many
+    """
+    if self._wf is None:
+      if self._wSeg -self._rSeg >= self._maxSegs:
+        if self._rf:
+          self._rf.close()
+          self._rf = None
+        self._remove(self._rSeg)
+        self._rSeg += 1
+        self._rOff = 0
+        self.nDropped += 1
+      self._wf = open(self._seg_name(self._wSeg), "ab")
+      self._wSize = 0
+    self._wf.write(rec)
+    self._wSize += len(rec)
+    if self._wSize >= self._segBytes:
+      self._close_write_segment()
+
+  def _close_write_segment(self):
+    if self._wf:
+      self._wf.close()
+      self._wf = None
+      self._wSeg += 1
+      self._wSize = 0
+
+  def _peek_file(self):
+    """ Copy the next record from the oldest segment into `_rec`; returns
+        its size, or 0 if all segments are forwarded
+    """
+    while True:
+      if self._rSeg >= self._wSeg:
+        # Reading the segment currently written, close it first
+        if self._wSize == 0:
+          return 0
+        self._close_write_segment()
+      if self._rf is None:
+        try:
+          self._rf = open(self._seg_name(self._rSeg), "rb")
+        except OSError:
+          self._rSeg += 1
+          self._rOff = 0
+          continue
+      self._rf.seek(self._rOff)
+      hdr = self._hdr
+      if self._rf.readinto(hdr) == _REC_HDR:
+        n = _REC_HDR +hdr[0] +(hdr[1] | hdr[2] << 8)
+        if n <= len(self._rec):
+          self._rec[0:_REC_HDR] = hdr
+          if self._rf.readinto(self._recMv[_REC_HDR:n]) == n -_REC_HDR:
+            return n
+      # Segment done (or truncated), delete it
+      self._rf.close()
+      self._rf = None
+      self._remove(self._rSeg)
+      self._rSeg += 1
+      self._rOff = 0
+
+  def _close_files(self):
+    if self._rf:
+      self._rf.close()
+      self._rf = None
+    if self._wf:
+      self._wf.close()
+      self._wf = None
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,152 @@
+# ----------------------------------------------------------------------------
+# telemetry_batch.py
+# Batching of telemetry messages into one framed message, with an unbatcher
+# for the host (Windows/Linux)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# Messages published within a window (or until the frame is full) are
+# collected and sent as one message under <standard topic>/batch:
+#   [0xBA][n, uint8][t0, uint32]               header; t0=ticks_ms at start
+#   [dt, uint16][tl, uint8][len, uint16]       per message; dt in [ms] since
+#   [subtopic, tl bytes][payload, len bytes]   the start of the batch
+# All multibyte values are little endian.
+#
+# Robot:
+#   tele.enable_batching(window_ms=200, max_bytes=512)
+# Host:
+#   for sub, t_ms, payload in unbatch(m.payload):
+#     d = dec.handle(root +sub, payload)        # see `telemetry_codec.py`
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  from micropython import const
+  from utime import ticks_ms, ticks_diff
+except ModuleNotFoundError:
+  # Standard Python imports
+  import time
+  const = lambda x : x
+  ticks_ms = lambda : int(time.monotonic() *1000)
+  ticks_diff = lambda t1, t0 : t1 -t0
+
+__version__ = "0.1.0.1"
+
+MAGIC_BATCH   = 0xBA
+BATCH_TOPIC   = "batch"
+
+_HDR_LEN      = const(6)
+_ENTRY_HDR    = const(5)
+_MAX_NMSGS    = const(255)
+_MAX_TOPICS   = const(32)
+
+# ----------------------------------------------------------------------------
+class Batcher(object):
+  """Collects messages in a preallocated frame of `max_bytes` bytes; the
+     frame is due after `window_ms` since its first message."""
+
+  def __init__(self, window_ms=100, max_bytes=512):
+    self._window = window_ms
+    n = max(max_bytes, _HDR_LEN +_ENTRY_HDR +16)
+    self._buf = bytearray(n)
+    self._buf[0] = MAGIC_BATCH
+    self._mv = memoryview(self._buf)
+    self._topics = {}
+    self._n = 0
+    self._len = _HDR_LEN
+    self._t0 = 0
+
+  @property
+  def count(self):
+    """ Number of messages in the current frame
+    """
+    return self._n
+
+  @property
+  def capacity(self):
+    return len(self._buf)
+
+  def is_due(self):
+    """ True if the frame contains messages and its window has passed
+    """
+    return self._n > 0 and ticks_diff(ticks_ms(), self._t0) >= self._window
+
+  def add(self, t, payload):
+    """ Append `payload` (bytes or str) for the subtopic `t`; returns False
+        if the frame is full (or the message too large for a frame)
+    """
+    tb = self._topics.get(t)
+    if tb is None:
+      tb = t.encode() if isinstance(t, str) else t
+      if len(self._topics) < _MAX_TOPICS:
+        self._topics[t] = tb
+    if isinstance(payload, str):
+      payload = payload.encode()
+    nt = len(tb)
+    npl = len(payload)
+    i = self._len
+    if (self._n >= _MAX_NMSGS or nt > 255 or
+        i +_ENTRY_HDR +nt +npl > len(self._buf)):
+      return False
+    buf = self._buf
+    tms = ticks_ms()
+    if self._n == 0:
+      self._t0 = tms
+      buf[2] = tms & 0xFF
+      buf[3] = (tms >> 8) & 0xFF
+      buf[4] = (tms >> 16) & 0xFF
+      buf[5] = (tms >> 24) & 0xFF
+    dt = min(max(0, ticks_diff(tms, self._t0)), 0xFFFF)
+    buf[i] = dt & 0xFF
+    buf[i+1] = dt >> 8
+    buf[i+2] = nt
+    buf[i+3] = npl & 0xFF
+    buf[i+4] = npl >> 8
+    i += _ENTRY_HDR
+    self._mv[i:i +nt] = tb
+    i += nt
+    self._mv[i:i +npl] = payload
+    self._len = i +npl
+    self._n += 1
+    return True
+
+  def take(self):
+    """ Returns the frame as a memoryview (valid until the next `add()`) and
+        starts a new one
+    """
+    self._buf[1] = self._n
+    n = self._len
+    self._n = 0
+    self._len = _HDR_LEN
+    return self._mv[0:n]
+
+# ----------------------------------------------------------------------------
+def unbatch(payload):
+  """ Split a batch frame into a list of `(subtopic, t_ms, payload)`, with
+      `t_ms` in the robot's `ticks_ms` time; returns an empty list if the
+      payload is not a batch
+  """
+  res = []
+  if len(payload) < _HDR_LEN or payload[0] != MAGIC_BATCH:
+    return res
+  t0 = payload[2] | payload[3] << 8 | payload[4] << 16 | payload[5] << 24
+  i = _HDR_LEN
+  for _ in range(payload[1]):
+    if i +_ENTRY_HDR > len(payload):
+      break
+    dt = payload[i] | payload[i+1] << 8
+    nt = payload[i+2]
+    npl = payload[i+3] | payload[i+4] << 8
+    i += _ENTRY_HDR
+    sub = bytes(payload[i:i +nt]).decode()
+    i += nt
+    res.append((sub, t0 +dt, bytes(payload[i:i +npl])))
+    i += npl
+  return res
+
+# ----------------------------------------------------------------------------
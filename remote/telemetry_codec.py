@@ -0,0 +1,171 @@
+# ----------------------------------------------------------------------------
+# telemetry_codec.py
+# Compact binary encoding of telemetry dictionaries based on schemas, with a
+# decoder for the host (Windows/Linux)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+# 2026-10-19, v1.1, `SchemaDecoder` decrypts messages (optional)
+#
+# A schema lists the keys of a dictionary (nested keys as path, e.g.
+# "sensors/dist") and the type of each value as `struct` format character,
+# optionally preceded by a count for lists (e.g. "3h"). The robot publishes
+# the schema once as retained message under <topic>/schema (JSON) and then
+# only the packed values under <topic>:
+#   [0xB5][schema ID, uint8][values, little endian]
+# Missing values are sent as 0.
+#
+# Robot:
+#   tele.register_schema("state", [("hs", "B"), ("v", "H"),
+#                                  ("imu/hpr", "3f")])
+#   tele.publishDict("state", {"hs": 1, "v": 7400, "imu": {"hpr": [..]}})
+# Host:
+#   dec = SchemaDecoder()
+#   def on_message(client, userdata, m):
+#     d = dec.handle(m.topic, m.payload)   # dict or None
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  import ustruct as struct
+  import ujson as json
+except ModuleNotFoundError:
+  # Standard Python imports
+  import struct
+  import json
+
+__version__ = "0.1.1.1"
+
+MAGIC_SCHEMA  = 0xB5
+SCHEMA_SUFFIX = "/schema"
+
+_HDR_LEN      = 2
+
+# ----------------------------------------------------------------------------
+def _parse_type(typ):
+  """ Returns count and format character of a type string like "3h"
+  """
+  n = int(typ[:-1]) if len(typ) > 1 else 1
+  return n, typ[-1]
+
+# ----------------------------------------------------------------------------
+class TelemetrySchema(object):
+  """Schema with the keys and value types of a telemetry dictionary; packs
+     dictionaries into a preallocated buffer."""
+
+  def __init__(self, ID, fields):
+    """ Create schema with `ID` (0..255) from the list `fields` of
+        `(key, type)`
+    """
+    self._ID = ID & 0xFF
+    self._keys = [f[0] for f in fields]
+    self._paths = [f[0].split("/") for f in fields]
+    self._counts = bytearray([_parse_type(f[1])[0] for f in fields])
+    self._isFloat = bytearray([_parse_type(f[1])[1] in "fde" for f in fields])
+    self._fmt = "<" +"".join([f[1] for f in fields])
+    self._size = _HDR_LEN +struct.calcsize(self._fmt)
+    self._buf = bytearray(self._size)
+    self._buf[0] = MAGIC_SCHEMA
+    self._buf[1] = self._ID
+    self._mv = memoryview(self._buf)
+    self._vals = [0]*sum(self._counts)
+
+  @property
+  def ID(self):
+    return self._ID
+
+  @property
+  def size(self):
+    """ Size of a packed message in bytes
+    """
+    return self._size
+
+  def to_json(self):
+    """ Returns the schema as JSON string (to be published as retained
+        message)
+    """
+    return json.dumps({"id": self._ID, "fmt": self._fmt, "keys": self._keys,
+                       "n": list(self._counts)})
+
+  def pack(self, d):
+    """ Pack the values of dictionary `d` and return them as a memoryview of
+        the internal buffer (valid until the next call)
+    """
+    vals = self._vals
+    j = 0
+    for i, path in enumerate(self._paths):
+      v = d
+      for k in path:
+        v = v.get(k) if isinstance(v, dict) else None
+      n = self._counts[i]
+      zero = 0.0 if self._isFloat[i] else 0
+      if n == 1:
+        vals[j] = zero if v is None else v
+        j += 1
+      else:
+        for l in range(n):
+          vals[j] = v[l] if v is not None and l < len(v) else zero
+          j += 1
+    struct.pack_into(self._fmt, self._buf, _HDR_LEN, *vals)
+    return self._mv
+
+# ----------------------------------------------------------------------------
+def decode(schema, payload):
+  """ Decode a binary telemetry message `payload` using `schema` (as
+      dictionary, see `TelemetrySchema.to_json()`) into a (nested)
+      dictionary; returns None if the payload does not match the schema
+  """
+  if len(payload) < _HDR_LEN or payload[0] != MAGIC_SCHEMA:
+    return None
+  if payload[1] != schema["id"]:
+    return None
+  fmt = schema["fmt"]
+  if len(payload) < _HDR_LEN +struct.calcsize(fmt):
+    return None
+  vals = struct.unpack_from(fmt, payload, _HDR_LEN)
+  d = {}
+  j = 0
+  for key, n in zip(schema["keys"], schema["n"]):
+    path = key.split("/")
+    dd = d
+    for k in path[:-1]:
+      dd = dd.setdefault(k, {})
+    dd[path[-1]] = vals[j] if n == 1 else list(vals[j:j+n])
+    j += n
+  return d
+
+class SchemaDecoder(object):
+  """Host side: collects the retained schema messages and decodes binary
+     telemetry messages; encrypted messages are decrypted with `decryptor`
+     (see `telemetry_crypt.py`), if given."""
+
+  def __init__(self, decryptor=None):
+    self._schemas = {}
+    self._decryptor = decryptor
+
+  def handle(self, topic, payload, plain=False):
+    """ Process a message; returns the decoded dictionary for a binary
+        telemetry message with known schema, the decoded JSON for other
+        messages, or None (e.g. for schema messages). Set `plain` True for
+        messages that are not encrypted (e.g. taken from a decrypted batch)
+    """
+    if self._decryptor and not plain:
+      payload = self._decryptor.decrypt(payload)
+      if payload is None:
+        return None
+    if topic.endswith(SCHEMA_SUFFIX):
+      self._schemas[topic[:-len(SCHEMA_SUFFIX)]] = json.loads(payload)
+      return None
+    if len(payload) and payload[0] == MAGIC_SCHEMA:
+      sch = self._schemas.get(topic)
+      return decode(sch, payload) if sch else None
+    try:
+      return json.loads(payload)
+    except ValueError:
+      return None
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,174 @@
+# ----------------------------------------------------------------------------
+# telemetry_crypt.py
+# AES-CBC encryption of telemetry messages into a preallocated buffer, with
+# a decryptor for the host (Windows/Linux)
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# An encrypted message is [IV, 16 bytes][ciphertext], with the payload
+# padded according to PKCS#7 (1..16 bytes, each the number of padding
+# bytes), such that binary payloads are recovered exactly. Each message has
+# its own IV, the encrypted value of a message counter (which starts at a
+# random value). CBC is computed block by block with one AES-ECB object,
+# in place in a buffer sized for the largest message (`max_len`), such that
+# encrypting does not allocate memory.
+#
+# Robot (`Telemetry` does this if `my_mqtt_encrypt_key` is defined in
+# `NETWORK.py`):
+#   enc = Encryptor(key, max_len=512)
+#   client.publish(topic, enc.encrypt(payload))
+# Host (requires the package `cryptography` or `pycryptodome`):
+#   dec = Decryptor(key)
+#   payload = dec.decrypt(m.payload)           # None if invalid
+# or, with `telemetry_codec.py` and `telemetry_batch.py`:
+#   sdec = SchemaDecoder(dec)
+#   d = sdec.handle(m.topic, m.payload)
+#   for sub, t_ms, p in unbatch(dec.decrypt(m.payload)):
+#     d = sdec.handle(root +sub, p, plain=True)
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  import micropython
+  import uos as os
+  from ucryptolib import aes
+except ModuleNotFoundError:
+  # Standard Python imports
+  import os
+  import types
+  micropython = types.SimpleNamespace(native=lambda f : f)
+  aes = None
+
+__version__ = "0.1.0.0"
+
+BLOCK_LEN     = 16
+_MODE_ECB     = 1
+
+# ----------------------------------------------------------------------------
+@micropython.native
+def _xor_block(buf, i):
+  """ XOR the block at `i` with the previous block
+  """
+  for j in range(i, i +16):
+    buf[j] ^= buf[j -16]
+
+def _host_ecb(key):
+  """ Returns an AES-ECB object with `encrypt(in_buf, out_buf)` and
+      `decrypt(in_buf, out_buf)` on the host
+  """
+  try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    c = Cipher(algorithms.AES(bytes(key)), modes.ECB())
+    enc = c.encryptor()
+    dec = c.decryptor()
+    class _ECB(object):
+      def encrypt(self, i, o):
+        o[:] = enc.update(bytes(i))
+      def decrypt(self, i, o):
+        o[:] = dec.update(bytes(i))
+    return _ECB()
+  except ImportError:
+    from Crypto.Cipher import AES
+    c = AES.new(bytes(key), AES.MODE_ECB)
+    class _ECB(object):
+      def encrypt(self, i, o):
+        o[:] = c.encrypt(bytes(i))
+      def decrypt(self, i, o):
+        o[:] = c.decrypt(bytes(i))
+    return _ECB()
+
+def _ecb(key):
+  return aes(key, _MODE_ECB) if aes else _host_ecb(key)
+
+# ----------------------------------------------------------------------------
+class Encryptor(object):
+  """Encrypts messages of up to `max_len` bytes with AES-CBC (`key` with
+     16, 24 or 32 bytes) into an internal buffer."""
+
+  def __init__(self, key, max_len=512):
+    assert len(key) in (16, 24, 32), "Key must have 16, 24 or 32 bytes"
+    self._ecb = _ecb(key)
+    self._maxLen = max_len
+    n = BLOCK_LEN +(max_len //BLOCK_LEN +1) *BLOCK_LEN
+    self._buf = bytearray(n)
+    self._mv = memoryview(self._buf)
+    # Views of each block and of the first k blocks, created once, such
+    # that encrypting does not allocate memory
+    self._blocks = [self._mv[i:i +BLOCK_LEN] for i in range(0, n, BLOCK_LEN)]
+    self._views = [self._mv[0:i] for i in range(BLOCK_LEN, n +1, BLOCK_LEN)]
+    try:
+      self._ctr = bytearray(os.urandom(BLOCK_LEN))
+    except (AttributeError, NotImplementedError):
+      self._ctr = bytearray(BLOCK_LEN)
+    self.nTooLong = 0
+
+  @property
+  def max_len(self):
+    return self._maxLen
+
+  def encrypt(self, payload):
+    """ Encrypt `payload` (bytes, bytearray, memoryview or str) and return
+        the message as memoryview (valid until the next call), or None if
+        the payload is longer than `max_len`
+    """
+    if isinstance(payload, str):
+      payload = payload.encode()
+    n = len(payload)
+    if n > self._maxLen:
+      self.nTooLong += 1
+      return None
+    buf = self._buf
+    blocks = self._blocks
+    npad = BLOCK_LEN -n %BLOCK_LEN
+    m = BLOCK_LEN +n +npad
+    self._mv[BLOCK_LEN:BLOCK_LEN +n] = payload
+    for i in range(BLOCK_LEN +n, m):
+      buf[i] = npad
+    # New IV from the encrypted counter
+    ctr = self._ctr
+    for i in range(BLOCK_LEN -1, -1, -1):
+      ctr[i] = (ctr[i] +1) & 0xFF
+      if ctr[i]:
+        break
+    ecb = self._ecb
+    ecb.encrypt(ctr, blocks[0])
+    # CBC: each block is XORed with the previous ciphertext block
+    for k in range(1, m //BLOCK_LEN):
+      _xor_block(buf, k *BLOCK_LEN)
+      ecb.encrypt(blocks[k], blocks[k])
+    return self._views[m //BLOCK_LEN -1]
+
+# ----------------------------------------------------------------------------
+class Decryptor(object):
+  """Host side: decrypts messages of `Encryptor`."""
+
+  def __init__(self, key):
+    self._ecb = _ecb(key)
+    self.nInvalid = 0
+
+  def decrypt(self, msg):
+    """ Returns the payload of the encrypted message `msg`, or None if the
+        message is invalid (e.g. wrong key)
+    """
+    m = len(msg)
+    if m < 2 *BLOCK_LEN or m %BLOCK_LEN:
+      self.nInvalid += 1
+      return None
+    out = bytearray(m -BLOCK_LEN)
+    blk = bytearray(BLOCK_LEN)
+    for i in range(BLOCK_LEN, m, BLOCK_LEN):
+      self._ecb.decrypt(msg[i:i +BLOCK_LEN], blk)
+      for j in range(BLOCK_LEN):
+        out[i -BLOCK_LEN +j] = blk[j] ^ msg[i -BLOCK_LEN +j]
+    npad = out[-1]
+    if not 1 <= npad <= BLOCK_LEN or out[-npad:] != bytes([npad]) *npad:
+      self.nInvalid += 1
+      return None
+    return bytes(out[:-npad])
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,106 @@
+# ----------------------------------------------------------------------------
+# telemetry_policy.py
+# Per-topic publishing policies for telemetry: rate limit, decimation,
+# deadband and priority
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# A policy is configured once per topic and then decides with a few
+# comparisons whether a message is published:
+# - `max_rate` limits the rate in [Hz] (0=no limit),
+# - `decimate` passes only every N-th message,
+# - `deadband` passes a message only if the value (a number, or for a
+#   dictionary the number under `key`, e.g. "power/battery_V") differs from
+#   the last value published by at least `deadband` (or, with `relative`
+#   True, by that fraction of the last value),
+# - `priority`: PRIO_HIGH messages (e.g. alarms) bypass batching and jump
+#   the outbound queue, PRIO_LOW messages are skipped when the queue is more
+#   than half full.
+#
+#   tele.set_policy("power", max_rate=1, deadband=0.05, key="battery_V")
+#   tele.set_policy("alarm", priority=PRIO_HIGH)
+# ----------------------------------------------------------------------------
+try:
+  ModuleNotFoundError
+except NameError:
+  ModuleNotFoundError = ImportError
+try:
+  # Micropython imports
+  from micropython import const
+  from utime import ticks_ms, ticks_diff
+except ModuleNotFoundError:
+  # Standard Python imports
+  import time
+  const = lambda x : x
+  ticks_ms = lambda : int(time.monotonic() *1000)
+  ticks_diff = lambda t1, t0 : t1 -t0
+
+__version__ = "0.1.0.0"
+
+PRIO_LOW      = const(0)
+PRIO_NORMAL   = const(1)
+PRIO_HIGH     = const(2)
+
+# ----------------------------------------------------------------------------
+class TopicPolicy(object):
+  """Decides if a message for a topic is published, based on its rate,
+     a decimation factor and a deadband for its value."""
+
+  def __init__(self, max_rate=0, decimate=1, deadband=0, relative=False,
+               key=None, priority=PRIO_NORMAL):
+    self._dt_ms = int(1000 /max_rate) if max_rate > 0 else 0
+    self._decim = max(1, decimate)
+    self._db = deadband
+    self._rel = relative
+    self._path = key.split("/") if key else None
+    self.priority = priority
+    self._n = self._decim -1
+    self._tLast = 0
+    self._vLast = None
+    self.nPassed = 0
+    self.nSkipped = 0
+
+  def accept(self, m):
+    """ Returns True if message `m` (a number, dictionary, string, ...)
+        is to be published
+    """
+    # Decimation counts every message
+    self._n += 1
+    if self._n < self._decim:
+      self.nSkipped += 1
+      return False
+    t = ticks_ms()
+    if self._dt_ms and self.nPassed and ticks_diff(t, self._tLast) < self._dt_ms:
+      self.nSkipped += 1
+      return False
+    v = None
+    if self._db:
+      v = m
+      if self._path:
+        for k in self._path:
+          v = v.get(k) if isinstance(v, dict) else None
+      if not isinstance(v, (int, float)):
+        v = None
+      elif self._vLast is not None:
+        db = self._db *abs(self._vLast) if self._rel else self._db
+        if abs(v -self._vLast) < db:
+          self.nSkipped += 1
+          return False
+    self._n = 0
+    self._tLast = t
+    if v is not None:
+      self._vLast = v
+    self.nPassed += 1
+    return True
+
+  def reset(self):
+    """ Forget the last value and time, such that the next message passes
+        (e.g. after reconnecting)
+    """
+    self._n = self._decim -1
+    self._vLast = None
+    self.nPassed = 0
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,129 @@
+# ----------------------------------------------------------------------------
+# topic_dispatch.py
+# Dispatches incoming MQTT messages to handlers registered for topic filters
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# Topic filters are stored as a prefix tree of topic levels, with the
+# wildcards `+` (one level) and `#` (this and all following levels) as
+# special children of a node. Matching a topic walks the tree once per
+# level instead of comparing the topic with every filter. As in MQTT,
+# wildcards at the first level do not match topics starting with `$`.
+#
+#   disp = TopicDispatcher()
+#   disp.add("rob/cmd/#", on_command)
+#   disp.add("rob/+/status", on_status)
+#   client.set_callback(disp.dispatch)
+# ----------------------------------------------------------------------------
+__version__ = "0.1.0.0"
+
+_CHILDREN     = 0
+_PLUS         = 1
+_HASH         = 2
+_HANDLERS     = 3
+
+def _b(s):
+  return s.encode() if isinstance(s, str) else bytes(s)
+
+def _new_node():
+  # [children by level, `+` child, handlers for `#`, handlers]
+  return [{}, None, [], []]
+
+# ----------------------------------------------------------------------------
+class TopicDispatcher(object):
+  """Registry of handlers `f(topic, msg)` for topic filters."""
+
+  def __init__(self):
+    self._root = _new_node()
+    self._n = 0
+    self.nUnhandled = 0
+
+  @property
+  def count(self):
+    """ Number of registered handlers
+    """
+    return self._n
+
+  def add(self, filt, handler):
+    """ Register `handler` for the topic filter `filt` (str or bytes)
+    """
+    node = self._root
+    levels = _b(filt).split(b"/")
+    for i, lev in enumerate(levels):
+      if lev == b"#":
+        assert i == len(levels) -1, "`#` must be the last level"
+        node[_HASH].append(handler)
+        self._n += 1
+        return
+      if lev == b"+":
+        if node[_PLUS] is None:
+          node[_PLUS] = _new_node()
+        node = node[_PLUS]
+      else:
+        child = node[_CHILDREN].get(lev)
+        if child is None:
+          child = node[_CHILDREN][lev] = _new_node()
+        node = child
+    node[_HANDLERS].append(handler)
+    self._n += 1
+
+  def remove(self, filt, handler=None):
+    """ Unregister `handler` (or all handlers, if None) for `filt`; returns
+        the number of handlers removed
+    """
+    node = self._root
+    levels = _b(filt).split(b"/")
+    hl = None
+    for lev in levels:
+      if lev == b"#":
+        hl = node[_HASH]
+        break
+      node = node[_PLUS] if lev == b"+" else node[_CHILDREN].get(lev)
+      if node is None:
+        return 0
+    if hl is None:
+      hl = node[_HANDLERS]
+    n = len(hl)
+    if handler is None:
+      del hl[:]
+    else:
+      while handler in hl:
+        hl.remove(handler)
+    n -= len(hl)
+    self._n -= n
+    return n
+
+  def dispatch(self, topic, msg):
+    """ Call the handlers of all filters matching `topic` (bytes) with
+        `(topic, msg)`; returns the number of handlers called
+    """
+    levels = _b(topic).split(b"/")
+    n = self._match(self._root, levels, 0, topic, msg)
+    if n == 0:
+      self.nUnhandled += 1
+    return n
+
+  def _match(self, node, levels, i, topic, msg):
+    n = 0
+    # Wildcards do not match topics starting with `$` (e.g. "$SYS/...")
+    wild = i > 0 or not levels[0].startswith(b"$")
+    if wild:
+      # `#` also matches the parent level ("a/#" matches "a")
+      for h in node[_HASH]:
+        h(topic, msg)
+        n += 1
+    if i == len(levels):
+      for h in node[_HANDLERS]:
+        h(topic, msg)
+        n += 1
+      return n
+    child = node[_CHILDREN].get(levels[i])
+    if child is not None:
+      n += self._match(child, levels, i +1, topic, msg)
+    if wild and node[_PLUS] is not None:
+      n += self._match(node[_PLUS], levels, i +1, topic, msg)
+    return n
+
+# ----------------------------------------------------------------------------
@@ -0,0 +1,233 @@
+# ----------------------------------------------------------------------------
+# wlan_connector.py
+# Non-blocking connection to a WLAN with timeout, retries and cached access
+# point
+#
+# The MIT License (MIT)
+# Copyright (c) 2026 Thomas Euler
+# 2026-10-19, v1
+#
+# `spin()`, which needs to be called regularly, advances a state machine
+# that connects the station interface, gives up an attempt after
+# `timeout_ms`, retries with exponential backoff and reconnects if the
+# connection is lost. The access point (BSSID) is cached in a file, such
+# that the station connects to it directly, w/o scanning for the SSID. Only
+# `wait()` (e.g. at boot) scans for the strongest access point if none is
+# cached, as scanning blocks for ~2 s; `spin()` never blocks. If the cached
+# access point cannot be reached `_MAX_AP_FAILS` times in a row, the
+# station connects by SSID until the next `wait()` scans again.
+#
+#   wlan = WLANConnector()                # credentials from `NETWORK.py`
+#   wlan.start()
+#   while True:
+#     wlan.spin()
+#     if wlan.is_connected:
+#       ...
+# ----------------------------------------------------------------------------
+import network
+from micropython import const
+from utime import ticks_ms, ticks_diff, ticks_add, sleep_ms
+from ubinascii import hexlify, unhexlify
+
+__version__ = "0.1.0.1"
+
+# Connection states
+WL_IDLE           = const(0)   # not started or stopped
+WL_BACKOFF        = const(1)   # waiting before the next attempt
+WL_CONNECTING     = const(2)
+WL_CONNECTED      = const(3)
+
+_TIMEOUT_MS       = const(10000)
+_BACKOFF_MIN_MS   = const(1000)
+_BACKOFF_MAX_MS   = const(60000)
+_CHECK_MS         = const(500)  # Interval to check an established connection
+_MAX_AP_FAILS     = const(3)    # Failed attempts before the cached AP is
+                                # no longer used
+_CACHE_FILE       = "/wlan_ap.txt"
+
+# ----------------------------------------------------------------------------
+class WLANConnector(object):
+  """Connects the station interface to the WLAN `ssid` (with `password`);
+     if not given, `my_ssid` and `my_wp2_pwd` from `NETWORK.py` are used."""
+
+  def __init__(self, ssid=None, password=None, timeout_ms=_TIMEOUT_MS,
+               max_backoff_ms=_BACKOFF_MAX_MS, cache_file=_CACHE_FILE,
+               scan=True):
+    if ssid is None:
+      from NETWORK import my_ssid, my_wp2_pwd
+      ssid = my_ssid
+      password = my_wp2_pwd
+    self._ssid = ssid
+    self._pwd = password
+    self._timeout = timeout_ms
+    self._maxBackoff = max_backoff_ms
+    self._cacheFile = cache_file
+    self._doScan = scan
+    self._sta = network.WLAN(network.STA_IF)
+    self._state = WL_IDLE
+    self._tState = 0
+    self._tCheck = 0
+    self._backoff = _BACKOFF_MIN_MS
+    self._usedCache = False
+    self._nAPFails = 0
+    self._bssid = None
+    self.nAttempts = 0
+    self.nReconnects = 0
+    self._load_cache()
+
+  @property
+  def state(self):
+    return self._state
+
+  @property
+  def is_connected(self):
+    return self._state == WL_CONNECTED
+
+  @property
+  def access_point(self):
+    """ Returns the BSSID (bytes) of the cached access point, or None
+    """
+    return self._bssid
+
+  @property
+  def ifconfig(self):
+    return self._sta.ifconfig()
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def start(self):
+    """ Start connecting (w/o waiting); `spin()` does the rest
+    """
+    if self._state == WL_IDLE:
+      self._sta.active(True)
+      self._state = WL_BACKOFF
+      self._tState = ticks_ms()
+      self._backoff = _BACKOFF_MIN_MS
+
+  def stop(self):
+    """ Disconnect and stop reconnecting
+    """
+    self._sta.disconnect()
+    self._state = WL_IDLE
+
+  def spin(self):
+    """ Advance the connection state machine; returns the state
+    """
+    st = self._state
+    if st == WL_IDLE:
+      return st
+    t = ticks_ms()
+    if st == WL_CONNECTED:
+      if ticks_diff(t, self._tCheck) >= _CHECK_MS:
+        self._tCheck = t
+        if not self._sta.isconnected():
+          # Connection lost, reconnect right away
+          self.nReconnects += 1
+          self._state = WL_BACKOFF
+          self._tState = t
+          self._backoff = _BACKOFF_MIN_MS
+    elif st == WL_BACKOFF:
+      if ticks_diff(t, self._tState) >= 0:
+        self._begin(t)
+    elif st == WL_CONNECTING:
+      if self._sta.isconnected():
+        self._state = WL_CONNECTED
+        self._tCheck = t
+        self._backoff = _BACKOFF_MIN_MS
+        self._nAPFails = 0
+      elif ticks_diff(t, self._tState) > self._timeout:
+        self._fail(t)
+    return self._state
+
+  def wait(self, timeout_ms, idle=None):
+    """ Start connecting and wait until connected, but at most `timeout_ms`;
+        `idle()` (e.g. blinking a LED) is called every 50 ms. Returns True
+        if connected. If no access point is cached, scans for one first
+    """
+    self.start()
+    t0 = ticks_ms()
+    if self._bssid is None and self._doScan and not self._sta.isconnected():
+      self._scan()
+    while self.spin() != WL_CONNECTED:
+      if ticks_diff(ticks_ms(), t0) > timeout_ms:
+        return False
+      if idle:
+        idle()
+      sleep_ms(50)
+    return True
+
+  # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+  def _begin(self, t):
+    """ Start a connection attempt
+    """
+    sta = self._sta
+    self.nAttempts += 1
+    if sta.isconnected():
+      self._state = WL_CONNECTED
+      self._tCheck = t
+      return
+    self._usedCache = self._bssid is not None
+    try:
+      if self._bssid:
+        try:
+          sta.connect(self._ssid, self._pwd, bssid=self._bssid)
+        except TypeError:
+          # Port does not support selecting the access point
+          sta.connect(self._ssid, self._pwd)
+      else:
+        sta.connect(self._ssid, self._pwd)
+    except OSError:
+      self._fail(t)
+      return
+    self._state = WL_CONNECTING
+    self._tState = t
+
+  def _fail(self, t):
+    """ Give up the current attempt and schedule the next one
+    """
+    try:
+      self._sta.disconnect()
+    except OSError:
+      pass
+    if self._usedCache:
+      self._nAPFails += 1
+      if self._nAPFails >= _MAX_AP_FAILS:
+        # The cached access point may be gone; connect by SSID from now on
+        self._bssid = None
+        self._nAPFails = 0
+    self._state = WL_BACKOFF
+    self._tState = ticks_add(t, self._backoff)
+    self._backoff = min(self._backoff *2, self._maxBackoff)
+
+  def _scan(self):
+    """ Find the access point with the strongest signal for the SSID and
+        cache it
+    """
+    best = None
+    try:
+      ssid = self._ssid.encode() if isinstance(self._ssid, str) else self._ssid
+      for ap in self._sta.scan():
+        if ap[0] == ssid and (best is None or ap[3] > best[3]):
+          best = ap
+    except OSError:
+      return
+    if best:
+      self._bssid = bytes(best[1])
+      self._nAPFails = 0
+      self._save_cache()
+
+  def _load_cache(self):
+    try:
+      with open(self._cacheFile, "r") as f:
+        b = unhexlify(f.read().strip().split(",")[0])
+      self._bssid = b if len(b) == 6 else None
+    except (OSError, ValueError):
+      self._bssid = None
+
+  def _save_cache(self):
+    try:
+      with open(self._cacheFile, "w") as f:
+        f.write(hexlify(self._bssid).decode())
+    except OSError:
+      pass
+
+# ----------------------------------------------------------------------------
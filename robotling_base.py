@@ -9,6 +9,7 @@
 # 2020-10-31, v1.1, use `languageID` instead of `ID`
 # 2020-12-21, v1.2, moved all RGB pixel management here
 # 2022-01-02, v1.3, Nano RP2040 Connect added, memory functions refined
+# 2026-10-19, v1.4, non-blocking WLAN connection with timeout and retries
 # ----------------------------------------------------------------------------
 import gc
 import array
@@ -36,7 +37,7 @@ else:
   print(ansi.RED +"ERROR: No matching libraries in `platform`." +ansi.BLACK)
 
 # pylint: disable=bad-whitespace
-__version__     = "0.1.3.0"
+__version__     = "0.1.4.0"
 # pylint: enable=bad-whitespace
 
 # ----------------------------------------------------------------------------
@@ -49,8 +50,9 @@ class RobotlingBase(object):
 
   Methods:
   -------
-  - connectToWLAN():
-    Connect to WLAN if not already connected
+  - connectToWLAN(timeout_ms=15000, blocking=True):
+    Connect to WLAN if not already connected; waits at most `timeout_ms`,
+    then (or if not `blocking`) continues connecting in `updateStart()`
 
   - updateStart(), updateEnd()
     To be called at the beginning and the end of an update routine
@@ -74,6 +76,7 @@ class RobotlingBase(object):
   - memory         : Returns allocated and free memory as tuple
   - PixelRGB       : get and set color (r,g,b tuple or color wheel index)
   - dotStarPower   : Turns power to DotStar LED, if any, on or off
+  - isWLANConnected: True if connected to the WLAN
 
   Internal objects:
   ----------------
@@ -103,6 +106,7 @@ class RobotlingBase(object):
     self.onboardLED = None
     self._NPx = None
     self._DS = None
+    self._WLAN = None
     self._collect()
 
     if MCP3208:
@@ -207,6 +211,8 @@ class RobotlingBase(object):
       self._MCP3208.update()
     if self._Pix_enablePulse:
       self._pulsePixel()
+    if self._WLAN:
+      self._WLAN.spin()
 
   def updateEnd(self):
     """ To be called at the end of the update function
@@ -276,25 +282,36 @@ class RobotlingBase(object):
       time.sleep_ms(dur_ms)
 
   # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-  def connectToWLAN(self):
-    """ Connect to WLAN if not already connected
+  def connectToWLAN(self, timeout_ms=15000, blocking=True):
+    """ Connect to WLAN if not already connected; waits at most `timeout_ms`
+        (if `blocking`) and returns True if connected. Otherwise, connecting
+        (and reconnecting) continues in the background in `updateStart()`
     """
     if pf.ID in [pf.ENV_ESP32_UPY, pf.ENV_ESP32_TINYPICO, pf.ENV_ESP32_S2,
                  pf.ENV_MPY_RP2_NANOCONNECT]:
-      import network
-      from NETWORK import my_ssid, my_wp2_pwd
-      if not network.WLAN(network.STA_IF).isconnected():
-        sta_if = network.WLAN(network.STA_IF)
-        if not sta_if.isconnected():
-          print('Connecting to network...')
-          sta_if.active(True)
-          sta_if.connect(my_ssid, my_wp2_pwd)
-          while not sta_if.isconnected():
-            self.onboardLED.on()
-            time.sleep(0.05)
-            self.onboardLED.off()
-            time.sleep(0.05)
-          print("[{0:>12}] {1}".format("network", sta_if.ifconfig()))
+      if self._WLAN is None:
+        from robotling_lib.remote.wlan_connector import WLANConnector
+        self._WLAN = WLANConnector()
+      self._WLAN.start()
+      if blocking and not self._WLAN.is_connected:
+        print('Connecting to network...')
+        if self._WLAN.wait(timeout_ms, self._blinkLED):
+          print("[{0:>12}] {1}".format("network", self._WLAN.ifconfig))
+        else:
+          print(ansi.YELLOW +"[{0:>12}] {1}".format("network",
+                "not yet connected, continuing ...") +ansi.BLACK)
+        if self.onboardLED:
+          self.onboardLED.off()
+      return self._WLAN.is_connected
+    return False
+
+  @property
+  def isWLANConnected(self):
+    return self._WLAN is not None and self._WLAN.is_connected
+
+  def _blinkLED(self):
+    if self.onboardLED:
+      self.onboardLED.value = not self.onboardLED.value
 
   # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
   def printReport(self):